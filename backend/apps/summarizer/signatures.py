@@ -0,0 +1,13 @@
+"""
+Lightweight task signatures for the web tier.
+
+Views enqueue summary jobs through these helpers instead of importing
+``tasks.py``, which pulls in the Gemini client on the worker side.
+"""
+from celery import signature
+
+GENERATE_SUMMARY_TASK = 'apps.summarizer.tasks.generate_summary_task'
+
+
+def generate_summary_signature(summary_id, **options):
+    return signature(GENERATE_SUMMARY_TASK, args=(summary_id,), **options)
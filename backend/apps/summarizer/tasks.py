@@ -2,7 +2,6 @@ from celery import shared_task
 from django.conf import settings
 from django.utils import timezone
 from .models import Summary
-import google.generativeai as genai
 import json
 import time
 import logging
@@ -14,6 +13,8 @@ def generate_summary_task(self, summary_id):
     """
     Celery task to generate AI summary from transcript text using OpenAI API
     """
+    import google.generativeai as genai
+
     try:
         summary = Summary.objects.get(id=summary_id)
         summary.status = 'processing'
@@ -89,6 +90,8 @@ def _generate_gemini_summary(transcript_text):
     """
     Generate summary using Google Gemini API
     """
+    import google.generativeai as genai
+
     # Prepare the prompt
     prompt = f"""
 Please analyze the following transcript and provide a comprehensive summary with the following components:
@@ -4,7 +4,7 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from .models import Summary
 from .serializers import SummaryCreateSerializer, SummarySerializer, SummaryListSerializer
-from .tasks import generate_summary_task
+from .signatures import generate_summary_signature
 
 class SummaryViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
@@ -24,7 +24,7 @@ class SummaryViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         summary = serializer.save()
 
-        generate_summary_task.delay(summary.id)
+        generate_summary_signature(summary.id).delay()
 
         response_serializer = SummarySerializer(summary, context={'request': request})
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
@@ -49,7 +49,7 @@ class SummaryViewSet(viewsets.ModelViewSet):
         summary.action_items = []
         summary.save()
 
-        generate_summary_task.delay(summary.id)
+        generate_summary_signature(summary.id).delay()
 
         serializer = self.get_serializer(summary)
         return Response(serializer.data)
@@ -1,12 +1,12 @@
 from django.contrib import admin
-from .models import Transcript
+from .models import Transcript, AudioCompaction
 
 @admin.register(Transcript)
 class TranscriptAdmin(admin.ModelAdmin):
     list_display = ['title', 'user', 'status', 'file_name', 'file_size', 'duration', 'created_at']
-    list_filter = ['status', 'language', 'created_at']
+    list_filter = ['status', 'refinement', 'language', 'created_at']
     search_fields = ['title', 'file_name', 'user__username']
-    readonly_fields = ['file_size', 'file_type', 'raw_text', 'duration', 'language', 'confidence', 'created_at', 'updated_at', 'completed_at']
+    readonly_fields = ['file_size', 'file_type', 'content_hash', 'original_file', 'raw_text', 'duration', 'language', 'confidence', 'model_used', 'upgrade_model', 'refinement', 'draft_model', 'draft_text', 'similar_transcript', 'similar_offset', 'created_at', 'updated_at', 'completed_at']
     ordering = ['-created_at']
 
     fieldsets = (
@@ -14,12 +14,26 @@ class TranscriptAdmin(admin.ModelAdmin):
             'fields': ('user', 'title', 'status')
         }),
         ('File Information', {
-            'fields': ('file', 'file_name', 'file_size', 'file_type')
+            'fields': ('file', 'file_name', 'file_size', 'file_type', 'content_hash', 'original_file')
         }),
         ('Transcription Results', {
-            'fields': ('raw_text', 'duration', 'language', 'confidence', 'error_message')
+            'fields': ('raw_text', 'duration', 'language', 'confidence', 'model_used', 'upgrade_model', 'error_message')
+        }),
+        ('Two-pass transcription', {
+            'fields': ('refinement', 'draft_model', 'draft_text')
+        }),
+        ('Near-duplicate', {
+            'fields': ('similar_transcript', 'similar_offset')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at', 'completed_at')
         }),
     )
+
+
+@admin.register(AudioCompaction)
+class AudioCompactionAdmin(admin.ModelAdmin):
+    list_display = ['source_name', 'compact_name', 'source_bytes', 'compact_bytes', 'source_deleted', 'created_at']
+    list_filter = ['source_deleted', 'created_at']
+    search_fields = ['source_name', 'compact_name']
+    ordering = ['-created_at']
@@ -0,0 +1,127 @@
+"""
+Batched transcription of short clips.
+
+A clip that fits into Whisper's 30-second window needs a single decoder pass,
+so for voice notes most of a per-clip job is fixed overhead. Short uploads
+are therefore flagged ``awaiting_batch`` instead of getting a job of their
+own, and a batch job claims up to ``WHISPER_BATCH_SIZE`` of them, waiting at
+most ``WHISPER_BATCH_MAX_WAIT_SECONDS`` for a partial batch to fill. Their
+padded mel spectrograms are stacked and run through the encoder and decoder
+together, and every transcript is then saved on its own.
+
+Clips whose greedy decode looks unreliable by Whisper's own criteria (too
+repetitive or too unlikely, and not silence) are transcribed again one by
+one, so they still get ``model.transcribe``'s temperature fallback.
+"""
+from django.conf import settings
+from django.db import transaction
+from .models import Transcript
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = 30
+POLL_SECONDS = 0.2
+
+# Whisper's transcribe() defaults
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+def max_clip_seconds():
+    return min(getattr(settings, 'WHISPER_BATCH_MAX_SECONDS', WINDOW_SECONDS), WINDOW_SECONDS)
+
+
+def is_batchable(transcript):
+    return (
+        getattr(settings, 'WHISPER_BATCHING', False)
+        and transcript.duration is not None
+        and transcript.duration <= max_clip_seconds()
+    )
+
+
+def _claim(limit):
+    """Atomically take up to ``limit`` waiting transcripts, oldest first"""
+    with transaction.atomic():
+        ids = list(
+            Transcript.objects
+            .select_for_update(skip_locked=True)
+            .filter(awaiting_batch=True, status='pending')
+            .order_by('created_at')
+            .values_list('id', flat=True)[:limit]
+        )
+        Transcript.objects.filter(id__in=ids).update(awaiting_batch=False, status='processing', decoded_until=None)
+    return list(Transcript.objects.filter(id__in=ids).order_by('created_at'))
+
+
+def claim_batch(size=None, max_wait=None, clock=time.monotonic, sleep=time.sleep):
+    """
+    Claim a batch of waiting clips.
+
+    Returns right away with an empty list if there is nothing to do (another
+    batch already took the clips), and otherwise keeps topping the batch up
+    until it is full or ``max_wait`` seconds have passed.
+    """
+    size = size or getattr(settings, 'WHISPER_BATCH_SIZE', 8)
+    max_wait = max_wait if max_wait is not None else getattr(settings, 'WHISPER_BATCH_MAX_WAIT_SECONDS', 2)
+    deadline = clock() + max_wait
+
+    claimed = _claim(size)
+    while claimed and len(claimed) < size and clock() < deadline:
+        sleep(POLL_SECONDS)
+        claimed += _claim(size - len(claimed))
+    return claimed
+
+
+def _needs_fallback(result):
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        return False  # silence
+    return result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD
+
+
+def _as_transcribe_result(result, duration):
+    """A single-window DecodingResult shaped like ``model.transcribe`` output"""
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        return {'text': '', 'language': result.language, 'segments': []}
+
+    return {
+        'text': result.text,
+        'language': result.language,
+        'segments': [{
+            'id': 0,
+            'start': 0.0,
+            'end': duration,
+            'text': result.text,
+            'avg_logprob': result.avg_logprob,
+            'no_speech_prob': result.no_speech_prob,
+            'compression_ratio': result.compression_ratio,
+        }],
+    }
+
+
+def transcribe_batch(model, clips):
+    """
+    Transcribe several clips of at most 30 seconds with one batched decode.
+
+    ``clips`` are 16 kHz float32 arrays; returns one ``model.transcribe``-shaped
+    result per clip, in order.
+    """
+    import torch
+    import whisper
+
+    mels = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(clip)), model.dims.n_mels)
+        for clip in clips
+    ]).to(model.device)
+    options = whisper.DecodingOptions(fp16=model.device.type != 'cpu', without_timestamps=True)
+    decoded = whisper.decode(model, mels, options)
+
+    results = []
+    for clip, result in zip(clips, decoded):
+        if _needs_fallback(result):
+            results.append(model.transcribe(clip))
+        else:
+            results.append(_as_transcribe_result(result, len(clip) / whisper.audio.SAMPLE_RATE))
+    return results
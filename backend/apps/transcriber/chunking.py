@@ -0,0 +1,356 @@
+"""
+Chunked transcription of long recordings.
+
+Long audio is split at low-energy (silence-aligned) boundaries into chunks
+that overlap their neighbours by a few seconds. Each chunk is decoded
+independently and the segments are stitched back onto the original timeline:
+a chunk only keeps the segments whose midpoint falls inside its own
+[keep_start, keep_end) range, so text decoded twice in an overlap is kept
+once.
+
+Chunk specs and chunk results are plain JSON-serializable dicts so they can
+also be passed through Celery.
+
+The streaming path applies the same boundary rule to ffmpeg output as it
+arrives, so only about one and a half windows of audio are ever held in memory
+regardless of the recording's length.
+"""
+from collections import Counter
+from django.conf import settings
+from .registry import get_model
+from .threads import ThreadProfile, apply_profile
+import itertools
+import subprocess
+import tempfile
+import numpy as np
+import billiard
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.03
+
+
+def load_audio(file_path):
+    """Decode a media file to 16 kHz mono float32 samples"""
+    cmd = [
+        'ffmpeg', '-nostdin', '-threads', '0',
+        '-i', file_path,
+        '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(SAMPLE_RATE),
+        '-',
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to load audio: {e.stderr.decode()}") from e
+
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+def load_audio_range(file_path, start, end):
+    """
+    Decode only [start, end) seconds of a media file to 16 kHz mono float32.
+
+    ffmpeg seeks before opening the input, so a chunk subtask never decodes
+    the parts of the recording that belong to other chunks.
+    """
+    cmd = [
+        'ffmpeg', '-nostdin', '-threads', '0',
+        '-ss', f'{start:.3f}', '-t', f'{end - start:.3f}',
+        '-i', file_path,
+        '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(SAMPLE_RATE),
+        '-',
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to load audio: {e.stderr.decode()}") from e
+
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+def stream_audio(file_path, block_seconds=30):
+    """
+    Yield a media file as consecutive 16 kHz mono float32 blocks.
+
+    ffmpeg writes PCM to a pipe that is read ``block_seconds`` at a time, so
+    the whole decoded recording never has to fit in memory.
+    """
+    cmd = [
+        'ffmpeg', '-nostdin', '-threads', '0', '-loglevel', 'error',
+        '-i', file_path,
+        '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(SAMPLE_RATE),
+        '-',
+    ]
+    block_bytes = int(block_seconds * SAMPLE_RATE) * 2
+
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+        try:
+            while True:
+                data = process.stdout.read(block_bytes)
+                if not data:
+                    break
+                yield np.frombuffer(data, np.int16).astype(np.float32) / 32768.0
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+
+        if returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"Failed to load audio: {stderr.read().decode()}")
+
+
+def iter_blocks(audio, block_seconds=30):
+    """Yield already decoded audio in consecutive blocks, like ``stream_audio``"""
+    step = int(block_seconds * SAMPLE_RATE)
+    for start in range(0, len(audio), step):
+        yield audio[start:start + step]
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _quietest_point(audio, start, end):
+    """Sample index of the centre of the lowest-energy frame in audio[start:end]"""
+    frame = int(FRAME_SECONDS * SAMPLE_RATE)
+    count = (end - start) // frame
+    if count < 1:
+        return (start + end) // 2
+
+    frames = audio[start:start + count * frame].reshape(count, frame)
+    energy = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return start + int(np.argmin(energy)) * frame + frame // 2
+
+
+def plan_chunks(audio, chunk_seconds, overlap_seconds, search_seconds=None):
+    """
+    Split audio into overlapping chunk specs with silence-aligned boundaries.
+
+    Each boundary is placed at the quietest frame within ``search_seconds`` of
+    the nominal ``chunk_seconds`` mark. A tail shorter than half a chunk is
+    merged into the previous chunk.
+    """
+    total = len(audio)
+    chunk = int(chunk_seconds * SAMPLE_RATE)
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    search = int((search_seconds if search_seconds is not None else chunk_seconds / 10) * SAMPLE_RATE)
+
+    boundaries = [0]
+    while total - boundaries[-1] > chunk + chunk // 2:
+        target = boundaries[-1] + chunk
+        boundaries.append(_quietest_point(audio, max(boundaries[-1] + 1, target - search), min(total, target + search)))
+    boundaries.append(total)
+
+    chunks = []
+    for index, (keep_start, keep_end) in enumerate(zip(boundaries, boundaries[1:])):
+        chunks.append({
+            'index': index,
+            'start': max(0, keep_start - overlap) / SAMPLE_RATE,
+            'end': min(total, keep_end + overlap) / SAMPLE_RATE,
+            'keep_start': keep_start / SAMPLE_RATE,
+            'keep_end': keep_end / SAMPLE_RATE,
+        })
+    return chunks
+
+
+def stream_chunks(blocks, chunk_seconds, overlap_seconds, search_seconds=None):
+    """
+    Incremental counterpart of ``plan_chunks`` for an iterable of audio blocks.
+
+    Yields ``(chunk, audio)`` pairs as soon as enough audio has arrived to place
+    the next boundary. The chunk specs are identical to what ``plan_chunks``
+    returns for the concatenated blocks.
+    """
+    chunk = int(chunk_seconds * SAMPLE_RATE)
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    search = int((search_seconds if search_seconds is not None else chunk_seconds / 10) * SAMPLE_RATE)
+
+    buffer = np.zeros(0, dtype=np.float32)
+    buffer_start = 0
+    pending = []
+    total = 0
+    keep_start = 0
+    index = 0
+
+    def make_spec(start, end, keep_end):
+        return {
+            'index': index,
+            'start': start / SAMPLE_RATE,
+            'end': end / SAMPLE_RATE,
+            'keep_start': keep_start / SAMPLE_RATE,
+            'keep_end': keep_end / SAMPLE_RATE,
+        }
+
+    # A trailing None marks the end of the input
+    for block in itertools.chain(blocks, [None]):
+        if block is not None:
+            pending.append(block)
+            total += len(block)
+
+        # Until the input ends, a boundary is only placed once there is enough
+        # audio after it to rule out the tail being merged into this chunk
+        margin = overlap if block is not None else 0
+        if total - keep_start <= chunk + chunk // 2 + margin:
+            continue
+
+        buffer = np.concatenate([buffer] + pending)
+        pending = []
+        while total - keep_start > chunk + chunk // 2 + margin:
+            target = keep_start + chunk
+            cut = buffer_start + _quietest_point(
+                buffer,
+                max(keep_start + 1, target - search) - buffer_start,
+                min(total, target + search) - buffer_start,
+            )
+            end = min(total, cut + overlap)
+            yield make_spec(buffer_start, end, cut), buffer[:end - buffer_start]
+
+            index += 1
+            keep_start = cut
+            drop = max(0, cut - overlap) - buffer_start
+            buffer = buffer[drop:]
+            buffer_start += drop
+
+    yield make_spec(buffer_start, total, total), np.concatenate([buffer] + pending)
+
+
+def slice_chunk(audio, chunk):
+    return audio[int(round(chunk['start'] * SAMPLE_RATE)):int(round(chunk['end'] * SAMPLE_RATE))]
+
+
+def offset_result(chunk, result):
+    """Shift a chunk's Whisper result onto the global timeline"""
+    segments = []
+    for segment in result.get('segments', []):
+        segment = dict(segment)
+        segment['start'] = segment['start'] + chunk['start']
+        segment['end'] = segment['end'] + chunk['start']
+        segments.append(segment)
+
+    return {
+        'chunk': chunk,
+        'language': result.get('language', ''),
+        'segments': segments,
+    }
+
+
+def kept_segments(chunk_result):
+    """Segments of a chunk result whose midpoint lies in the chunk's own range"""
+    chunk = chunk_result['chunk']
+    return [
+        segment for segment in chunk_result['segments']
+        if chunk['keep_start'] <= (segment['start'] + segment['end']) / 2 < chunk['keep_end']
+    ]
+
+
+def stitch_results(chunk_results):
+    """
+    Merge chunk results into a single result shaped like ``model.transcribe``.
+
+    Results may be given in any order. The detected language is the one that
+    covers the most kept audio.
+    """
+    segments = []
+    languages = Counter()
+
+    for chunk_result in sorted(chunk_results, key=lambda r: r['chunk']['index']):
+        for segment in kept_segments(chunk_result):
+            segments.append(segment)
+            languages[chunk_result['language']] += segment['end'] - segment['start']
+
+    for index, segment in enumerate(segments):
+        segment['id'] = index
+
+    return {
+        'text': ''.join(segment['text'] for segment in segments),
+        'segments': segments,
+        'language': languages.most_common(1)[0][0] if languages else '',
+    }
+
+
+def _init_chunk_worker(model_name, device, threads):
+    apply_profile(ThreadProfile(threads, 1, None))
+    get_model(model_name, device)
+
+
+def _transcribe_chunk(model_name, device, chunk, audio):
+    model = get_model(model_name, device)
+    return offset_result(chunk, model.transcribe(audio))
+
+
+def transcribe_chunked(audio, model_name, device, workers=None, on_progress=None):
+    """
+    Transcribe audio by decoding its chunks in a pool of processes.
+
+    Every pool process loads its own copy of the model once and uses an equal
+    share of the available cores for torch's intra-op threads. If given,
+    ``on_progress(segments, decoded_until)`` is called with each chunk's final
+    segments as soon as it and all earlier chunks are done.
+
+    The pool is billiard's, Celery's fork of multiprocessing, which unlike the
+    standard library's lets daemonic processes start processes of their own,
+    so this also works inside the children of Celery's default prefork pool.
+    """
+    chunks = plan_chunks(
+        audio,
+        getattr(settings, 'WHISPER_CHUNK_SECONDS', 300),
+        getattr(settings, 'WHISPER_CHUNK_OVERLAP_SECONDS', 2),
+    )
+
+    cores = available_cores()
+    workers = min(len(chunks), workers or getattr(settings, 'WHISPER_CHUNK_WORKERS', 0) or cores)
+    threads = max(1, cores // workers)
+
+    logger.info(f"Transcribing {len(chunks)} chunks with {workers} processes x {threads} threads")
+
+    pool = billiard.get_context('spawn').Pool(
+        workers, initializer=_init_chunk_worker, initargs=(model_name, device, threads),
+    )
+    try:
+        pending = [
+            pool.apply_async(_transcribe_chunk, (model_name, device, chunk, slice_chunk(audio, chunk)))
+            for chunk in chunks
+        ]
+        return _collect_chunks((chunk_result.get() for chunk_result in pending), on_progress)
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _collect_chunks(results, on_progress=None):
+    """Stitch chunk results taken in order, reporting each one's final segments"""
+    chunk_results = []
+    for result in results:
+        chunk_results.append(result)
+        if on_progress:
+            on_progress(kept_segments(result), result['chunk']['keep_end'])
+
+    return stitch_results(chunk_results)
+
+
+def transcribe_streaming(source, model, window_seconds, overlap_seconds, on_progress=None):
+    """
+    Transcribe a file window by window straight from the ffmpeg pipe, or
+    decoded audio (such as a memory-mapped cache entry) window by window.
+
+    Only the current window's samples and the (small) segment lists are kept,
+    so peak memory does not grow with the length of the recording. If given,
+    ``on_progress(segments, decoded_until)`` is called with each window's
+    final segments as soon as the window is decoded.
+    """
+    blocks = iter_blocks(source) if isinstance(source, np.ndarray) else stream_audio(source)
+
+    chunk_results = []
+    for chunk, audio in stream_chunks(blocks, window_seconds, overlap_seconds):
+        chunk_results.append(offset_result(chunk, model.transcribe(audio)))
+        if on_progress:
+            on_progress(kept_segments(chunk_results[-1]), chunk['keep_end'])
+
+    return stitch_results(chunk_results)
@@ -0,0 +1,153 @@
+"""
+Background re-encoding of completed transcripts' source audio to Opus.
+
+Uploads are kept for playback and re-transcription, but WAV/FLAC/M4A
+lectures are large (WAV is roughly 600 MB per hour). Once no transcript of a
+stored file is queued or running, the file is re-encoded to mono,
+speech-tuned Opus, stored as a new content-addressed blob, and every
+transcript using it is switched over in one transaction together with an
+``AudioCompaction`` record of the sizes.
+
+The old file is only deleted by a later run, so a transcription that opened
+it just before the swap can still finish. Each file is compacted and
+committed on its own, and half-written encodes are cleaned out of the
+staging directory, so an interrupted run simply resumes with the files it
+did not get to.
+
+The originals are lost once replaced, so the periodic job is only scheduled
+when ``AUDIO_COMPACT_ENABLED`` is set.
+"""
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction, IntegrityError
+from django.db.models import F, Sum
+from django.utils import timezone
+from .models import Transcript, AudioCompaction
+from .storage import staging_directory, new_staging_path, store_staged_file, is_referenced, release_blob
+import subprocess
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+COMPACT_EXTENSION = '.ogg'
+STALE_STAGING_SECONDS = 24 * 3600
+
+
+def encode_opus(file_path, output_path, bitrate):
+    cmd = [
+        'ffmpeg', '-nostdin', '-y', '-loglevel', 'error',
+        '-i', file_path,
+        '-map', '0:a:0', '-vn', '-ac', '1',
+        '-c:a', 'libopus', '-b:a', bitrate, '-vbr', 'on', '-application', 'voip',
+        output_path,
+    ]
+    try:
+        subprocess.run(cmd, capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to encode {file_path}: {e.stderr.decode()}") from e
+
+
+def candidate_sources(limit):
+    """Stored files of completed transcripts that have not been compacted and are not in use"""
+    busy = Transcript.objects.filter(status__in=['pending', 'processing']).values('file')
+    return list(
+        Transcript.objects
+        .filter(status='completed')
+        .exclude(file='')
+        .exclude(file__in=busy)
+        .exclude(file__in=AudioCompaction.objects.values('source_name'))
+        .exclude(file__in=AudioCompaction.objects.values('compact_name'))
+        .order_by('file')
+        .values_list('file', flat=True)
+        .distinct()[:limit]
+    )
+
+
+def compact_source(name, bitrate):
+    """Re-encode one stored file and switch its transcripts to the result"""
+    path = default_storage.path(name)
+    source_bytes = os.path.getsize(path)
+
+    staged = new_staging_path(COMPACT_EXTENSION)
+    try:
+        encode_opus(path, staged, bitrate)
+    except BaseException:
+        os.remove(staged)
+        raise
+    compact_bytes = os.path.getsize(staged)
+
+    if compact_bytes >= source_bytes:
+        os.remove(staged)
+        return AudioCompaction.objects.create(
+            source_name=name, compact_name=name, source_bytes=source_bytes, compact_bytes=source_bytes,
+        )
+
+    compact_name, _ = store_staged_file(staged, COMPACT_EXTENSION)
+    with transaction.atomic():
+        Transcript.objects.filter(file=name).update(file=compact_name)
+        return AudioCompaction.objects.create(
+            source_name=name, compact_name=compact_name, source_bytes=source_bytes, compact_bytes=compact_bytes,
+        )
+
+
+def release_replaced_sources(before):
+    """Delete the files that compactions before ``before`` replaced, once nothing uses them"""
+    released = 0
+    pending = AudioCompaction.objects.filter(source_deleted=False, created_at__lt=before)
+    for compaction in pending:
+        if compaction.compact_name == compaction.source_name or is_referenced(compaction.source_name):
+            continue
+        release_blob(compaction.source_name)
+        compaction.source_deleted = True
+        compaction.save(update_fields=['source_deleted'])
+        released += 1
+    return released
+
+
+def remove_stale_staging_files(max_age=STALE_STAGING_SECONDS):
+    """Leftovers of encodes or uploads that were interrupted"""
+    directory = staging_directory()
+    cutoff = time.time() - max_age
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def compact_audio(limit=None, bitrate=None):
+    """
+    One compaction run. Returns the number of files compacted, the bytes
+    they saved, and the bytes saved by all compactions so far.
+    """
+    started = timezone.now()
+    limit = limit or getattr(settings, 'AUDIO_COMPACT_BATCH', 50)
+    bitrate = bitrate or getattr(settings, 'AUDIO_COMPACT_BITRATE', '24k')
+
+    released = release_replaced_sources(started)
+    remove_stale_staging_files()
+
+    compacted = 0
+    bytes_saved = 0
+    for name in candidate_sources(limit):
+        try:
+            compaction = compact_source(name, bitrate)
+        except (OSError, RuntimeError, IntegrityError) as e:
+            logger.warning(f"Could not compact {name}: {str(e)}")
+            continue
+
+        compacted += 1
+        bytes_saved += compaction.bytes_saved
+        logger.info(f"Compacted {name} to {compaction.compact_name}, saving {compaction.bytes_saved} bytes")
+
+    total_saved = AudioCompaction.objects.aggregate(saved=Sum(F('source_bytes') - F('compact_bytes')))['saved'] or 0
+    return {
+        'compacted': compacted,
+        'released': released,
+        'bytes_saved': bytes_saved,
+        'total_bytes_saved': total_saved,
+    }
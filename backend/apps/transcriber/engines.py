@@ -0,0 +1,289 @@
+"""
+Speech recognition engines.
+
+``WHISPER_ENGINE`` selects the library that loads and runs the models:
+
+- ``openai-whisper``: the reference PyTorch implementation;
+- ``faster-whisper``: the CTranslate2 port, several times faster on CPU,
+  with int8 weights for the models selected by ``WHISPER_INT8_MODELS`` and
+  ``WHISPER_CT2_COMPUTE_TYPE`` for the others;
+- ``fake``: deterministic output without any model, for tests and for
+  measuring the pipeline around the decoder.
+
+Every engine's models have a ``transcribe(audio, **options)`` method taking
+16 kHz float32 audio or a media file path and openai-whisper's decoding
+options, and returning the same result shape::
+
+    {'text': str, 'language': str, 'segments': [
+        {'id', 'start', 'end', 'text', 'avg_logprob', 'no_speech_prob',
+         'compression_ratio', 'words' (with word_timestamps)}, ...]}
+
+so the code that stores results does not depend on the engine. Options an
+engine has no use for are ignored. Engine and model libraries are imported
+on first use only, keeping them out of the web tier.
+
+Each engine also estimates the memory its models take, which the model
+registry budgets against.
+
+The engine is fixed per process: models in the registry are not keyed by it.
+"""
+from abc import ABC, abstractmethod
+from django.conf import settings
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+PROBE_SECONDS = 30
+
+
+class Engine(ABC):
+    name = None
+    # Whether loaded models can be shared copy-on-write with forked children
+    fork_safe = False
+
+    @abstractmethod
+    def load(self, name, device, quantize=None, **options):
+        """A model of size or path ``name`` on ``device``"""
+
+    @abstractmethod
+    def detect_language(self, model, audio):
+        """Most likely language of the first 30 seconds of ``audio`` and its probability"""
+
+    def transcribe_batch(self, model, clips):
+        """One result per clip of at most 30 seconds"""
+        return [model.transcribe(clip) for clip in clips]
+
+    def model_nbytes(self, model):
+        """Approximate memory taken by a loaded model's weights in bytes (0 if unknown)"""
+        return 0
+
+
+class WhisperEngine(Engine):
+    name = 'openai-whisper'
+    fork_safe = True
+
+    def load(self, name, device, quantize=None, **options):
+        import whisper
+
+        model = whisper.load_model(name, device=device, **options)
+        if quantize == 'int8':
+            model = quantize_int8(model)
+        return model
+
+    def detect_language(self, model, audio):
+        import whisper
+
+        clip = whisper.pad_or_trim(audio[:PROBE_SECONDS * whisper.audio.SAMPLE_RATE])
+        mel = whisper.log_mel_spectrogram(clip, model.dims.n_mels).to(model.device)
+        _, probs = model.detect_language(mel)
+        language = max(probs, key=probs.get)
+        return language, probs[language]
+
+    def transcribe_batch(self, model, clips):
+        from .batching import transcribe_batch
+
+        return transcribe_batch(model, clips)
+
+    def model_nbytes(self, model):
+        try:
+            # The state dict also covers the packed weights of quantized layers,
+            # which are not parameters
+            total = 0
+            for value in model.state_dict().values():
+                for tensor in value if isinstance(value, tuple) else (value,):
+                    if hasattr(tensor, 'element_size'):
+                        total += tensor.numel() * tensor.element_size()
+            return total
+        except (AttributeError, TypeError):
+            return 0
+
+
+def quantize_int8(model):
+    """
+    Replace a CPU model's linear layers with dynamically int8-quantized ones.
+
+    Weights are stored as int8 and activations quantized on the fly, which
+    cuts the size of the linear layers (most of Whisper's weights) by about
+    four and lets them run on int8 kernels. Whisper's own ``Linear`` subclass
+    only casts weights to the input dtype, a no-op for fp32 on CPU, so its
+    modules are turned into plain ``nn.Linear`` first for torch to pick them up.
+    """
+    import torch
+    from whisper.model import Linear
+
+    for module in model.modules():
+        if isinstance(module, Linear):
+            module.__class__ = torch.nn.Linear
+
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+# openai-whisper decoding options and their faster-whisper names
+FASTER_WHISPER_OPTIONS = {
+    'language': 'language',
+    'task': 'task',
+    'beam_size': 'beam_size',
+    'best_of': 'best_of',
+    'temperature': 'temperature',
+    'condition_on_previous_text': 'condition_on_previous_text',
+    'initial_prompt': 'initial_prompt',
+    'word_timestamps': 'word_timestamps',
+    'no_speech_threshold': 'no_speech_threshold',
+    'logprob_threshold': 'log_prob_threshold',
+    'compression_ratio_threshold': 'compression_ratio_threshold',
+}
+
+
+class FasterWhisperModel:
+    """
+    A faster-whisper model with openai-whisper's ``transcribe`` interface.
+    ``path`` is the directory of the converted CTranslate2 model.
+    """
+
+    def __init__(self, model, path=None):
+        self.model = model
+        self.path = path
+
+    def transcribe(self, audio, **options):
+        import numpy as np
+
+        kwargs = {FASTER_WHISPER_OPTIONS[key]: value for key, value in options.items() if key in FASTER_WHISPER_OPTIONS}
+        # Greedy decoding unless asked otherwise, as openai-whisper does
+        kwargs.setdefault('beam_size', 1)
+        if not isinstance(audio, str):
+            audio = np.asarray(audio, np.float32)
+        segments, info = self.model.transcribe(audio, **kwargs)
+        segments = [self._segment(index, segment) for index, segment in enumerate(segments)]
+        return {
+            'text': ''.join(segment['text'] for segment in segments),
+            'language': info.language,
+            'segments': segments,
+        }
+
+    @staticmethod
+    def _segment(index, segment):
+        result = {
+            'id': index,
+            'start': segment.start,
+            'end': segment.end,
+            'text': segment.text,
+            'avg_logprob': segment.avg_logprob,
+            'no_speech_prob': segment.no_speech_prob,
+            'compression_ratio': segment.compression_ratio,
+        }
+        if segment.words:
+            result['words'] = [
+                {'word': word.word, 'start': word.start, 'end': word.end, 'probability': word.probability}
+                for word in segment.words
+            ]
+        return result
+
+
+class FasterWhisperEngine(Engine):
+    name = 'faster-whisper'
+
+    def load(self, name, device, quantize=None, **options):
+        from faster_whisper import WhisperModel
+        from faster_whisper.utils import download_model
+
+        # Resolved here rather than by WhisperModel so the model's size can be read from its files
+        path = name if os.path.isdir(name) else download_model(
+            name,
+            local_files_only=options.get('local_files_only', False),
+            cache_dir=options.get('download_root'),
+            revision=options.get('revision'),
+        )
+        compute_type = quantize or getattr(settings, 'WHISPER_CT2_COMPUTE_TYPE', 'default')
+        return FasterWhisperModel(WhisperModel(path, device=device, compute_type=compute_type, **options), path)
+
+    def detect_language(self, model, audio):
+        import numpy as np
+
+        # Segments are decoded lazily, so this only runs the language detection
+        _, info = model.model.transcribe(np.asarray(audio[:PROBE_SECONDS * SAMPLE_RATE], np.float32), beam_size=1)
+        return info.language, info.language_probability
+
+    def model_nbytes(self, model):
+        # CTranslate2 holds the weights in native memory, out of Python's sight. Their files
+        # are the best estimate: the same size in the stored precision, smaller in int8.
+        if not model.path:
+            return 0
+        return sum(
+            os.path.getsize(os.path.join(directory, name))
+            for directory, _, names in os.walk(model.path)
+            for name in names
+        )
+
+
+class FakeModel:
+    """
+    Deterministic stand-in for a Whisper model: one segment per
+    ``segment_seconds`` of audio that is not silent, worded after the model
+    name and the segment's loudness.
+    """
+    WORDS = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel']
+    # Parameter counts of the Whisper model sizes, so the registry budgets fake models like real ones
+    PARAMETERS = {'tiny': 39e6, 'base': 74e6, 'small': 244e6, 'medium': 769e6, 'large': 1550e6, 'turbo': 809e6}
+
+    def __init__(self, name, segment_seconds=5.0):
+        self.name = name
+        self.segment_seconds = segment_seconds
+
+    def transcribe(self, audio, **options):
+        import numpy as np
+
+        if isinstance(audio, str):
+            from .chunking import load_audio
+
+            audio = load_audio(audio)
+        step = int(self.segment_seconds * SAMPLE_RATE)
+        segments = []
+        for start in range(0, len(audio), step):
+            clip = np.asarray(audio[start:start + step], np.float32)
+            rms = float(np.sqrt(np.mean(clip ** 2))) if len(clip) else 0.0
+            if rms < 1e-3:
+                continue
+            word = self.WORDS[int(rms * 1000) % len(self.WORDS)]
+            segments.append({
+                'id': len(segments),
+                'start': start / SAMPLE_RATE,
+                'end': (start + len(clip)) / SAMPLE_RATE,
+                'text': f' {self.name} {word}',
+                'avg_logprob': -0.2,
+                'no_speech_prob': 0.01,
+                'compression_ratio': 1.0,
+            })
+        return {
+            'text': ''.join(segment['text'] for segment in segments),
+            'language': options.get('language') or 'en',
+            'segments': segments,
+        }
+
+
+class FakeEngine(Engine):
+    name = 'fake'
+    fork_safe = True
+
+    def load(self, name, device, quantize=None, **options):
+        return FakeModel(name)
+
+    def detect_language(self, model, audio):
+        return 'en', 1.0
+
+    def model_nbytes(self, model):
+        size = model.name.split('.')[0].split('-')[0]
+        # As fp32 weights
+        return int(FakeModel.PARAMETERS.get(size, 0) * 4)
+
+
+ENGINES = {engine.name: engine for engine in (WhisperEngine(), FasterWhisperEngine(), FakeEngine())}
+
+
+def get_engine(name=None):
+    name = name or getattr(settings, 'WHISPER_ENGINE', 'openai-whisper')
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown WHISPER_ENGINE {name!r}, expected one of {', '.join(ENGINES)}") from None
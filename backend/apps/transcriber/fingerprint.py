@@ -0,0 +1,220 @@
+"""
+Perceptual audio fingerprints for spotting near-duplicate recordings.
+
+Every 0.1 s of audio gets a 32-bit sub-fingerprint: the signs of how the
+log-energy differences between 33 speech-range frequency bands change from
+one frame to the next. The bits survive re-encoding, bitrate changes and gain
+changes, and a trimmed copy yields the same sequence shifted by the trim.
+
+Lookups go through anchor keys: the upper 16 bits (lowest bands) of a
+content-selected subset of frames. Copies share many anchors, and the
+position differences of shared anchors vote for the alignment offset.
+Candidates are then verified by the bit error rate at that offset.
+
+Everything here is plain NumPy and runs fully offline.
+"""
+from collections import Counter, defaultdict
+import numpy as np
+
+SAMPLE_RATE = 8000
+FRAME_RATE = 10  # Sub-fingerprints per second
+FRAME_LENGTH = int(0.4 * SAMPLE_RATE)
+HOP_LENGTH = SAMPLE_RATE // FRAME_RATE
+BAND_EDGES = np.geomspace(300, 3000, 34)
+BLOCK_FRAMES = 2048
+SILENCE_POWER = 1e-7
+ANCHOR_MODULUS = 8
+MAX_POSITIONS_PER_KEY = 32
+
+_bits = np.uint32(1) << np.arange(31, -1, -1, dtype=np.uint32)
+
+
+def _band_matrix():
+    freqs = np.fft.rfftfreq(FRAME_LENGTH, 1 / SAMPLE_RATE)
+    bands = np.zeros((len(freqs), len(BAND_EDGES) - 1), dtype=np.float32)
+    for band, (low, high) in enumerate(zip(BAND_EDGES, BAND_EDGES[1:])):
+        bands[(freqs >= low) & (freqs < high), band] = 1
+    return bands
+
+
+_BANDS = _band_matrix()
+_WINDOW = np.hanning(FRAME_LENGTH).astype(np.float32)
+
+
+def _downsample(audio):
+    """16 kHz to 8 kHz by averaging sample pairs (a crude but cheap low-pass)"""
+    audio = audio[:len(audio) // 2 * 2]
+    return audio.reshape(-1, 2).mean(axis=1)
+
+
+def _band_energies(audio):
+    """Log band energies and mean power of every full frame in ``audio``"""
+    count = (len(audio) - FRAME_LENGTH) // HOP_LENGTH + 1
+    if count < 1:
+        return np.zeros((0, _BANDS.shape[1]), np.float32), np.zeros(0, np.float32)
+
+    frames = np.lib.stride_tricks.as_strided(
+        audio, shape=(count, FRAME_LENGTH), strides=(audio.strides[0] * HOP_LENGTH, audio.strides[0]),
+    )
+    power = np.abs(np.fft.rfft(frames * _WINDOW, axis=1)) ** 2
+    return np.log(power @ _BANDS + 1e-10), np.mean(frames ** 2, axis=1)
+
+
+class FingerprintBuilder:
+    """
+    Incrementally fingerprints 16 kHz float32 audio fed in consecutive blocks.
+
+    ``skip`` drops that many leading samples, which is how the half-hop phase
+    of a query is produced from the same decoded stream.
+    """
+
+    def __init__(self, skip=0):
+        self.skip = skip
+        self.buffer = np.zeros(0, np.float32)
+        self.energies = []
+        self.powers = []
+
+    def feed(self, block):
+        block = np.asarray(block, np.float32)
+        if self.skip:
+            dropped = min(self.skip, len(block))
+            block = block[dropped:]
+            self.skip -= dropped
+
+        self.buffer = np.concatenate([self.buffer, _downsample(block)])
+        usable = (len(self.buffer) - FRAME_LENGTH) // HOP_LENGTH + 1
+        while usable >= BLOCK_FRAMES:
+            self._consume(BLOCK_FRAMES)
+            usable -= BLOCK_FRAMES
+
+    def _consume(self, count):
+        energy, power = _band_energies(self.buffer[:(count - 1) * HOP_LENGTH + FRAME_LENGTH])
+        self.energies.append(energy)
+        self.powers.append(power)
+        self.buffer = self.buffer[count * HOP_LENGTH:]
+
+    def result(self):
+        """
+        Returns ``(fingerprint, voiced)``: one uint32 per frame, and a boolean
+        mask of the frames that are not silence.
+        """
+        usable = (len(self.buffer) - FRAME_LENGTH) // HOP_LENGTH + 1
+        if usable > 0:
+            self._consume(usable)
+        if not self.energies:
+            return np.zeros(0, np.uint32), np.zeros(0, bool)
+
+        energy = np.concatenate(self.energies)
+        power = np.concatenate(self.powers)
+        if len(energy) < 2:
+            return np.zeros(0, np.uint32), np.zeros(0, bool)
+
+        band_diff = energy[:, :-1] - energy[:, 1:]
+        bits = (band_diff[1:] - band_diff[:-1]) > 0
+        fingerprint = (bits.astype(np.uint32) * _bits).sum(axis=1, dtype=np.uint32)
+        return fingerprint, power[1:] > SILENCE_POWER
+
+
+def fingerprint_audio(audio):
+    builder = FingerprintBuilder()
+    builder.feed(audio)
+    return builder.result()
+
+
+def fingerprint_phases(blocks):
+    """
+    Fingerprint a block stream at offsets of 0 and half a hop in one pass.
+
+    A copy trimmed by an arbitrary amount is then at most a quarter hop out of
+    step with one of the phases. Returns ``[(phase_seconds, fingerprint, voiced)]``
+    with the zero phase first; that one is what gets stored.
+    """
+    phases = [0, HOP_LENGTH]  # HOP_LENGTH samples at 16 kHz is half a hop at 8 kHz
+    builders = [FingerprintBuilder(skip=phase) for phase in phases]
+    for block in blocks:
+        for builder in builders:
+            builder.feed(block)
+
+    return [(phase / (2 * SAMPLE_RATE),) + builder.result() for phase, builder in zip(phases, builders)]
+
+
+def duration(fingerprint):
+    """Approximate length in seconds of the audio a fingerprint was computed from"""
+    return len(fingerprint) / FRAME_RATE + FRAME_LENGTH / SAMPLE_RATE
+
+
+def to_bytes(fingerprint):
+    return np.asarray(fingerprint, '<u4').tobytes()
+
+
+def from_bytes(data):
+    return np.frombuffer(bytes(data), '<u4').astype(np.uint32)
+
+
+def anchors(fingerprint, voiced):
+    """``(key, position)`` pairs used to look up candidate recordings"""
+    keys = fingerprint >> 16
+    selected = np.nonzero(voiced & (keys % ANCHOR_MODULUS == 0) & (keys != 0))[0]
+    return [(int(keys[position]), int(position)) for position in selected]
+
+
+def vote_offsets(query_anchors, candidate_anchors):
+    """
+    Count alignment votes per candidate from shared anchor keys.
+
+    ``candidate_anchors`` is an iterable of ``(candidate_id, key, position)``.
+    Returns ``{candidate_id: (offset, votes)}`` for each candidate's best offset,
+    where ``offset`` is the candidate frame matching query frame 0.
+    """
+    positions = defaultdict(list)
+    for key, position in query_anchors:
+        positions[key].append(position)
+
+    votes = defaultdict(Counter)
+    for candidate, key, candidate_position in candidate_anchors:
+        query_positions = positions.get(key, ())
+        if len(query_positions) > MAX_POSITIONS_PER_KEY:
+            continue
+        for query_position in query_positions:
+            votes[candidate][candidate_position - query_position] += 1
+
+    return {candidate: counter.most_common(1)[0] for candidate, counter in votes.items()}
+
+
+def compare(query, candidate, offset):
+    """
+    Bit error rate between two fingerprints aligned at ``offset`` frames, and
+    the fraction of the query covered by the candidate at that alignment.
+    """
+    start = max(0, -offset)
+    end = min(len(query), len(candidate) - offset)
+    if end <= start:
+        return 1.0, 0.0
+
+    diff = np.bitwise_xor(query[start:end], candidate[start + offset:end + offset])
+    errors = np.unpackbits(diff.view(np.uint8)).sum()
+    return errors / (32 * (end - start)), (end - start) / len(query)
+
+
+def find_match(query_phases, candidate_anchors, load_fingerprint, max_ber, min_coverage, min_votes=3, max_candidates=5):
+    """
+    Best near-duplicate of a query among candidate recordings.
+
+    ``candidate_anchors`` is a list of ``(candidate_id, key, position)`` rows and
+    ``load_fingerprint(candidate_id)`` returns a stored fingerprint. Returns
+    ``(candidate_id, offset_seconds, ber)`` where a time ``t`` in the query is
+    ``t + offset_seconds`` in the candidate, or None if nothing is close enough.
+    """
+    best = None
+    for phase_seconds, fingerprint, voiced in query_phases:
+        votes = vote_offsets(anchors(fingerprint, voiced), candidate_anchors)
+        ranked = sorted(votes.items(), key=lambda item: item[1][1], reverse=True)[:max_candidates]
+
+        for candidate, (offset, count) in ranked:
+            if count < min_votes:
+                continue
+            ber, coverage = compare(fingerprint, load_fingerprint(candidate), offset)
+            if ber <= max_ber and coverage >= min_coverage and (best is None or ber < best[2]):
+                best = (candidate, offset / FRAME_RATE - phase_seconds, ber)
+
+    return best
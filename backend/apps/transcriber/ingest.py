@@ -0,0 +1,157 @@
+"""
+Ingest stage that reduces video uploads to their audio track.
+
+Only the audio of a video is ever transcribed, so before the first attempt
+the audio stream is extracted into its own content-addressed blob and becomes
+the transcript's source file. The stream is copied without re-encoding when
+its codec has a matching audio-only container, and transcoded to AAC
+otherwise. The video is then kept (the default), moved to an archive
+directory outside MEDIA_ROOT, or deleted (``INGEST_VIDEO_ACTION``), once no
+transcript uses it.
+
+Extraction runs in the transcription worker at the start of the first
+attempt rather than in the upload request: it reads the whole video and may
+have to transcode it, which would hold the request open for as long as that
+takes, and it would put ffmpeg work on the web tier. Until a worker picks the
+job up the transcript still points at the video.
+
+``file_name``, ``file_size`` and ``file_type`` keep describing the upload, so
+``Transcript.is_video`` is unaffected.
+"""
+from django.conf import settings
+from .models import Transcript
+from .storage import new_staging_path, store_staged_file, release_blob
+import subprocess
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Audio-only containers that can hold each codec as-is
+COPY_CONTAINERS = {
+    'aac': '.m4a',
+    'alac': '.m4a',
+    'mp3': '.mp3',
+    'flac': '.flac',
+    'opus': '.ogg',
+    'vorbis': '.ogg',
+    'pcm_s16le': '.wav',
+    'pcm_s24le': '.wav',
+}
+TRANSCODE_EXTENSION = '.m4a'
+TRANSCODE_BITRATE = '96k'
+PROBE_TIMEOUT_SECONDS = 10
+
+
+def probe_audio_codec(file_path):
+    """Codec name of the first audio stream, or '' if it cannot be determined"""
+    cmd = [
+        'ffprobe', '-v', 'error', '-select_streams', 'a:0',
+        '-show_entries', 'stream=codec_name', '-of', 'default=noprint_wrappers=1:nokey=1',
+        file_path,
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+    return out.strip().splitlines()[0] if out.strip() else ''
+
+
+def probe_duration(file_path):
+    """
+    Duration of a media file in seconds, or None if unknown.
+
+    Only the container header (and, for headerless formats, the bitrate of
+    the first frames) is read, so this takes milliseconds even for hours of
+    audio; the timeout bounds it for damaged files.
+    """
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1',
+        file_path,
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True, text=True, timeout=PROBE_TIMEOUT_SECONDS).stdout
+        return float(out.strip())
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+
+
+def _run_ffmpeg(file_path, output_path, codec_args):
+    cmd = [
+        'ffmpeg', '-nostdin', '-y', '-loglevel', 'error',
+        '-i', file_path,
+        '-map', '0:a:0', '-vn', '-sn', '-dn',
+    ] + codec_args + [output_path]
+    subprocess.run(cmd, capture_output=True, check=True)
+
+
+def extract_audio(file_path):
+    """
+    Write the first audio stream of a media file to the blob staging directory.
+
+    Returns ``(staged_path, extension, copied)``, where ``copied`` tells whether
+    the stream was copied as-is rather than transcoded.
+    """
+    codec = probe_audio_codec(file_path)
+    extension = COPY_CONTAINERS.get(codec)
+
+    if extension:
+        staged = new_staging_path(extension)
+        try:
+            _run_ffmpeg(file_path, staged, ['-c:a', 'copy'])
+            return staged, extension, True
+        except subprocess.CalledProcessError as e:
+            os.remove(staged)
+            logger.warning(f"Copying the {codec} stream of {file_path} failed, transcoding: {e.stderr.decode()}")
+
+    staged = new_staging_path(TRANSCODE_EXTENSION)
+    try:
+        _run_ffmpeg(file_path, staged, ['-c:a', 'aac', '-b:a', TRANSCODE_BITRATE])
+    except subprocess.CalledProcessError as e:
+        os.remove(staged)
+        raise RuntimeError(f"Failed to extract audio: {e.stderr.decode()}") from e
+
+    return staged, TRANSCODE_EXTENSION, False
+
+
+def is_video_file(name):
+    return os.path.splitext(name)[1].lower().lstrip('.') in getattr(settings, 'ALLOWED_VIDEO_FORMATS', [])
+
+
+def strip_video(transcript):
+    """
+    Replace a transcript's video source with its extracted audio track.
+
+    Every transcript sharing the video blob is switched to the audio blob.
+    Returns False if there was nothing to do.
+    """
+    if not getattr(settings, 'INGEST_EXTRACT_AUDIO', True) or not is_video_file(transcript.file.name):
+        return False
+
+    video_name = transcript.file.name
+    staged, extension, copied = extract_audio(transcript.file.path)
+    audio_name, _ = store_staged_file(staged, extension)
+
+    action = getattr(settings, 'INGEST_VIDEO_ACTION', 'keep')
+    original = video_name if action == 'keep' else ''
+    sharing = Transcript.objects.filter(file=video_name)
+    ids = list(sharing.values_list('id', flat=True))
+    sharing.update(file=audio_name, original_file=original)
+    transcript.file.name = audio_name
+    transcript.original_file = original
+
+    if action != 'keep':
+        archive_dir = None
+        if action == 'archive':
+            archive_dir = getattr(settings, 'INGEST_VIDEO_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'archive'))
+        archived = release_blob(video_name, archive_dir=archive_dir)
+        if archived:
+            Transcript.objects.filter(id__in=ids).update(original_file=archived)
+            transcript.original_file = archived
+
+    logger.info(
+        f"Extracted audio of {video_name} to {audio_name} "
+        f"({'stream copy' if copied else 'transcoded'}), video {action}"
+    )
+    return True
@@ -0,0 +1,69 @@
+"""
+Language probe that routes English recordings to Whisper's English-only models.
+
+The ``.en`` checkpoints of tiny, base, small and medium are faster and more
+accurate on English than the multilingual ones of the same size. Before a
+job runs, the first 30 seconds are run through the encoder of a small
+multilingual model (``WHISPER_LANGUAGE_PROBE_MODEL``) for language
+identification only. The result is stored on ``Transcript.language``, so
+retries and re-runs skip the probe. Jobs confidently identified as English
+then use the ``.en`` variant of their model, and everything else uses the
+multilingual model.
+"""
+from django.conf import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROBE_SECONDS = 30
+ENGLISH = 'en'
+# Sizes that have an English-only checkpoint
+ENGLISH_ONLY_SIZES = {'tiny', 'base', 'small', 'medium'}
+
+
+def english_variant(model_name):
+    """The English-only checkpoint of a model, or the model itself if there is none"""
+    if model_name.endswith('.en') or model_name not in ENGLISH_ONLY_SIZES:
+        return model_name
+    return f'{model_name}.en'
+
+
+def multilingual_variant(model_name):
+    return model_name[:-len('.en')] if model_name.endswith('.en') else model_name
+
+
+def route_model(model_name, language):
+    """The checkpoint of ``model_name``'s size to use for audio in ``language``"""
+    if language == ENGLISH:
+        return english_variant(model_name)
+    return multilingual_variant(model_name)
+
+
+def detect_language(model, audio):
+    """
+    Most likely language of the first 30 seconds of 16 kHz audio and its
+    probability, from a multilingual model of the configured engine.
+    """
+    from .engines import get_engine
+
+    return get_engine().detect_language(model, audio)
+
+
+def probe_language(transcript, audio, get_model, device):
+    """
+    Identify and store the language of a transcript from ``audio`` (its
+    first 30 seconds suffice).
+
+    A language below ``WHISPER_LANGUAGE_MIN_PROBABILITY`` is not stored and
+    reported as '', which keeps the job on the multilingual model.
+    """
+    probe_model = multilingual_variant(getattr(settings, 'WHISPER_LANGUAGE_PROBE_MODEL', 'tiny'))
+    language, probability = detect_language(get_model(probe_model, device), audio)
+    logger.info(f"Language probe for transcript {transcript.id}: {language} ({probability:.2f})")
+
+    if probability < getattr(settings, 'WHISPER_LANGUAGE_MIN_PROBABILITY', 0.8):
+        return ''
+
+    transcript.language = language
+    transcript.save(update_fields=['language', 'updated_at'])
+    return language
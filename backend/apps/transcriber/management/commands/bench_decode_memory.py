@@ -0,0 +1,64 @@
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.transcriber.chunking import SAMPLE_RATE, load_audio, stream_audio, stream_chunks
+from apps.transcriber.metrics import peak_resident_mb
+from apps.transcriber.synthetic import write_synthetic_audio
+import multiprocessing
+import tempfile
+import time
+import json
+
+
+def _decode(mode, path, window_seconds, overlap_seconds, mel):
+    """Decode one file in a fresh process and report its peak RSS"""
+    if mel:
+        from whisper.audio import log_mel_spectrogram
+
+    start = time.perf_counter()
+    samples = 0
+
+    if mode == 'full':
+        audio = load_audio(path)
+        samples = len(audio)
+        if mel:
+            log_mel_spectrogram(audio)
+    elif mode == 'streaming':
+        for chunk, audio in stream_chunks(stream_audio(path), window_seconds, overlap_seconds):
+            samples = max(samples, int(chunk['end'] * SAMPLE_RATE))
+            if mel:
+                log_mel_spectrogram(audio)
+
+    return {
+        'mode': mode,
+        'audio_seconds': samples / SAMPLE_RATE,
+        'elapsed': time.perf_counter() - start,
+        'peak_rss_mb': peak_resident_mb(),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare peak RSS of full and streaming audio decode on synthetic recordings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lengths', default='600,3600,14400',
+                            help='Comma-separated recording lengths in seconds')
+        parser.add_argument('--window', type=float, default=getattr(settings, 'WHISPER_STREAM_WINDOW_SECONDS', 300),
+                            help='Streaming window in seconds')
+        parser.add_argument('--mel', action='store_true',
+                            help='Also compute the log-mel spectrogram (requires whisper)')
+
+    def handle(self, *args, **options):
+        lengths = [float(length) for length in options['lengths'].split(',')]
+        overlap = getattr(settings, 'WHISPER_CHUNK_OVERLAP_SECONDS', 2)
+        context = multiprocessing.get_context('spawn')
+
+        with tempfile.TemporaryDirectory() as directory:
+            for seconds in lengths:
+                path = write_synthetic_audio(directory, seconds)
+                # 'baseline' measures the interpreter and imports alone
+                for mode in ('baseline', 'full', 'streaming'):
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                        report = pool.submit(_decode, mode, path, options['window'], overlap, options['mel']).result()
+                    report['input_seconds'] = seconds
+                    self.stdout.write(json.dumps(report))
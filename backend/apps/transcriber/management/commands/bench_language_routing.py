@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.transcriber.chunking import SAMPLE_RATE, load_audio
+from apps.transcriber.language import detect_language, english_variant, multilingual_variant, route_model
+from apps.transcriber.registry import get_model
+from collections import Counter
+import time
+import json
+import os
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare end-to-end transcription throughput with and without language routing '
+        'on a directory of recordings (ideally a mix of languages)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Directory of audio files to transcribe')
+        parser.add_argument('--model', default=getattr(settings, 'WHISPER_MODEL', 'base'),
+                            help='Model size to compare (multilingual vs. routed)')
+        parser.add_argument('--probe-model', default=getattr(settings, 'WHISPER_LANGUAGE_PROBE_MODEL', 'tiny'))
+        parser.add_argument('--min-probability', type=float,
+                            default=getattr(settings, 'WHISPER_LANGUAGE_MIN_PROBABILITY', 0.8))
+
+    def handle(self, *args, **options):
+        paths = sorted(
+            os.path.join(options['directory'], name) for name in os.listdir(options['directory'])
+            if os.path.isfile(os.path.join(options['directory'], name))
+        )
+        if not paths:
+            raise CommandError(f"No files in {options['directory']}")
+
+        device = getattr(settings, 'WHISPER_DEVICE', 'cpu')
+        model_name = multilingual_variant(options['model'])
+        probe = get_model(multilingual_variant(options['probe_model']), device)
+        # Load both checkpoints up front so neither side pays for loading
+        get_model(model_name, device)
+        get_model(english_variant(model_name), device)
+
+        totals = {'audio_seconds': 0.0, 'multilingual_seconds': 0.0, 'routed_seconds': 0.0}
+        languages = Counter()
+        for path in paths:
+            audio = load_audio(path)
+
+            start = time.perf_counter()
+            multilingual = get_model(model_name, device).transcribe(audio)
+            multilingual_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            language, probability = detect_language(probe, audio)
+            routed_name = route_model(model_name, language if probability >= options['min_probability'] else '')
+            routed = get_model(routed_name, device).transcribe(audio)
+            routed_seconds = time.perf_counter() - start
+
+            audio_seconds = len(audio) / SAMPLE_RATE
+            totals['audio_seconds'] += audio_seconds
+            totals['multilingual_seconds'] += multilingual_seconds
+            totals['routed_seconds'] += routed_seconds
+            languages[language] += 1
+
+            self.stdout.write(json.dumps({
+                'file': os.path.basename(path),
+                'audio_seconds': round(audio_seconds, 1),
+                'language': language,
+                'probability': round(probability, 3),
+                'routed_model': routed_name,
+                'multilingual_seconds': round(multilingual_seconds, 2),
+                'routed_seconds': round(routed_seconds, 2),
+                'same_text': multilingual['text'].strip() == routed['text'].strip(),
+            }))
+
+        multilingual_rate = totals['audio_seconds'] / totals['multilingual_seconds']
+        routed_rate = totals['audio_seconds'] / totals['routed_seconds']
+        self.stdout.write(json.dumps({
+            'files': len(paths),
+            'languages': dict(languages),
+            'model': model_name,
+            'multilingual_throughput': round(multilingual_rate, 2),  # audio seconds per wall second
+            'routed_throughput': round(routed_rate, 2),
+            'throughput_change': f'{(routed_rate / multilingual_rate - 1) * 100:+.1f}%',
+        }))
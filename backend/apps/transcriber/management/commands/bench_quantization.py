@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.transcriber.chunking import SAMPLE_RATE, load_audio
+from apps.transcriber.metrics import realtime_factor, word_error_rate
+from apps.transcriber.registry import _model_nbytes, get_model
+import time
+import json
+import os
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.flac', '.ogg', '.opus', '.webm')
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare fp32 and int8-quantized CPU inference per model size on a fixed directory of '
+        'recordings: real-time factor, and word error rate against the fp32 output (and against '
+        '<name>.txt reference transcripts where present)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Directory of audio files to transcribe')
+        parser.add_argument('--models', nargs='+',
+                            default=sorted(set(getattr(settings, 'WHISPER_TIER_MODELS', {}).values()))
+                            or [getattr(settings, 'WHISPER_MODEL', 'base')],
+                            help='Model sizes to compare (default: the models of all tiers)')
+
+    def handle(self, *args, **options):
+        paths = sorted(
+            os.path.join(options['directory'], name) for name in os.listdir(options['directory'])
+            if name.lower().endswith(AUDIO_EXTENSIONS)
+        )
+        if not paths:
+            raise CommandError(f"No audio files in {options['directory']}")
+
+        recordings = []
+        for path in paths:
+            reference_path = os.path.splitext(path)[0] + '.txt'
+            reference = None
+            if os.path.exists(reference_path):
+                with open(reference_path) as f:
+                    reference = f.read()
+            recordings.append((os.path.basename(path), load_audio(path), reference))
+
+        for model_name in options['models']:
+            self.stdout.write(json.dumps(self.compare(model_name, recordings)))
+
+    def compare(self, model_name, recordings):
+        summary = {'model': model_name}
+        outputs = {}
+        for mode in (None, 'int8'):
+            label = mode or 'fp32'
+            start = time.perf_counter()
+            model = get_model(model_name, 'cpu', quantize=mode)
+            summary[f'{label}_load_seconds'] = round(time.perf_counter() - start, 2)
+            summary[f'{label}_weights_mb'] = round(_model_nbytes(model) / 1024 / 1024, 1)
+
+            decode_seconds, audio_seconds, texts = 0.0, 0.0, []
+            for _, audio, _ in recordings:
+                start = time.perf_counter()
+                texts.append(model.transcribe(audio, temperature=0.0, fp16=False)['text'])
+                decode_seconds += time.perf_counter() - start
+                audio_seconds += len(audio) / SAMPLE_RATE
+            outputs[label] = texts
+            summary[f'{label}_rtf'] = round(realtime_factor(decode_seconds, audio_seconds), 3)
+
+        for (name, _, reference), fp32, int8 in zip(recordings, outputs['fp32'], outputs['int8']):
+            row = {'model': model_name, 'file': name, 'wer_vs_fp32': round(word_error_rate(fp32, int8), 4)}
+            if reference is not None:
+                row['fp32_wer'] = round(word_error_rate(reference, fp32), 4)
+                row['int8_wer'] = round(word_error_rate(reference, int8), 4)
+            self.stdout.write(json.dumps(row))
+
+        summary['wer_vs_fp32'] = round(word_error_rate(' '.join(outputs['fp32']), ' '.join(outputs['int8'])), 4)
+        references = [reference for _, _, reference in recordings]
+        if all(reference is not None for reference in references):
+            summary['fp32_wer'] = round(word_error_rate(' '.join(references), ' '.join(outputs['fp32'])), 4)
+            summary['int8_wer'] = round(word_error_rate(' '.join(references), ' '.join(outputs['int8'])), 4)
+        summary['speedup'] = round(summary['fp32_rtf'] / summary['int8_rtf'], 2) if summary['int8_rtf'] else None
+        return summary
@@ -0,0 +1,189 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from apps.transcriber.chunking import SAMPLE_RATE, load_audio
+from apps.transcriber.metrics import NOISE_FLOORS, PeakMemory, compare_to_baseline, cpu_seconds, realtime_factor
+from apps.transcriber.models import Transcript
+from apps.transcriber.registry import get_model, registry
+from apps.transcriber.synthetic import synthetic_lecture
+from apps.transcriber.tasks import transcribe_audio_task
+import numpy as np
+import platform
+import tempfile
+import shutil
+import time
+import wave
+import json
+import os
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.flac', '.ogg', '.opus', '.webm')
+
+# Pipeline features that hand work to other Celery tasks (and need a broker), or would
+# reuse an earlier run's result, are off so every run decodes its fixture in-process.
+# Audio extraction and the PCM cache would rewrite the fixture or skip decoding it.
+BENCH_SETTINGS = {
+    'WHISPER_FANOUT': False,
+    'WHISPER_TWO_PASS': False,
+    'WHISPER_REDECODE': False,
+    'WHISPER_SIMILAR_ACTION': 'off',
+    'INGEST_EXTRACT_AUDIO': False,
+    'WHISPER_PCM_CACHE_MB': 0,
+}
+
+
+def write_fixture(directory, seconds, seed=0):
+    """Write a synthetic lecture of ``seconds`` as 16-bit WAV and return its path"""
+    path = os.path.join(directory, f'lecture_{int(seconds)}s.wav')
+    audio, _ = synthetic_lecture(seconds, seed=seed)
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((np.clip(audio, -1, 1) * 32767).astype('<i2').tobytes())
+    return path
+
+
+class Command(BaseCommand):
+    help = (
+        'Run audio fixtures through transcribe_audio_task per engine and model size and report load '
+        'time, decode time, real-time factor, peak RSS and CPU seconds as JSON; with --baseline, '
+        'fail if a metric regressed by more than --threshold. Runs against a throwaway test database '
+        'and a temporary MEDIA_ROOT, never the configured ones'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixtures',
+                            help='Directory of recordings to use; synthetic lectures of --lengths are '
+                                 'written into it when it has none (default: a temporary directory)')
+        parser.add_argument('--lengths', default='30,300,1800',
+                            help='Comma-separated lengths in seconds of the synthetic fixtures')
+        parser.add_argument('--engines', nargs='+', default=[getattr(settings, 'WHISPER_ENGINE', 'openai-whisper')])
+        parser.add_argument('--models', nargs='+', default=[getattr(settings, 'WHISPER_MODEL', 'base')])
+        parser.add_argument('--output', help='Also write the report to this file (usable as a baseline)')
+        parser.add_argument('--baseline', help='Earlier report to compare against')
+        parser.add_argument('--threshold', type=float, default=0.1,
+                            help='Allowed growth of a metric over the baseline (0.1 = 10%%)')
+        parser.add_argument('--metrics', nargs='+', default=['rtf', 'cpu_seconds', 'peak_rss_mb'],
+                            help='Metrics compared against the baseline')
+        parser.add_argument('--min-delta', action='append', default=[], metavar='METRIC=VALUE',
+                            help='Smallest absolute growth of a metric that counts as a regression '
+                                 f'(defaults: {", ".join(f"{k}={v}" for k, v in NOISE_FLOORS.items())})')
+
+    def handle(self, *args, **options):
+        min_deltas = self.min_deltas(options['min_delta'])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = options['fixtures'] or tmp
+            fixtures = self.fixtures(directory, options['lengths'])
+
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                results = []
+                for engine in options['engines']:
+                    for model_name in options['models']:
+                        results.extend(self.run(engine, model_name, directory, fixtures))
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            'environment': {
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'cores': os.cpu_count(),
+                'device': getattr(settings, 'WHISPER_DEVICE', 'cpu'),
+            },
+            'results': results,
+        }
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+        regressions = []
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = compare_to_baseline(
+                results, baseline['results'], options['threshold'], options['metrics'], min_deltas,
+            )
+            report['regressions'] = regressions
+
+        self.stdout.write(json.dumps(report, indent=2))
+        if regressions:
+            raise CommandError(f"{len(regressions)} metric(s) regressed by more than {options['threshold']:.0%}")
+
+    def min_deltas(self, overrides):
+        min_deltas = dict(NOISE_FLOORS)
+        for override in overrides:
+            metric, _, value = override.partition('=')
+            try:
+                min_deltas[metric] = float(value)
+            except ValueError:
+                raise CommandError(f"--min-delta expects METRIC=VALUE, got {override!r}") from None
+        return min_deltas
+
+    def fixtures(self, directory, lengths):
+        os.makedirs(directory, exist_ok=True)
+        names = [name for name in os.listdir(directory) if name.lower().endswith(AUDIO_EXTENSIONS)]
+        if not names:
+            names = [
+                os.path.basename(write_fixture(directory, float(length), seed=index))
+                for index, length in enumerate(lengths.split(','))
+            ]
+        fixtures = [(name, len(load_audio(os.path.join(directory, name))) / SAMPLE_RATE) for name in names]
+        return sorted(fixtures, key=lambda fixture: fixture[1])
+
+    def run(self, engine, model_name, directory, fixtures):
+        device = getattr(settings, 'WHISPER_DEVICE', 'cpu')
+        results = []
+        # The task writes blobs and caches next to its file, so it gets copies of the fixtures
+        media_root = tempfile.mkdtemp()
+        try:
+            for name, _ in fixtures:
+                shutil.copy(os.path.join(directory, name), media_root)
+
+            with override_settings(WHISPER_ENGINE=engine, MEDIA_ROOT=media_root, **BENCH_SETTINGS):
+                # Models are cached per process, not per engine
+                registry.clear()
+                start = time.perf_counter()
+                get_model(model_name, device)
+                load_seconds = time.perf_counter() - start
+
+                for name, audio_seconds in fixtures:
+                    with transaction.atomic():
+                        user, _ = get_user_model().objects.get_or_create(username='transcription-benchmark')
+                        transcript = Transcript.objects.create(
+                            user=user, title=name, file=name, file_name=name,
+                            file_size=os.path.getsize(os.path.join(media_root, name)),
+                            file_type='audio/wav', duration=audio_seconds, status='pending',
+                        )
+
+                        cpu_start = cpu_seconds()
+                        start = time.perf_counter()
+                        with PeakMemory() as memory:
+                            outcome = transcribe_audio_task(transcript.id, ignore_similar=True, model_name=model_name)
+                        decode_seconds = time.perf_counter() - start
+                        cpu = cpu_seconds() - cpu_start
+                        # Nothing the benchmark creates is kept
+                        transaction.set_rollback(True)
+
+                    if outcome.get('status') != 'completed':
+                        raise CommandError(f"Transcribing {name} with {engine}/{model_name} failed: {outcome}")
+
+                    results.append({
+                        'engine': engine,
+                        'model': model_name,
+                        'fixture': name,
+                        'audio_seconds': round(audio_seconds, 1),
+                        'load_seconds': round(load_seconds, 3),
+                        'decode_seconds': round(decode_seconds, 3),
+                        'rtf': round(realtime_factor(decode_seconds, audio_seconds), 4),
+                        'cpu_seconds': round(cpu, 3),
+                        'peak_rss_mb': round(memory.peak_mb, 1),
+                    })
+        finally:
+            registry.clear()
+            shutil.rmtree(media_root, ignore_errors=True)
+        return results
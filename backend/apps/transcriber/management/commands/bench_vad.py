@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.transcriber.chunking import load_audio
+from apps.transcriber.registry import get_model
+from apps.transcriber.synthetic import synthetic_lecture
+from apps.transcriber.vad import SpeechTimeline
+import time
+import json
+import os
+
+
+def _overlap(spans, other):
+    return sum(
+        max(0.0, min(end, other_end) - max(start, other_start))
+        for start, end in spans for other_start, other_end in other
+    )
+
+
+class Command(BaseCommand):
+    help = 'Report the audio skipped by voice-activity detection and, with --model, the wall-clock time saved'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*', help='Recordings to measure (default: synthetic lectures)')
+        parser.add_argument('--lengths', default='600,3600',
+                            help='Comma-separated synthetic lecture lengths in seconds')
+        parser.add_argument('--model', help='Also transcribe with this Whisper model, whole and speech-only')
+
+    def handle(self, *args, **options):
+        inputs = [(os.path.basename(path), load_audio(path), None) for path in options['files']]
+        if not inputs:
+            for seconds in (float(length) for length in options['lengths'].split(',')):
+                audio, speech = synthetic_lecture(seconds)
+                inputs.append((f'synthetic_{int(seconds)}s', audio, speech))
+
+        model = None
+        if options['model']:
+            model = get_model(options['model'], getattr(settings, 'WHISPER_DEVICE', 'cpu'))
+
+        for name, audio, speech in inputs:
+            start = time.perf_counter()
+            timeline = SpeechTimeline.detect(audio)
+            vad_seconds = time.perf_counter() - start
+
+            report = {
+                'input': name,
+                'audio_seconds': round(timeline.total_seconds, 1),
+                'speech_spans': len(timeline.spans),
+                'skipped_ratio': round(timeline.skipped_ratio, 4),
+                'vad_seconds': round(vad_seconds, 3),
+            }
+            if speech is not None:
+                # Share of the true speech that was kept, and of the kept audio that is speech
+                kept = _overlap(timeline.spans, speech)
+                report['speech_recall'] = round(kept / sum(end - start for start, end in speech), 4)
+                report['kept_precision'] = round(kept / timeline.speech_seconds, 4) if timeline.speech_seconds else None
+
+            if model is not None:
+                start = time.perf_counter()
+                model.transcribe(audio)
+                full_seconds = time.perf_counter() - start
+
+                start = time.perf_counter()
+                timeline.restore(model.transcribe(timeline.compact(audio)))
+                vad_decode_seconds = time.perf_counter() - start + vad_seconds
+
+                report['full_decode_seconds'] = round(full_seconds, 2)
+                report['vad_decode_seconds'] = round(vad_decode_seconds, 2)
+                report['wall_clock_saved'] = round(1 - vad_decode_seconds / full_seconds, 4)
+
+            self.stdout.write(json.dumps(report))
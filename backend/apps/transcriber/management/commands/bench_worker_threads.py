@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.transcriber.chunking import SAMPLE_RATE, load_audio
+from apps.transcriber.synthetic import synthetic_lecture
+from apps.transcriber.threads import apply_profile, plan_profile, usable_cpus
+import multiprocessing
+import queue
+import tempfile
+import time
+import json
+import os
+import numpy as np
+
+
+def _run_child(profile, model_name, audio_path, rounds, barrier, results):
+    """Decode the clip ``rounds`` times under ``profile``, starting together with the other children"""
+    apply_profile(profile)
+
+    import whisper
+
+    model = whisper.load_model(model_name, device='cpu')
+    audio = np.load(audio_path)
+    model.transcribe(audio[:SAMPLE_RATE * 5], fp16=False)  # first-call setup outside the timing
+
+    barrier.wait()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        model.transcribe(audio, temperature=0.0, fp16=False, condition_on_previous_text=False)
+    results.put((start, time.perf_counter(), rounds * len(audio) / SAMPLE_RATE))
+
+
+class Command(BaseCommand):
+    help = (
+        'Sweep worker children x torch threads per child and report the aggregate throughput '
+        '(audio seconds transcribed per wall-clock second) of each combination'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', nargs='?', help='Recording to decode (default: a synthetic lecture)')
+        parser.add_argument('--seconds', type=float, default=60, help='Length of the synthetic lecture')
+        parser.add_argument('--model', default=getattr(settings, 'WHISPER_MODEL', 'base'))
+        parser.add_argument('--children', default='1,2,4', help='Comma-separated numbers of children')
+        parser.add_argument('--threads', default='0,1,2,4',
+                            help='Comma-separated intra-op threads per child (0 = cores / children)')
+        parser.add_argument('--rounds', type=int, default=2, help='Decodes of the recording per child')
+        parser.add_argument('--pin', action='store_true', help='Pin children to disjoint CPU sets')
+
+    def handle(self, *args, **options):
+        audio = load_audio(options['file']) if options['file'] else synthetic_lecture(options['seconds'])[0]
+        cpus = usable_cpus()
+        context = multiprocessing.get_context('spawn')
+        best = None
+
+        with tempfile.TemporaryDirectory() as tmp:
+            audio_path = os.path.join(tmp, 'audio.npy')
+            np.save(audio_path, np.asarray(audio, np.float32))
+
+            for children in (int(value) for value in options['children'].split(',')):
+                for threads in sorted({
+                    plan_profile(0, children, int(value), cpus=cpus).intra_op
+                    for value in options['threads'].split(',')
+                }):
+                    report = self.run(context, children, threads, cpus, audio_path, options)
+                    self.stdout.write(json.dumps(report))
+                    if best is None or report['throughput'] > best['throughput']:
+                        best = report
+
+        self.stdout.write(json.dumps({'cores': len(cpus), 'best': best}))
+
+    def run(self, context, children, threads, cpus, audio_path, options):
+        barrier = context.Barrier(children)
+        results = context.Queue()
+        processes = [
+            context.Process(target=_run_child, args=(
+                plan_profile(index, children, threads, pin=options['pin'], cpus=cpus),
+                options['model'], audio_path, options['rounds'], barrier, results,
+            ))
+            for index in range(children)
+        ]
+        for process in processes:
+            process.start()
+        runs = []
+        while len(runs) < children:
+            try:
+                runs.append(results.get(timeout=1))
+            except queue.Empty:
+                if any(process.exitcode not in (None, 0) for process in processes):
+                    for process in processes:
+                        process.terminate()
+                    raise CommandError(f'A child failed with {children} children x {threads} threads')
+        for process in processes:
+            process.join()
+
+        wall = max(end for _, end, _ in runs) - min(start for start, _, _ in runs)
+        audio_seconds = sum(seconds for _, _, seconds in runs)
+        return {
+            'children': children,
+            'threads': threads,
+            'pinned': options['pin'],
+            'oversubscribed': children * threads > len(cpus),
+            'audio_seconds': round(audio_seconds, 1),
+            'wall_seconds': round(wall, 2),
+            'throughput': round(audio_seconds / wall, 2),  # audio seconds per wall second
+        }
@@ -0,0 +1,142 @@
+"""
+Accuracy and speed measures for comparing transcription setups.
+"""
+import threading
+import resource
+import re
+import os
+
+_WORD = re.compile(r"[\w']+")
+
+
+def normalize_words(text):
+    """Lower-cased words of a transcript, without punctuation"""
+    return _WORD.findall(text.lower())
+
+
+def word_error_rate(reference, hypothesis):
+    """
+    Word-level edit distance between two transcripts divided by the number of
+    reference words. With a model's own fp32 output as the reference this is
+    a proxy for the accuracy lost by a faster setup.
+    """
+    reference, hypothesis = normalize_words(reference), normalize_words(hypothesis)
+    if not reference:
+        return float(bool(hypothesis))
+
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            ))
+        previous = current
+    return previous[-1] / len(reference)
+
+
+def realtime_factor(processing_seconds, audio_seconds):
+    """Seconds of processing per second of audio (below 1 is faster than real time)"""
+    return processing_seconds / audio_seconds if audio_seconds else 0.0
+
+
+def resident_mb():
+    """Current resident set size of this process in MB, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError):
+        return None
+
+
+def peak_resident_mb():
+    """
+    Peak resident set size of this process in MB (VmHWM), or None where /proc
+    is unavailable. Unlike getrusage's ru_maxrss it is not inherited from the
+    parent across exec, so a spawned process reports only its own peak.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            return int(next(line for line in f if line.startswith('VmHWM')).split()[1]) / 1024
+    except (OSError, ValueError, StopIteration):
+        return None
+
+
+class PeakMemory:
+    """
+    Context manager that samples the process's RSS every ``interval`` seconds
+    and keeps the highest value in ``peak_mb``. Falls back to the lifetime
+    peak from getrusage where /proc is unavailable.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while True:
+            current = resident_mb()
+            if current is None:
+                return
+            self.peak_mb = max(self.peak_mb, current)
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        if not self.peak_mb:
+            self.peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def cpu_seconds():
+    """User and system CPU time of this process and its finished children (ffmpeg, chunk pools)"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+# Smallest absolute growth of a metric that counts as a regression. Short runs vary by more
+# than any sensible relative threshold between identical runs.
+NOISE_FLOORS = {'rtf': 0.01, 'load_seconds': 0.5, 'decode_seconds': 0.5, 'cpu_seconds': 0.5, 'peak_rss_mb': 20}
+
+
+def compare_to_baseline(results, baseline, threshold, metrics=('rtf', 'cpu_seconds', 'peak_rss_mb'), min_deltas=None):
+    """
+    Regressions of ``results`` against ``baseline`` (both lists of benchmark
+    rows keyed by engine, model and fixture): every metric that grew by more
+    than ``threshold`` (0.1 = 10%) and by more than its ``min_deltas`` entry
+    (``NOISE_FLOORS`` by default), as ``{'engine', 'model', 'fixture',
+    'metric', 'baseline', 'current', 'change'}``. Rows missing from either
+    side are not compared.
+    """
+    min_deltas = NOISE_FLOORS if min_deltas is None else min_deltas
+
+    def key(row):
+        return row['engine'], row['model'], row['fixture']
+
+    previous = {key(row): row for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get(key(row))
+        if before is None:
+            continue
+        for metric in metrics:
+            old, new = before.get(metric), row.get(metric)
+            if not old or new is None:
+                continue
+            change = new / old - 1
+            if change > threshold and new - old > min_deltas.get(metric, 0):
+                regressions.append({
+                    'engine': row['engine'], 'model': row['model'], 'fixture': row['fixture'],
+                    'metric': metric, 'baseline': old, 'current': new, 'change': round(change, 4),
+                })
+    return regressions
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-17 23:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcriber', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('start', models.FloatField()),
+                ('end', models.FloatField()),
+                ('text', models.TextField()),
+                ('avg_logprob', models.FloatField(blank=True, null=True)),
+                ('no_speech_prob', models.FloatField(blank=True, null=True)),
+                ('transcript', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='transcriber.transcript')),
+            ],
+            options={
+                'ordering': ['index'],
+                'indexes': [models.Index(fields=['transcript', 'start'], name='transcriber_segment_start_idx')],
+                'constraints': [models.UniqueConstraint(fields=('transcript', 'index'), name='transcriber_segment_unique_index')],
+            },
+        ),
+    ]
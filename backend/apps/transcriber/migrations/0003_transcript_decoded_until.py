@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 23:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcriber', '0002_transcriptsegment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcript',
+            name='decoded_until',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
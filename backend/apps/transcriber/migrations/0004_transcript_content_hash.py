@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-17 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcriber', '0003_transcript_decoded_until'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcript',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='transcript',
+            name='model_used',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+    ]
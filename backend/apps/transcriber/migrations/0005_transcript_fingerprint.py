@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-17 23:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcriber', '0004_transcript_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcript',
+            name='fingerprint',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transcript',
+            name='similar_offset',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transcript',
+            name='similar_transcript',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='transcriber.transcript'),
+        ),
+        migrations.CreateModel(
+            name='AudioFingerprintKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.IntegerField(db_index=True)),
+                ('position', models.IntegerField()),
+                ('transcript', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprint_keys', to='transcriber.transcript')),
+            ],
+        ),
+    ]
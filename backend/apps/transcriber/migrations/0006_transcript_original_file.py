@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcriber', '0005_transcript_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcript',
+            name='original_file',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-18 00:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcriber', '0006_transcript_original_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioCompaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_name', models.CharField(max_length=500, unique=True)),
+                ('compact_name', models.CharField(max_length=500)),
+                ('source_bytes', models.BigIntegerField()),
+                ('compact_bytes', models.BigIntegerField()),
+                ('source_deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 00:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcriber', '0007_audiocompaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcript',
+            name='awaiting_batch',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
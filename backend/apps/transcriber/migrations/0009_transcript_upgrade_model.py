@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 00:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcriber', '0008_transcript_awaiting_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcript',
+            name='upgrade_model',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 00:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcriber', '0009_transcript_upgrade_model'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcript',
+            name='draft_model',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='transcript',
+            name='draft_text',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='transcript',
+            name='refinement',
+            field=models.CharField(blank=True, choices=[('', 'None'), ('pending', 'Pending'), ('skipped', 'Skipped'), ('failed', 'Failed'), ('done', 'Done')], db_index=True, default='', max_length=20),
+        ),
+    ]
@@ -1,5 +1,10 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from .language import english_variant
 import os
 
 User = get_user_model()
@@ -16,6 +21,15 @@ class Transcript(models.Model):
         ('failed', 'Failed'),
     ]
 
+    # Second pass of a two-pass transcription; raw_text is still the draft unless 'done'
+    REFINEMENT_CHOICES = [
+        ('', 'None'),
+        ('pending', 'Pending'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+        ('done', 'Done'),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transcripts')
     title = models.CharField(max_length=255, blank=True)
     file = models.FileField(upload_to=upload_to_transcriber)
@@ -31,10 +45,130 @@ class Transcript(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    decoded_until = models.FloatField(null=True, blank=True)  # Seconds of audio transcribed so far
+    awaiting_batch = models.BooleanField(default=False, db_index=True)  # Short clip queued for batched decoding
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)  # SHA-256 of the uploaded file
+    original_file = models.CharField(max_length=500, blank=True)  # Kept or archived video whose audio is in file
+    model_used = models.CharField(max_length=50, blank=True)  # Whisper model that produced raw_text
+    upgrade_model = models.CharField(max_length=50, blank=True)  # Larger model to re-run with when there is capacity, see tiers.py
+    draft_text = models.TextField(blank=True)  # Fast first-pass text of a two-pass transcription
+    draft_model = models.CharField(max_length=50, blank=True)
+    refinement = models.CharField(max_length=20, choices=REFINEMENT_CHOICES, blank=True, default='', db_index=True)
+    fingerprint = models.BinaryField(null=True, blank=True, editable=False)  # Perceptual sub-fingerprints, see fingerprint.py
+    similar_transcript = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )  # Earlier transcript of a near-duplicate recording
+    similar_offset = models.FloatField(null=True, blank=True)  # Seconds to add to a time here to find it there
 
     def __str__(self):
         return f"{self.title or self.file_name} - {self.user.username}"
 
+    def find_duplicate(self, model_name):
+        """
+        A completed transcript of the same content by the same user made with the
+        given model (or its English-only checkpoint, which English recordings are
+        routed to), if any. Other users' transcripts are never reused.
+        """
+        if not self.content_hash:
+            return None
+        return (
+            Transcript.objects
+            .filter(user=self.user_id, content_hash=self.content_hash, status='completed',
+                    model_used__in=[model_name, english_variant(model_name)])
+            .exclude(id=self.id)
+            .order_by('-completed_at')
+            .first()
+        )
+
+    def copy_results_from(self, source, offset=0.0, duration=None):
+        """
+        Reuse another transcript's results (and segments) instead of transcribing again.
+
+        For a near-duplicate recording ``offset`` is where this recording starts
+        in the source: segments are shifted onto this recording's timeline and
+        those falling outside its ``duration`` are dropped.
+        """
+        segments = []
+        for segment in source.segments.all():
+            start, end = segment.start - offset, segment.end - offset
+            if end <= 0 or (duration is not None and start >= duration):
+                continue
+            segments.append(TranscriptSegment(
+                transcript=self, index=len(segments), start=max(0.0, start), end=end,
+                text=segment.text, avg_logprob=segment.avg_logprob, no_speech_prob=segment.no_speech_prob,
+            ))
+
+        if offset or duration is not None:
+            self.raw_text = ' '.join(segment.text for segment in segments)
+            self.duration = duration if duration is not None else (segments[-1].end if segments else None)
+            self.decoded_until = self.duration
+        else:
+            self.raw_text = source.raw_text
+            self.duration = source.duration
+            self.decoded_until = source.decoded_until
+        self.language = source.language
+        self.confidence = source.confidence
+        self.model_used = source.model_used
+        self.upgrade_model = source.upgrade_model
+        self.draft_text = source.draft_text
+        self.draft_model = source.draft_model
+        # A draft copy is not refined on its own; the upgrade path picks it up instead
+        self.refinement = 'skipped' if source.is_draft else source.refinement
+        self.error_message = ''
+        self.status = 'completed'
+        self.completed_at = timezone.now()
+
+        with transaction.atomic():
+            self.save()
+            self.segments.all().delete()
+            TranscriptSegment.objects.bulk_create(segments, batch_size=1000)
+
+    @staticmethod
+    def queued_audio_seconds(exclude_id=None, **filters):
+        """Seconds of audio still to be transcribed by queued and running jobs"""
+        queued = (
+            Transcript.objects
+            .filter(status__in=['pending', 'processing'], **filters)
+            .exclude(status='pending', similar_transcript__isnull=False)  # parked on a near-duplicate offer
+        )
+        if exclude_id is not None:
+            queued = queued.exclude(id=exclude_id)
+        remaining = F('duration') - Coalesce('decoded_until', Value(0.0))
+        return queued.aggregate(remaining=Sum(remaining))['remaining'] or 0.0
+
+    def estimated_seconds_remaining(self):
+        """
+        Rough seconds until this transcript is done: the audio still to be
+        transcribed ahead of it on its queue (see ``signatures.transcription_queue``),
+        spread over that queue's workers, plus its own remaining audio.
+
+        None when it is not queued or running, or its length is unknown.
+        """
+        if self.status not in ['pending', 'processing'] or self.duration is None:
+            return None
+        if self.status == 'pending' and self.similar_transcript_id is not None:
+            return None  # parked on a near-duplicate offer
+
+        threshold = getattr(settings, 'WHISPER_LONG_MIN_SECONDS', 600)
+        short = self.duration < threshold
+        if short:
+            workers = getattr(settings, 'WHISPER_SHORT_CONCURRENCY', 1)
+        else:
+            workers = getattr(settings, 'WHISPER_LONG_CONCURRENCY', 1)
+
+        ahead = 0.0
+        if self.status == 'pending':
+            same_queue = {'duration__lt': threshold} if short else {'duration__gte': threshold}
+            ahead = Transcript.queued_audio_seconds(created_at__lt=self.created_at, **same_queue)
+
+        own = self.duration - (self.decoded_until or 0.0)
+        factor = getattr(settings, 'WHISPER_REALTIME_FACTOR', 0.5)
+        return round((ahead / max(workers, 1) + max(own, 0.0)) * factor, 1)
+
+    @property
+    def is_draft(self):
+        return self.refinement in ['pending', 'skipped', 'failed']
+
     @property
     def file_extension(self):
         return os.path.splitext(self.file_name)[1].lower()
@@ -51,3 +185,63 @@ class Transcript(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+
+class TranscriptSegment(models.Model):
+    # The composite indexes below both lead with transcript, so the FK needs no index of its own
+    transcript = models.ForeignKey(Transcript, on_delete=models.CASCADE, related_name='segments', db_index=False)
+    index = models.PositiveIntegerField()
+    start = models.FloatField()  # Seconds from the start of the recording
+    end = models.FloatField()
+    text = models.TextField()
+    avg_logprob = models.FloatField(null=True, blank=True)
+    no_speech_prob = models.FloatField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.transcript_id} #{self.index} [{self.start:.2f}-{self.end:.2f}]"
+
+    @classmethod
+    def from_whisper(cls, transcript, index, segment):
+        """Build an unsaved row from a Whisper result segment"""
+        return cls(
+            transcript=transcript,
+            index=index,
+            start=segment.get('start', 0),
+            end=segment.get('end', 0),
+            text=segment.get('text', '').strip(),
+            avg_logprob=segment.get('avg_logprob'),
+            no_speech_prob=segment.get('no_speech_prob'),
+        )
+
+    class Meta:
+        ordering = ['index']
+        indexes = [
+            models.Index(fields=['transcript', 'start'], name='transcriber_segment_start_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['transcript', 'index'], name='transcriber_segment_unique_index'),
+        ]
+
+class AudioFingerprintKey(models.Model):
+    """Anchor of a transcript's fingerprint, the lookup index for near-duplicate recordings"""
+    transcript = models.ForeignKey(Transcript, on_delete=models.CASCADE, related_name='fingerprint_keys')
+    key = models.IntegerField(db_index=True)
+    position = models.IntegerField()  # Frame index within the fingerprint
+
+    def __str__(self):
+        return f"{self.transcript_id} {self.key:#06x}@{self.position}"
+
+class AudioCompaction(models.Model):
+    """Re-encoding of one stored source file to Opus, and the space it saved"""
+    source_name = models.CharField(max_length=500, unique=True)
+    compact_name = models.CharField(max_length=500)  # Same as source_name if re-encoding did not help
+    source_bytes = models.BigIntegerField()
+    compact_bytes = models.BigIntegerField()
+    source_deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.source_name} -> {self.compact_name}"
+
+    @property
+    def bytes_saved(self):
+        return self.source_bytes - self.compact_bytes if self.compact_name != self.source_name else 0
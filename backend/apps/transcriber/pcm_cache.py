@@ -0,0 +1,141 @@
+"""
+On-disk cache of decoded audio.
+
+Decoding and resampling a recording with ffmpeg is repeated on every retry
+and every re-run with another model, which for video containers is a large
+part of the job. The first attempt writes the normalized 16 kHz mono float32
+samples to ``<digest>-<rate>.pcm`` in the cache directory, and later attempts
+map that file into memory instead of decoding again.
+
+Entries are keyed by the upload's SHA-256 and the sample rate, so every
+transcript of the same content shares one entry. The cache is bounded by
+total size; the entries that were used least recently (by modification time,
+which is refreshed on every hit) are evicted first. Entries are written to a
+temporary file and renamed into place, so concurrent workers never see a
+partial one, and unlinking a file another worker has mapped is safe.
+"""
+from django.conf import settings
+from .chunking import SAMPLE_RATE, stream_audio
+import tempfile
+import numpy as np
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+DTYPE = np.dtype('<f4')
+
+
+class PCMCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+
+    def path(self, digest, sample_rate=SAMPLE_RATE):
+        return os.path.join(self.directory, f'{digest}-{sample_rate}.pcm')
+
+    def get(self, digest, sample_rate=SAMPLE_RATE):
+        """Map a cached entry into memory, or return None on a miss"""
+        path = self.path(digest, sample_rate)
+        try:
+            os.utime(path)
+            return self._open(path)
+        except FileNotFoundError:
+            return None
+
+    def put(self, digest, blocks, sample_rate=SAMPLE_RATE):
+        """Write decoded audio blocks as a new entry and return it mapped into memory"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(digest, sample_rate)
+
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix='.tmp', delete=False) as staging:
+            try:
+                for block in blocks:
+                    staging.write(np.asarray(block, DTYPE).tobytes())
+            except BaseException:
+                os.remove(staging.name)
+                raise
+
+        os.replace(staging.name, path)
+        self.evict(keep=path)
+        return self._open(path)
+
+    def get_or_decode(self, digest, file_path, sample_rate=SAMPLE_RATE):
+        audio = self.get(digest, sample_rate)
+        if audio is not None:
+            logger.info(f"Decoded audio cache hit for {digest[:12]}")
+            return audio
+
+        logger.info(f"Decoding {file_path} into the audio cache")
+        return self.put(digest, stream_audio(file_path), sample_rate)
+
+    def entries(self):
+        """``(mtime, size, path)`` of every complete entry, least recently used first"""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+
+        for name in names:
+            if not name.endswith('.pcm'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    @property
+    def total_bytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                logger.info(f"Evicted {os.path.basename(path)} from the decoded audio cache")
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    @staticmethod
+    def _open(path):
+        # Copy-on-write keeps the mapping zero-copy while giving torch.from_numpy the
+        # writable array it expects; nothing ever writes back to the file
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, DTYPE)
+        return np.memmap(path, dtype=DTYPE, mode='c')
+
+
+def get_cache():
+    """The configured cache, or None if it is disabled"""
+    max_mb = getattr(settings, 'WHISPER_PCM_CACHE_MB', 0)
+    if not max_mb:
+        return None
+    return PCMCache(getattr(settings, 'WHISPER_PCM_CACHE_DIR', os.path.join(settings.BASE_DIR, 'cache', 'pcm')), max_mb * 1024 * 1024)
+
+
+def cached_audio(transcript, decode=True):
+    """
+    The transcript's decoded audio from the cache, decoding it on a miss
+    unless ``decode`` is False.
+
+    Returns None when the cache is disabled, the upload has no content hash or
+    (without ``decode``) the entry is missing; callers then decode the file
+    themselves.
+    """
+    cache = get_cache()
+    if cache is None or not transcript.content_hash:
+        return None
+    if not decode:
+        return cache.get(transcript.content_hash)
+    return cache.get_or_decode(transcript.content_hash, transcript.file.path)
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .models import Transcript, TranscriptSegment
+import threading
+import time
+
+
+class SegmentFlusher:
+    """
+    Persists segments in batches while a transcription is still running.
+
+    Segments are buffered and written with one bulk insert once either
+    ``max_segments`` are pending or ``max_seconds`` have passed since the last
+    write, together with the partial ``raw_text`` and the ``decoded_until``
+    timestamp. The final result replaces all of this when the task completes.
+
+    Used as a context manager, a background thread also flushes pending
+    segments every ``max_seconds``, so they do not wait for the next window
+    to be decoded.
+    """
+
+    def __init__(self, transcript, max_segments=None, max_seconds=None, clock=time.monotonic):
+        self.transcript = transcript
+        self.max_segments = max_segments or getattr(settings, 'WHISPER_FLUSH_SEGMENTS', 50)
+        self.max_seconds = max_seconds if max_seconds is not None else getattr(settings, 'WHISPER_FLUSH_SECONDS', 5)
+        self.clock = clock
+        self.pending = []
+        self.text = ''
+        self.index = 0
+        self.decoded_until = None
+        self.last_flush = clock()
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        # With no interval every add flushes anyway
+        if self.max_seconds > 0:
+            self._thread = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _flush_periodically(self):
+        try:
+            while not self._stop.wait(self.max_seconds):
+                with self._lock:
+                    if self.pending:
+                        self.flush()
+        finally:
+            # The thread has its own database connection
+            connection.close()
+
+    def add(self, segments, decoded_until):
+        with self._lock:
+            self.pending.extend(segments)
+            self.decoded_until = decoded_until
+
+            if len(self.pending) >= self.max_segments or self.clock() - self.last_flush >= self.max_seconds:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self.index == 0:
+            # Drop whatever a previous attempt left behind
+            TranscriptSegment.objects.filter(transcript=self.transcript).delete()
+
+        TranscriptSegment.objects.bulk_create([
+            TranscriptSegment.from_whisper(self.transcript, self.index + offset, segment)
+            for offset, segment in enumerate(self.pending)
+        ])
+        self.index += len(self.pending)
+        self.text += ''.join(segment.get('text', '') for segment in self.pending)
+        self.pending = []
+        self.last_flush = self.clock()
+
+        Transcript.objects.filter(id=self.transcript.id).update(
+            raw_text=self.text,
+            decoded_until=self.decoded_until,
+            updated_at=timezone.now(),
+        )
@@ -0,0 +1,72 @@
+"""
+Selective re-decoding of low-confidence passages.
+
+A few mumbled passages do not justify re-running a whole recording with a
+bigger model. After a transcript is completed, segments that Whisper itself
+was unsure about (speech, by ``no_speech_prob``, but with a low
+``avg_logprob``) are grouped into regions, and only those time ranges are
+decoded again with a larger model and/or beam search. A region's new
+segments replace the old ones only if they score better, and the
+transcript's text and confidence are then recomputed from the segments.
+"""
+from .chunking import offset_result
+
+
+def is_weak(segment, logprob_threshold, no_speech_threshold):
+    logprob = segment.get('avg_logprob')
+    no_speech = segment.get('no_speech_prob') or 0.0
+    return logprob is not None and logprob < logprob_threshold and no_speech < no_speech_threshold
+
+
+def weak_regions(segments, logprob_threshold, no_speech_threshold, merge_gap=1.0):
+    """
+    Time ranges to decode again, as ``{'start', 'end', 'first', 'last'}`` with
+    the indices of the first and last segment they replace. Weak segments
+    closer than ``merge_gap`` seconds (or adjacent) share a region, so every
+    region is decoded with its full context.
+    """
+    regions = []
+    for index, segment in enumerate(segments):
+        if not is_weak(segment, logprob_threshold, no_speech_threshold):
+            continue
+        previous = regions[-1] if regions else None
+        if previous and (previous['last'] == index - 1 or segment['start'] - previous['end'] <= merge_gap):
+            previous['end'] = segment['end']
+            previous['last'] = index
+        else:
+            regions.append({'start': segment['start'], 'end': segment['end'], 'first': index, 'last': index})
+    return regions
+
+
+def mean_logprob(segments):
+    scores = [segment['avg_logprob'] for segment in segments if segment.get('avg_logprob') is not None]
+    return sum(scores) / len(scores) if scores else None
+
+
+def redecode_regions(segments, regions, decode):
+    """
+    Replace the segments of each region with ``decode(start, end)``'s
+    segments (a Whisper result for that range, on the range's own timeline)
+    when they score better on average.
+
+    Returns the new segment list and the regions that were replaced.
+    """
+    spliced, improved, position = [], [], 0
+    for region in regions:
+        spliced.extend(segments[position:region['first']])
+        old = segments[region['first']:region['last'] + 1]
+        position = region['last'] + 1
+
+        new = [
+            segment for segment in offset_result(region, decode(region['start'], region['end']))['segments']
+            if segment.get('text', '').strip()
+        ]
+        old_score, new_score = mean_logprob(old), mean_logprob(new)
+        if new and new_score is not None and (old_score is None or new_score > old_score):
+            spliced.extend(new)
+            improved.append(region)
+        else:
+            spliced.extend(old)
+
+    spliced.extend(segments[position:])
+    return spliced, improved
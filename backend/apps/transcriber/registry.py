@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from django.conf import settings
+from .engines import get_engine
+import threading
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def _load_model(name, device, **options):
+    # Engines import torch/whisper on first load, so only worker processes pay for them
+    return get_engine().load(name, device, **options)
+
+
+def quantization_for(name, device):
+    """
+    'int8' if ``name`` should be loaded quantized on ``device``, else None.
+
+    ``WHISPER_INT8_MODELS`` lists model sizes (which cover their .en
+    variants), tiers of ``WHISPER_TIER_MODELS`` (which stand for that tier's
+    model) or 'all'. Quantization only applies on CPU.
+    """
+    entries = getattr(settings, 'WHISPER_INT8_MODELS', ())
+    if device != 'cpu' or not entries:
+        return None
+    if 'all' in entries:
+        return 'int8'
+
+    tier_models = getattr(settings, 'WHISPER_TIER_MODELS', {})
+    names = {tier_models.get(entry, entry) for entry in entries}
+    return 'int8' if name in names or name.split('.')[0] in names else None
+
+
+def _model_nbytes(model):
+    """Approximate in-memory size of a model's weights in bytes, as estimated by its engine"""
+    return get_engine().model_nbytes(model)
+
+
+class ModelRegistry:
+    """
+    Process-level cache of loaded Whisper models.
+
+    Models are loaded lazily on first use and kept for the lifetime of the
+    worker process. Entries are keyed by (model name, device, compute options)
+    and the least recently used ones are evicted once the combined weight size
+    exceeds the configured memory budget. The most recently requested model is
+    never evicted, even if it alone is larger than the budget.
+    """
+
+    def __init__(self, memory_budget=None, loader=None):
+        self._memory_budget = memory_budget
+        self._loader = loader or _load_model
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def memory_budget(self):
+        if self._memory_budget is not None:
+            return self._memory_budget
+        return getattr(settings, 'WHISPER_MODEL_CACHE_MB', 4096) * 1024 * 1024
+
+    @staticmethod
+    def make_key(name, device, **options):
+        return (name, device, tuple(sorted(options.items())))
+
+    def get(self, name, device, **options):
+        key = self.make_key(name, device, **options)
+
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+
+            logger.info(f"Loading Whisper model {name} on {device}")
+            model = self._loader(name, device, **options)
+            self._models[key] = (model, _model_nbytes(model))
+            self._evict()
+            return model
+
+    def _evict(self):
+        while len(self._models) > 1 and self.total_bytes > self.memory_budget:
+            key, _ = self._models.popitem(last=False)
+            logger.info(f"Evicting Whisper model {key[0]} on {key[1]} from cache")
+
+    @property
+    def total_bytes(self):
+        return sum(size for _, size in self._models.values())
+
+    def keys(self):
+        return list(self._models.keys())
+
+    def __contains__(self, key):
+        return key in self._models
+
+    def __len__(self):
+        return len(self._models)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def reset_lock(self):
+        """Replace the lock in a forked child, where a thread of the parent may have held it"""
+        self._lock = threading.Lock()
+
+
+registry = ModelRegistry()
+# A warm-up that timed out may still be loading a model in the parent when the pool forks
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=registry.reset_lock)
+
+
+def get_model(name=None, device=None, **options):
+    """
+    Return a cached Whisper model, loading it on first use.
+
+    Models selected by ``WHISPER_INT8_MODELS`` are quantized unless the
+    caller passes ``quantize`` itself (None for the fp32 model).
+    """
+    name = name or getattr(settings, 'WHISPER_MODEL', 'base')
+    device = device or getattr(settings, 'WHISPER_DEVICE', 'cpu')
+    quantize = options.pop('quantize', quantization_for(name, device))
+    if quantize:
+        options['quantize'] = quantize
+    return registry.get(name, device, **options)
@@ -1,6 +1,10 @@
 from rest_framework import serializers
 from django.conf import settings
-from .models import Transcript
+from django.core.files.storage import default_storage
+from .models import Transcript, TranscriptSegment
+from .storage import store_content_addressed, release_blob
+from .ingest import probe_duration
+from .tiers import default_model
 import os
 
 class TranscriptUploadSerializer(serializers.ModelSerializer):
@@ -54,29 +58,51 @@ class TranscriptUploadSerializer(serializers.ModelSerializer):
         if not validated_data.get('title'):
             validated_data['title'] = os.path.splitext(file.name)[0]
         
-        return super().create(validated_data)
+        validated_data['file'], validated_data['content_hash'] = store_content_addressed(file)
+        validated_data['duration'] = probe_duration(default_storage.path(validated_data['file']))
+        transcript = super().create(validated_data)
+
+        duplicate = transcript.find_duplicate(default_model(transcript.user))
+        if duplicate:
+            # Share the earlier upload's source, which is only the audio track for videos
+            uploaded = transcript.file.name
+            transcript.file.name = duplicate.file.name
+            transcript.original_file = duplicate.original_file
+            transcript.copy_results_from(duplicate)
+            if uploaded != transcript.file.name:
+                release_blob(uploaded)
+
+        return transcript
 
 class TranscriptSerializer(serializers.ModelSerializer):
     file_url = serializers.SerializerMethodField()
     file_extension = serializers.ReadOnlyField()
     is_audio = serializers.ReadOnlyField()
     is_video = serializers.ReadOnlyField()
+    eta_seconds = serializers.SerializerMethodField()
     
     class Meta:
         model = Transcript
         fields = [
             'id', 'title', 'file_name', 'file_size', 'file_type', 'file_url',
             'file_extension', 'is_audio', 'is_video', 'status', 'raw_text',
-            'duration', 'language', 'confidence', 'error_message',
+            'duration', 'language', 'confidence', 'error_message', 'decoded_until',
+            'model_used', 'upgrade_model', 'draft_text', 'draft_model', 'refinement',
+            'similar_transcript', 'similar_offset', 'eta_seconds',
             'created_at', 'updated_at', 'completed_at'
         ]
         read_only_fields = [
             'id', 'file_name', 'file_size', 'file_type', 'file_url',
             'file_extension', 'is_audio', 'is_video', 'status', 'raw_text',
-            'duration', 'language', 'confidence', 'error_message',
+            'duration', 'language', 'confidence', 'error_message', 'decoded_until',
+            'model_used', 'upgrade_model', 'draft_text', 'draft_model', 'refinement',
+            'similar_transcript', 'similar_offset', 'eta_seconds',
             'created_at', 'updated_at', 'completed_at'
         ]
     
+    def get_eta_seconds(self, obj):
+        return obj.estimated_seconds_remaining()
+
     def get_file_url(self, obj):
         if obj.file:
             request = self.context.get('request')
@@ -93,7 +119,13 @@ class TranscriptListSerializer(serializers.ModelSerializer):
         model = Transcript
         fields = [
             'id', 'title', 'file_name', 'file_size', 'file_type',
-            'file_extension', 'is_audio', 'is_video', 'status',
+            'file_extension', 'is_audio', 'is_video', 'status', 'refinement',
             'duration', 'language', 'created_at', 'updated_at', 'completed_at'
         ]
         read_only_fields = fields
+
+class TranscriptSegmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TranscriptSegment
+        fields = ['index', 'start', 'end', 'text', 'avg_logprob', 'no_speech_prob']
+        read_only_fields = fields
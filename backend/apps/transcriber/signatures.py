@@ -0,0 +1,34 @@
+"""
+Lightweight task signatures for the web tier.
+
+Views enqueue transcription jobs through these helpers instead of importing
+``tasks.py``, which pulls in the Whisper/torch stack on the worker side.
+"""
+from celery import signature
+from django.conf import settings
+
+TRANSCRIBE_AUDIO_TASK = 'apps.transcriber.tasks.transcribe_audio_task'
+TRANSCRIBE_BATCH_TASK = 'apps.transcriber.tasks.transcribe_batch_task'
+
+
+def transcription_queue(duration):
+    """
+    Queue for a transcription job of the given length.
+
+    Short recordings get their own queue so they never wait behind hours-long
+    ones; recordings of unknown length are treated as long.
+    """
+    if duration is not None and duration < getattr(settings, 'WHISPER_LONG_MIN_SECONDS', 600):
+        return getattr(settings, 'WHISPER_SHORT_QUEUE', 'transcribe.short')
+    return getattr(settings, 'WHISPER_LONG_QUEUE', 'transcribe.long')
+
+
+def transcribe_audio_signature(transcript_id, ignore_similar=False, model_name=None, **options):
+    kwargs = {'ignore_similar': True} if ignore_similar else {}
+    if model_name:
+        kwargs['model_name'] = model_name
+    return signature(TRANSCRIBE_AUDIO_TASK, args=(transcript_id,), kwargs=kwargs, **options)
+
+
+def transcribe_batch_signature(**options):
+    return signature(TRANSCRIBE_BATCH_TASK, **options)
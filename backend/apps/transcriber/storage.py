@@ -0,0 +1,107 @@
+"""
+Content-addressed storage for uploaded media.
+
+Uploads are written once under ``transcriber/blobs/<aa>/<sha256><ext>`` and
+every transcript of the same content points at that one file. Assumes the
+default storage is the local filesystem under MEDIA_ROOT.
+"""
+from django.core.files.storage import default_storage
+from django.db import models
+import hashlib
+import tempfile
+import shutil
+import os
+
+BLOB_PREFIX = 'transcriber/blobs'
+
+
+def blob_name(digest, extension):
+    return f'{BLOB_PREFIX}/{digest[:2]}/{digest}{extension.lower()}'
+
+
+def staging_directory():
+    """Scratch directory on the same filesystem as the blobs, so renames are atomic"""
+    path = default_storage.path(f'{BLOB_PREFIX}/tmp')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def new_staging_path(extension=''):
+    """Path of a new, empty file in the staging directory"""
+    with tempfile.NamedTemporaryFile(dir=staging_directory(), suffix=extension, delete=False) as staging:
+        return staging.name
+
+
+def store_content_addressed(uploaded_file):
+    """
+    Write an upload to content-addressed storage, hashing it on the way.
+
+    The file is streamed chunk by chunk into a temporary file next to the
+    blobs while its SHA-256 is computed, then atomically moved into place.
+    If a blob with the same digest already exists the copy is discarded.
+    Returns ``(storage_name, sha256_hex)``.
+    """
+    hasher = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=staging_directory(), delete=False) as staging:
+        for chunk in uploaded_file.chunks():
+            hasher.update(chunk)
+            staging.write(chunk)
+
+    digest = hasher.hexdigest()
+    return _commit_blob(staging.name, digest, os.path.splitext(uploaded_file.name)[1]), digest
+
+
+def store_staged_file(staging_path, extension):
+    """Move a file written to ``staging_directory()`` into content-addressed storage"""
+    hasher = hashlib.sha256()
+    with open(staging_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(chunk)
+
+    digest = hasher.hexdigest()
+    return _commit_blob(staging_path, digest, extension), digest
+
+
+def _commit_blob(staging_path, digest, extension):
+    name = blob_name(digest, extension)
+    path = default_storage.path(name)
+
+    if os.path.exists(path):
+        os.remove(staging_path)
+    else:
+        os.chmod(staging_path, default_storage.file_permissions_mode or 0o644)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(staging_path, path)
+
+    return name
+
+
+def is_referenced(name):
+    """Whether any transcript still uses a stored file, as its source or its kept original"""
+    from .models import Transcript
+
+    return Transcript.objects.filter(models.Q(file=name) | models.Q(original_file=name)).exists()
+
+
+def release_blob(name, archive_dir=None):
+    """
+    Delete (or, with ``archive_dir``, move out of MEDIA_ROOT) a stored file
+    that no transcript references any more.
+
+    Returns the archived path, or '' if the file was deleted or is still in use.
+    """
+    if not name or is_referenced(name):
+        return ''
+
+    path = default_storage.path(name)
+    if not os.path.exists(path):
+        return ''
+
+    if archive_dir:
+        archived = os.path.join(str(archive_dir), name)
+        os.makedirs(os.path.dirname(archived), exist_ok=True)
+        shutil.move(path, archived)
+        return archived
+
+    os.remove(path)
+    return ''
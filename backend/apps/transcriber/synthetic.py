@@ -0,0 +1,68 @@
+"""
+Synthetic recordings for benchmarks.
+
+Files are rendered by ffmpeg's lavfi sources or generated with NumPy, so no
+audio assets have to be shipped or downloaded.
+"""
+from .chunking import SAMPLE_RATE
+import numpy as np
+import subprocess
+import os
+
+# A 220 Hz tone that is silent for the first 3 seconds of every 10
+DEFAULT_EXPRESSION = '0.5*sin(2*PI*220*t)*gt(mod(t,10),3)'
+
+
+def write_synthetic_audio(directory, seconds, expression=DEFAULT_EXPRESSION, extension='flac'):
+    """Render ``seconds`` of mono audio into ``directory`` and return its path"""
+    path = os.path.join(directory, f'synthetic_{int(seconds)}s.{extension}')
+    cmd = [
+        'ffmpeg', '-nostdin', '-y', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f"aevalsrc='{expression}':s={SAMPLE_RATE}:d={seconds}",
+        '-ac', '1', path,
+    ]
+    subprocess.run(cmd, check=True)
+    return path
+
+
+def speech_like(seconds, rng):
+    """
+    Speech-band tones with independent random envelopes under a syllable-rate
+    on/off pattern: loud, band-limited and strongly modulated, like speech.
+    """
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    knots = np.arange(0, seconds + 1, 0.125)
+    syllables = np.interp(t, knots, (rng.random(len(knots)) > 0.35) * rng.uniform(0.3, 1, len(knots)))
+    audio = np.zeros(len(t), np.float32)
+    for base in np.geomspace(250, 2500, 8):
+        envelope = np.interp(t, knots, rng.random(len(knots)) ** 2)
+        carrier = base * rng.uniform(0.9, 1.1) * t + 30 * np.sin(2 * np.pi * rng.uniform(0.5, 4) * t)
+        audio += (envelope * np.sin(2 * np.pi * carrier)).astype(np.float32)
+    return (audio * syllables / 8).astype(np.float32)
+
+
+def music_like(seconds):
+    """A sustained chord with a slow swell"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    chord = sum(np.sin(2 * np.pi * f * t) for f in (261.6, 329.6, 392.0, 523.3))
+    return (0.1 * chord * (0.8 + 0.2 * np.sin(2 * np.pi * 0.25 * t))).astype(np.float32)
+
+
+def synthetic_lecture(seconds, seed=0, intro_seconds=30, noise=0.003):
+    """
+    A recording with pre-roll music followed by talk and pauses of random
+    length. Returns the audio and the ``(start, end)`` seconds of its speech.
+    """
+    rng = np.random.default_rng(seed)
+    parts, spans, position = [music_like(min(intro_seconds, seconds))], [], min(intro_seconds, seconds)
+    while position < seconds:
+        talk = min(rng.uniform(20, 60), seconds - position)
+        parts.append(speech_like(talk, rng))
+        spans.append((position, position + talk))
+        position += talk
+        pause = min(rng.uniform(5, 30), seconds - position)
+        parts.append(np.zeros(int(pause * SAMPLE_RATE), np.float32))
+        position += pause
+
+    audio = np.concatenate(parts)
+    return (audio + rng.normal(0, noise, len(audio)).astype(np.float32)), spans
@@ -1,49 +1,109 @@
-from celery import shared_task
+from celery import shared_task, chord
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
-from .models import Transcript
-import whisper
+from .models import Transcript, TranscriptSegment, AudioFingerprintKey
+from .registry import get_model
+from .progress import SegmentFlusher
+from .chunking import (
+    SAMPLE_RATE, load_audio, load_audio_range, stream_audio, iter_blocks, stream_chunks, slice_chunk,
+    offset_result, stitch_results, transcribe_chunked, transcribe_streaming,
+)
+from .pcm_cache import cached_audio
+from .ingest import strip_video, probe_duration
+from .compaction import compact_audio
+from .batching import claim_batch
+from .engines import get_engine
+from .signatures import transcription_queue, transcribe_audio_signature
+from .tiers import choose_model, model_rank, upgrade_target
+from .language import PROBE_SECONDS, probe_language, route_model
+from .redecode import weak_regions, redecode_regions, mean_logprob
+from .vad import SpeechTimeline
+from . import fingerprint
+from . import worker  # connects the worker lifecycle signal handlers
+from collections import defaultdict
+from contextlib import nullcontext
+import numpy as np
 import os
 import logging
 
 logger = logging.getLogger(__name__)
 
 @shared_task(bind=True)
-def transcribe_audio_task(self, transcript_id):
+def transcribe_audio_task(self, transcript_id, ignore_similar=False, model_name=None):
+    """
+    Transcribe one recording, with ``model_name`` or else the model the tier
+    policy picks for it (see tiers.py).
+    """
     try:
         transcript = Transcript.objects.get(id=transcript_id)
         transcript.status = 'processing'
+        transcript.decoded_until = None
         transcript.save()
         
         logger.info(f"Starting transcription for transcript {transcript_id}")
         
-        model_name = getattr(settings, 'WHISPER_MODEL', 'base')
+        explicit_model = model_name is not None
+        if not explicit_model:
+            model_name, transcript.upgrade_model = choose_model(transcript)
+        elif transcript.upgrade_model and model_rank(model_name) >= model_rank(transcript.upgrade_model):
+            transcript.upgrade_model = ''
+        if transcript.is_draft:
+            # A full run replaces the draft; an upgrade run is the refinement that was skipped
+            transcript.refinement = 'done' if explicit_model else ''
         device = getattr(settings, 'WHISPER_DEVICE', 'cpu')
-        
-        model = whisper.load_model(model_name, device=device)
+        transcript.model_used = model_name
+        logger.info(f"Using Whisper model {model_name} for transcript {transcript_id}")
         
         file_path = transcript.file.path
         
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        result = model.transcribe(file_path)
+        # Done here rather than at upload, see ingest.py
+        try:
+            if strip_video(transcript):
+                file_path = transcript.file.path
+        except Exception as e:
+            logger.warning(f"Audio extraction failed for transcript {transcript_id}, using the original file: {str(e)}")
+        
+        fan_out = False
+        if getattr(settings, 'WHISPER_FANOUT', False):
+            # Recordings of unknown length are decoded here, which works for any length
+            duration = transcript.duration or probe_duration(file_path)
+            fan_out = duration is not None and duration >= getattr(settings, 'WHISPER_FANOUT_MIN_SECONDS', 1800)
         
-        transcript.raw_text = result['text']
-        transcript.language = result.get('language', '')
+        # Decoded once into the PCM cache (when enabled) and memory-mapped by every later attempt.
+        # Not filled before a fan-out, whose chunk tasks decode their own ranges on any host.
+        audio = cached_audio(transcript, decode=not fan_out)
+        source = audio if audio is not None else file_path
         
-        if 'segments' in result and result['segments']:
-            confidences = [seg.get('avg_logprob', 0) for seg in result['segments'] if 'avg_logprob' in seg]
-            if confidences:
-                transcript.confidence = sum(confidences) / len(confidences)
+        if getattr(settings, 'WHISPER_LANGUAGE_ROUTING', False):
+            model_name = _route_by_language(
+                transcript, model_name, device,
+                lambda: audio if audio is not None else load_audio_range(file_path, 0, PROBE_SECONDS),
+            )
+            transcript.model_used = model_name
         
-        if 'segments' in result and result['segments']:
-            last_segment = result['segments'][-1]
-            transcript.duration = last_segment.get('end', 0)
+        if getattr(settings, 'WHISPER_TWO_PASS', False) and not explicit_model:
+            model_name = _plan_draft(transcript, model_name)
         
-        transcript.status = 'completed'
-        transcript.completed_at = timezone.now()
-        transcript.save()
+        if getattr(settings, 'WHISPER_SIMILAR_ACTION', 'off') != 'off' and not ignore_similar:
+            match = _find_similar(transcript, source, model_name)
+            if match:
+                return _handle_similar(transcript, *match)
+        
+        if fan_out:
+            return _fan_out(transcript, source, model_name, device)
+        
+        flusher, on_progress = nullcontext(), None
+        if getattr(settings, 'WHISPER_INCREMENTAL', False):
+            flusher = SegmentFlusher(transcript)
+            on_progress = flusher.add
+
+        with flusher:
+            result = _transcribe(source, model_name, device, on_progress=on_progress)
+        _apply_result(transcript, result)
         
         logger.info(f"Transcription completed for transcript {transcript_id}")
         
@@ -61,17 +121,547 @@ def transcribe_audio_task(self, transcript_id):
         
     except Exception as e:
         logger.error(f"Transcription failed for transcript {transcript_id}: {str(e)}")
-        
-        try:
-            transcript = Transcript.objects.get(id=transcript_id)
-            transcript.status = 'failed'
-            transcript.error_message = str(e)
-            transcript.save()
-        except Transcript.DoesNotExist:
-            pass
+        _mark_failed(transcript_id, e)
         
         return {
             'transcript_id': transcript_id,
             'status': 'failed',
             'error': str(e)
         }
+
+@shared_task(bind=True)
+def transcribe_batch_task(self):
+    """
+    Transcribe a batch of short clips that are waiting for one.
+
+    Every short upload enqueues one of these, so a task that finds the clips
+    already taken by an earlier batch simply has nothing to do.
+    """
+    batch = claim_batch()
+    if not batch:
+        return {'status': 'empty', 'transcripts': []}
+
+    device = getattr(settings, 'WHISPER_DEVICE', 'cpu')
+
+    # Clips can get different models from the tier policy; each model decodes its own sub-batch
+    groups = defaultdict(list)
+    for transcript in batch:
+        transcript.model_used, transcript.upgrade_model = choose_model(transcript)
+        try:
+            audio = cached_audio(transcript)
+            clip = audio if audio is not None else load_audio(transcript.file.path)
+            if getattr(settings, 'WHISPER_LANGUAGE_ROUTING', False):
+                transcript.model_used = _route_by_language(transcript, transcript.model_used, device, lambda: clip)
+            groups[transcript.model_used].append((transcript, clip))
+        except Exception as e:
+            logger.error(f"Transcription failed for transcript {transcript.id}: {str(e)}")
+            _mark_failed(transcript.id, e)
+
+    done, failed, errors = [], [], []
+    for model_name, group in groups.items():
+        ready = [transcript for transcript, _ in group]
+        logger.info(f"Transcribing a batch of {len(ready)} clips with {model_name}")
+
+        try:
+            results = get_engine().transcribe_batch(get_model(model_name, device), [clip for _, clip in group])
+        except Exception as e:
+            logger.error(f"Batch transcription failed for transcripts {[t.id for t in ready]}: {str(e)}")
+            for transcript in ready:
+                _mark_failed(transcript.id, e)
+            failed += ready
+            errors.append(str(e))
+            continue
+
+        for transcript, result in zip(ready, results):
+            _apply_result(transcript, result)
+        done += ready
+
+    if failed and not done:
+        return {'status': 'failed', 'transcripts': [t.id for t in failed], 'error': '; '.join(errors)}
+    return {'status': 'completed', 'transcripts': [t.id for t in done]}
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3, acks_late=True)
+def transcribe_chunk_task(self, transcript_id, chunk, model_name, device):
+    """
+    Transcribe one time range of a transcript's file.
+
+    The task has no side effects besides its return value, so it is safe to
+    retry or to redeliver after a worker crash.
+    """
+    transcript = Transcript.objects.get(id=transcript_id)
+    audio = cached_audio(transcript, decode=False)
+    if audio is not None:
+        audio = slice_chunk(audio, chunk)
+    else:
+        audio = load_audio_range(transcript.file.path, chunk['start'], chunk['end'])
+
+    logger.info(f"Transcribing chunk {chunk['index']} of transcript {transcript_id}")
+
+    result = get_model(model_name, device).transcribe(audio)
+    return offset_result(chunk, result)
+
+@shared_task(bind=True)
+def merge_transcript_chunks_task(self, chunk_results, transcript_id):
+    """Chord callback that stitches the chunk results and saves the transcript once"""
+    transcript = Transcript.objects.get(id=transcript_id)
+    if transcript.status == 'completed':
+        logger.info(f"Transcript {transcript_id} already merged, skipping")
+        return {'transcript_id': transcript_id, 'status': 'completed'}
+
+    _apply_result(transcript, stitch_results(chunk_results))
+
+    logger.info(f"Merged {len(chunk_results)} chunks for transcript {transcript_id}")
+
+    return {
+        'transcript_id': transcript_id,
+        'status': 'completed',
+        'text_length': len(transcript.raw_text),
+        'language': transcript.language,
+        'duration': transcript.duration
+    }
+
+@shared_task(bind=True)
+def refine_transcript_task(self, transcript_id):
+    """
+    Second pass of a two-pass transcription: replace the draft with the result
+    of the model in ``upgrade_model``. Skipped while the backlog is above
+    WHISPER_REFINE_MAX_BACKLOG_SECONDS; the transcript then keeps its draft
+    and is left to the upgrade path.
+    """
+    try:
+        transcript = Transcript.objects.get(id=transcript_id)
+    except Transcript.DoesNotExist:
+        logger.error(f"Transcript {transcript_id} not found")
+        return {'error': f'Transcript {transcript_id} not found'}
+
+    if transcript.status != 'completed' or transcript.refinement != 'pending':
+        return {'transcript_id': transcript_id, 'status': 'stale'}
+
+    backlog = Transcript.queued_audio_seconds()
+    if backlog > getattr(settings, 'WHISPER_REFINE_MAX_BACKLOG_SECONDS', 1800):
+        logger.info(f"Skipping refinement of transcript {transcript_id}, {backlog:.0f}s of audio queued")
+        Transcript.objects.filter(id=transcript_id).update(refinement='skipped')
+        return {'transcript_id': transcript_id, 'status': 'skipped'}
+
+    model_name = transcript.upgrade_model
+    logger.info(f"Refining transcript {transcript_id} with {model_name}")
+    try:
+        audio = cached_audio(transcript)
+        source = audio if audio is not None else transcript.file.path
+        result = _transcribe(source, model_name, getattr(settings, 'WHISPER_DEVICE', 'cpu'))
+    except Exception as e:
+        logger.error(f"Refinement failed for transcript {transcript_id}, keeping the draft: {str(e)}")
+        Transcript.objects.filter(id=transcript_id).update(refinement='failed')
+        return {'transcript_id': transcript_id, 'status': 'failed', 'error': str(e)}
+
+    transcript.refresh_from_db()
+    if transcript.status != 'completed' or transcript.refinement != 'pending':
+        return {'transcript_id': transcript_id, 'status': 'stale'}  # re-run meanwhile
+
+    transcript.model_used = model_name
+    transcript.upgrade_model = upgrade_target(transcript.user, model_name)
+    transcript.refinement = 'done'
+    _apply_result(transcript, result)
+
+    logger.info(f"Refined transcript {transcript_id} with {model_name}")
+    return {'transcript_id': transcript_id, 'status': 'completed', 'text_length': len(transcript.raw_text)}
+
+@shared_task(bind=True)
+def redecode_weak_segments_task(self, transcript_id):
+    """
+    Decode the low-confidence regions of a completed transcript again with
+    WHISPER_REDECODE_MODEL (or its own model) and beam search, and splice in
+    the better text (see redecode.py).
+
+    The result reports the fraction of the audio decoded again; a full re-run
+    would decode all of it, so the compute saved is the rest.
+    """
+    try:
+        transcript = Transcript.objects.get(id=transcript_id)
+    except Transcript.DoesNotExist:
+        logger.error(f"Transcript {transcript_id} not found")
+        return {'error': f'Transcript {transcript_id} not found'}
+
+    if transcript.status != 'completed' or transcript.is_draft:
+        return {'transcript_id': transcript_id, 'status': 'stale'}
+
+    segments = list(transcript.segments.order_by('index').values('start', 'end', 'text', 'avg_logprob', 'no_speech_prob'))
+    # Stored text is stripped; Whisper's segments start with a space, which joining relies on
+    for segment in segments:
+        segment['text'] = f" {segment['text']}"
+    regions = weak_regions(
+        segments,
+        getattr(settings, 'WHISPER_REDECODE_LOGPROB_THRESHOLD', -1.0),
+        getattr(settings, 'WHISPER_REDECODE_NO_SPEECH_THRESHOLD', 0.6),
+        getattr(settings, 'WHISPER_REDECODE_MERGE_GAP_SECONDS', 1.0),
+    )
+    duration = transcript.duration or (segments[-1]['end'] if segments else 0.0)
+    redecoded = sum(region['end'] - region['start'] for region in regions)
+    fraction = redecoded / duration if duration else 0.0
+    report = {
+        'transcript_id': transcript_id,
+        'regions': len(regions),
+        'redecoded_seconds': round(redecoded, 2),
+        'redecoded_fraction': round(fraction, 4),
+        'compute_saved': round(1 - fraction, 4),
+    }
+
+    if not regions:
+        return dict(report, status='confident')
+    if fraction > getattr(settings, 'WHISPER_REDECODE_MAX_FRACTION', 0.5):
+        # Mostly weak: re-decoding piecemeal would cost about as much as a full re-run
+        logger.info(f"Transcript {transcript_id} is {fraction:.0%} low-confidence, not re-decoding regions")
+        return dict(report, status='skipped')
+
+    model_name = getattr(settings, 'WHISPER_REDECODE_MODEL', '') or transcript.model_used or getattr(settings, 'WHISPER_MODEL', 'base')
+    if getattr(settings, 'WHISPER_LANGUAGE_ROUTING', False):
+        model_name = route_model(model_name, transcript.language)
+    model = get_model(model_name, getattr(settings, 'WHISPER_DEVICE', 'cpu'))
+    options = {
+        'beam_size': getattr(settings, 'WHISPER_REDECODE_BEAM_SIZE', 5),
+        'best_of': getattr(settings, 'WHISPER_REDECODE_BEAM_SIZE', 5),
+        'condition_on_previous_text': False,
+    }
+    if transcript.language:
+        options['language'] = transcript.language
+
+    audio = cached_audio(transcript, decode=False)
+
+    def decode(start, end):
+        region = {'start': start, 'end': end}
+        clip = slice_chunk(audio, region) if audio is not None else load_audio_range(transcript.file.path, start, end)
+        return model.transcribe(clip, **options)
+
+    try:
+        spliced, improved = redecode_regions(segments, regions, decode)
+    except Exception as e:
+        logger.error(f"Re-decoding failed for transcript {transcript_id}: {str(e)}")
+        return dict(report, status='failed', error=str(e))
+
+    with transaction.atomic():
+        current = Transcript.objects.select_for_update().get(id=transcript_id)
+        if current.status != 'completed' or current.completed_at != transcript.completed_at:
+            return dict(report, status='stale')  # re-run meanwhile
+        if improved:
+            current.raw_text = ''.join(segment['text'] for segment in spliced)
+            current.confidence = mean_logprob(spliced)
+            current.save(update_fields=['raw_text', 'confidence', 'updated_at'])
+            _save_segments(current, spliced)
+
+    logger.info(
+        f"Re-decoded {len(regions)} low-confidence regions ({fraction:.1%} of the audio) of transcript "
+        f"{transcript_id} with {model_name}, {len(improved)} improved"
+    )
+    return dict(report, status='completed', improved=len(improved), model=model_name)
+
+@shared_task
+def transcription_failed_task(request, exc, traceback, transcript_id):
+    """Error callback for a fanned-out transcription whose chunks could not all complete"""
+    logger.error(f"Transcription failed for transcript {transcript_id}: {str(exc)}")
+    _mark_failed(transcript_id, exc)
+
+@shared_task
+def compact_audio_task():
+    """Periodic re-encoding of completed transcripts' source files to Opus"""
+    result = compact_audio()
+    logger.info(
+        f"Compacted {result['compacted']} source files, saving {result['bytes_saved']} bytes "
+        f"({result['total_bytes_saved']} in total)"
+    )
+    return result
+
+@shared_task
+def upgrade_transcripts_task():
+    """Periodic re-run of transcripts that got a smaller model than their tier's"""
+    upgraded = upgrade_transcripts()
+    if upgraded:
+        logger.info(f"Queued {len(upgraded)} transcripts for a model upgrade")
+    return {'upgraded': upgraded}
+
+def upgrade_transcripts():
+    """
+    Queue upgrade runs while the backlog stays below WHISPER_UPGRADE_MAX_BACKLOG_SECONDS,
+    oldest transcripts first. Returns the ids queued.
+    """
+    headroom = getattr(settings, 'WHISPER_UPGRADE_MAX_BACKLOG_SECONDS', 600) - Transcript.queued_audio_seconds()
+    upgraded = []
+    candidates = (
+        Transcript.objects
+        .filter(status='completed', duration__isnull=False)
+        .exclude(upgrade_model='')
+        .exclude(refinement='pending')  # the refinement pass is still queued
+        .order_by('completed_at')
+    )
+    for transcript in candidates[:getattr(settings, 'WHISPER_UPGRADE_BATCH', 20)]:
+        if transcript.duration > headroom:
+            break
+        transcript.status = 'pending'
+        transcript.save(update_fields=['status', 'updated_at'])
+        transcribe_audio_signature(
+            transcript.id, ignore_similar=True, model_name=transcript.upgrade_model,
+            queue=transcription_queue(transcript.duration),
+        ).delay()
+        headroom -= transcript.duration
+        upgraded.append(transcript.id)
+    return upgraded
+
+def _fan_out(transcript, source, model_name, device):
+    """
+    Split a long recording into chunk subtasks spread across all transcription
+    workers. The chunk boundaries are planned while streaming the file, so the
+    recording is never decoded into memory as a whole.
+    """
+    blocks = iter_blocks(source) if isinstance(source, np.ndarray) else stream_audio(source)
+    chunks = [chunk for chunk, _ in stream_chunks(
+        blocks,
+        getattr(settings, 'WHISPER_CHUNK_SECONDS', 300),
+        getattr(settings, 'WHISPER_CHUNK_OVERLAP_SECONDS', 2),
+    )]
+    transcript.save(update_fields=['model_used', 'updated_at'])
+
+    queue = transcription_queue(transcript.duration)
+    header = [transcribe_chunk_task.s(transcript.id, chunk, model_name, device).set(queue=queue) for chunk in chunks]
+    callback = merge_transcript_chunks_task.s(transcript.id).set(queue=queue).on_error(
+        transcription_failed_task.s(transcript.id)
+    )
+    chord(header)(callback)
+
+    logger.info(f"Fanned out transcript {transcript.id} into {len(chunks)} chunks")
+
+    return {
+        'transcript_id': transcript.id,
+        'status': 'processing',
+        'chunks': len(chunks)
+    }
+
+def _find_similar(transcript, source, model_name):
+    """
+    Fingerprint the recording, index it, and look for an earlier transcript of
+    a near-duplicate made with the same model.
+
+    Returns ``(similar_transcript, offset_seconds)`` or None. Fingerprinting is
+    best-effort: any failure is logged and the file is transcribed as usual.
+    """
+    try:
+        blocks = iter_blocks(source) if isinstance(source, np.ndarray) else stream_audio(source)
+        phases = fingerprint.fingerprint_phases(blocks)
+        _, stored, voiced = phases[0]
+
+        transcript.fingerprint = fingerprint.to_bytes(stored)
+        transcript.duration = fingerprint.duration(stored)
+        with transaction.atomic():
+            transcript.save(update_fields=['fingerprint', 'duration', 'updated_at'])
+            AudioFingerprintKey.objects.filter(transcript=transcript).delete()
+            AudioFingerprintKey.objects.bulk_create([
+                AudioFingerprintKey(transcript=transcript, key=key, position=position)
+                for key, position in fingerprint.anchors(stored, voiced)
+            ], batch_size=1000)
+
+        candidates = (
+            Transcript.objects
+            .filter(status='completed', model_used=model_name, fingerprint__isnull=False)
+            .exclude(id=transcript.id)
+        )
+        if getattr(settings, 'WHISPER_SIMILAR_SCOPE', 'user') == 'user':
+            candidates = candidates.filter(user=transcript.user_id)
+
+        keys = sorted({key for _, fp, mask in phases for key, _ in fingerprint.anchors(fp, mask)})
+        rows = []
+        for start in range(0, len(keys), 500):
+            rows.extend(
+                AudioFingerprintKey.objects
+                .filter(key__in=keys[start:start + 500], transcript__in=candidates)
+                .values_list('transcript_id', 'key', 'position')
+            )
+
+        match = fingerprint.find_match(
+            phases,
+            rows,
+            lambda candidate: fingerprint.from_bytes(
+                Transcript.objects.values_list('fingerprint', flat=True).get(id=candidate)
+            ),
+            getattr(settings, 'WHISPER_SIMILAR_MAX_BER', 0.3),
+            getattr(settings, 'WHISPER_SIMILAR_MIN_COVERAGE', 0.9),
+        )
+    except Exception as e:
+        logger.warning(f"Fingerprinting failed for transcript {transcript.id}: {str(e)}")
+        return None
+
+    if not match:
+        return None
+
+    candidate, offset, ber = match
+    logger.info(f"Transcript {transcript.id} matches transcript {candidate} at {offset:+.2f}s (BER {ber:.3f})")
+    return Transcript.objects.get(id=candidate), offset
+
+def _handle_similar(transcript, similar, offset):
+    """Reuse or offer the results of an earlier near-duplicate transcript"""
+    transcript.similar_transcript = similar
+    transcript.similar_offset = offset
+
+    if getattr(settings, 'WHISPER_SIMILAR_ACTION', 'off') == 'auto':
+        transcript.copy_results_from(similar, offset=offset, duration=transcript.duration)
+        status = 'completed'
+    else:
+        # Parked until the client either reuses the match or asks to transcribe anyway
+        transcript.status = 'pending'
+        transcript.save()
+        status = 'pending'
+
+    return {
+        'transcript_id': transcript.id,
+        'status': status,
+        'similar_transcript': similar.id,
+        'similar_offset': offset,
+    }
+
+def _plan_draft(transcript, model_name):
+    """
+    Set a transcript up for a fast draft pass and return the draft model, or
+    return ``model_name`` if the draft model would not be faster. The final
+    model is kept in ``upgrade_model`` for the refinement pass.
+    """
+    draft = getattr(settings, 'WHISPER_DRAFT_MODEL', 'base')
+    if getattr(settings, 'WHISPER_LANGUAGE_ROUTING', False):
+        draft = route_model(draft, transcript.language)
+    if model_rank(draft) >= model_rank(model_name):
+        return model_name
+
+    transcript.refinement = 'pending'
+    transcript.draft_model = draft
+    transcript.draft_text = ''
+    transcript.upgrade_model = model_name
+    transcript.model_used = draft
+    return draft
+
+def _schedule_refinement(transcript):
+    """Keep the draft text and queue the refinement pass on the low-priority queue"""
+    transcript.draft_text = transcript.raw_text
+    transcript.save(update_fields=['draft_text', 'updated_at'])
+    refine_transcript_task.apply_async(
+        (transcript.id,), queue=getattr(settings, 'WHISPER_REFINE_QUEUE', 'transcribe.refine'),
+    )
+    logger.info(f"Draft of transcript {transcript.id} ready, refinement with {transcript.upgrade_model} queued")
+
+def _route_by_language(transcript, model_name, device, load_head):
+    """
+    English-only or multilingual checkpoint of ``model_name`` for the transcript,
+    probing its language on ``load_head()`` unless it is already known.
+    """
+    language = transcript.language
+    if not language:
+        try:
+            language = probe_language(transcript, load_head(), get_model, device)
+        except Exception as e:
+            logger.warning(f"Language probe failed for transcript {transcript.id}, using the multilingual model: {str(e)}")
+            language = ''
+    return route_model(model_name, language)
+
+def _transcribe(source, model_name, device, on_progress=None):
+    """
+    Run Whisper on a file path or decoded audio, on its speech only when
+    voice-activity detection is enabled (see vad.py).
+    """
+    if not getattr(settings, 'WHISPER_VAD', False):
+        return _decode(source, model_name, device, on_progress=on_progress)
+
+    audio = source if isinstance(source, np.ndarray) else load_audio(source)
+    timeline = SpeechTimeline.detect(
+        audio,
+        min_speech=getattr(settings, 'WHISPER_VAD_MIN_SPEECH_SECONDS', 0.25),
+        min_silence=getattr(settings, 'WHISPER_VAD_MIN_SILENCE_SECONDS', 1.0),
+        pad=getattr(settings, 'WHISPER_VAD_PAD_SECONDS', 0.2),
+        margin_db=getattr(settings, 'WHISPER_VAD_MARGIN_DB', 12.0),
+    )
+    logger.info(
+        f"Voice activity: {timeline.speech_seconds:.0f}s of speech in {len(timeline.spans)} spans, "
+        f"skipping {timeline.skipped_ratio:.0%} of {timeline.total_seconds:.0f}s"
+    )
+    if not timeline.spans:
+        return {'text': '', 'language': '', 'segments': []}
+    if timeline.skipped_ratio < getattr(settings, 'WHISPER_VAD_MIN_SKIP_RATIO', 0.05):
+        return _decode(audio, model_name, device, on_progress=on_progress)
+
+    result = _decode(timeline.compact(audio), model_name, device, on_progress=timeline.wrap_progress(on_progress))
+    return timeline.restore(result)
+
+def _decode(source, model_name, device, on_progress=None):
+    """
+    Run Whisper on a file path or decoded audio, either streaming the file in
+    bounded-memory windows or splitting long recordings across all cores when
+    those modes are enabled.
+
+    Partial results are only reported through ``on_progress`` by the windowed
+    paths, so asking for progress implies streaming unless decoded audio can
+    go to the chunked path instead. Progress comes once per window, so the
+    windows are then at most WHISPER_PROGRESS_WINDOW_SECONDS long, Whisper's
+    own 30 s by default.
+    """
+    chunked = getattr(settings, 'WHISPER_CHUNKED', False)
+    streaming = getattr(settings, 'WHISPER_STREAMING', False) or on_progress is not None
+    if streaming and not (chunked and isinstance(source, np.ndarray)):
+        window_seconds = getattr(settings, 'WHISPER_STREAM_WINDOW_SECONDS', 300)
+        if on_progress is not None:
+            window_seconds = min(window_seconds, getattr(settings, 'WHISPER_PROGRESS_WINDOW_SECONDS', 30))
+        return transcribe_streaming(
+            source,
+            get_model(model_name, device),
+            window_seconds,
+            getattr(settings, 'WHISPER_CHUNK_OVERLAP_SECONDS', 2),
+            on_progress=on_progress,
+        )
+
+    if not chunked:
+        return get_model(model_name, device).transcribe(source)
+
+    audio = source if isinstance(source, np.ndarray) else load_audio(source)
+    if len(audio) / SAMPLE_RATE < getattr(settings, 'WHISPER_CHUNK_MIN_SECONDS', 600):
+        return get_model(model_name, device).transcribe(audio)
+
+    return transcribe_chunked(audio, model_name, device, on_progress=on_progress)
+
+def _apply_result(transcript, result):
+    """Store a Whisper-shaped result and its segments on the transcript and mark it completed"""
+    transcript.raw_text = result['text']
+    transcript.language = result.get('language', '')
+
+    if 'segments' in result and result['segments']:
+        confidences = [seg.get('avg_logprob', 0) for seg in result['segments'] if 'avg_logprob' in seg]
+        if confidences:
+            transcript.confidence = sum(confidences) / len(confidences)
+
+    if 'segments' in result and result['segments']:
+        last_segment = result['segments'][-1]
+        transcript.duration = last_segment.get('end', 0)
+        transcript.decoded_until = transcript.duration
+
+    transcript.status = 'completed'
+    transcript.completed_at = timezone.now()
+
+    with transaction.atomic():
+        transcript.save()
+        _save_segments(transcript, result.get('segments', []))
+
+    if transcript.refinement == 'pending' and transcript.model_used == transcript.draft_model:
+        _schedule_refinement(transcript)
+    elif getattr(settings, 'WHISPER_REDECODE', False) and not transcript.is_draft:
+        redecode_weak_segments_task.apply_async(
+            (transcript.id,), queue=getattr(settings, 'WHISPER_REFINE_QUEUE', 'transcribe.refine'),
+        )
+
+def _save_segments(transcript, segments):
+    """Replace the transcript's stored segments with a single bulk insert"""
+    TranscriptSegment.objects.filter(transcript=transcript).delete()
+    TranscriptSegment.objects.bulk_create([
+        TranscriptSegment.from_whisper(transcript, index, segment)
+        for index, segment in enumerate(segments)
+    ], batch_size=1000)
+
+def _mark_failed(transcript_id, error):
+    try:
+        transcript = Transcript.objects.get(id=transcript_id)
+        transcript.status = 'failed'
+        transcript.error_message = str(error)
+        transcript.save()
+    except Transcript.DoesNotExist:
+        pass
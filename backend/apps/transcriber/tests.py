@@ -1,18 +1,79 @@
-from django.test import TestCase
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.conf import settings
+from django.db import connection
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from io import StringIO
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 from unittest.mock import patch, MagicMock
+from unittest import skipUnless
 import tempfile
+import hashlib
+import shutil
+import multiprocessing
+import billiard
+import gc
+import threading
+import time
+import subprocess
+import sys
+import json
 import os
-from .models import Transcript
+from .models import Transcript, TranscriptSegment, AudioFingerprintKey, AudioCompaction
 from .serializers import TranscriptUploadSerializer, TranscriptSerializer
+from .registry import ModelRegistry, get_model, quantization_for
+from .metrics import word_error_rate, compare_to_baseline
+from .progress import SegmentFlusher
+from .pcm_cache import PCMCache
+from .ingest import extract_audio, strip_video
+from .storage import blob_name, staging_directory
+from .synthetic import write_synthetic_audio, synthetic_lecture
+from .compaction import compact_audio
+from .batching import claim_batch, _as_transcribe_result, _needs_fallback
+from .tiers import ModelPolicy, FixedPolicy, simulate
+from .language import english_variant, route_model
+from .redecode import weak_regions, redecode_regions
+from .vad import SpeechTimeline
+from types import SimpleNamespace
+from .worker import preload_shared_model, process_memory, plan_thread_profiles, apply_thread_profile
+from .worker import warm_up_parent, warm_up_child, mark_ready, clear_ready
+from .warmup import warm_up
+from .engines import Engine, FakeModel, FasterWhisperModel, get_engine
+from .threads import ThreadProfile, plan_profile
+from .chunking import SAMPLE_RATE, load_audio, transcribe_chunked, plan_chunks, stream_chunks, stream_audio, iter_blocks, slice_chunk, offset_result, stitch_results
+from . import fingerprint
+import numpy as np
 
 User = get_user_model()
 
+FILE_TYPES = {'.mp3': 'audio/mpeg', '.ogg': 'audio/ogg', '.wav': 'audio/wav', '.mp4': 'video/mp4'}
+
+
+def make_transcript(user, name='lecture.mp3', upload=False, **fields):
+    """
+    Create a transcript of ``user`` for the file ``name``: a path under
+    transcriber/ that need not exist or, with ``upload``, a small file saved
+    through the storage. ``fields`` override the defaults.
+    """
+    stem, extension = os.path.splitext(name)
+    file_type = FILE_TYPES.get(extension, 'audio/mpeg')
+    defaults = {
+        'title': stem,
+        'file': SimpleUploadedFile(name, b'fake audio', content_type=file_type) if upload else f'transcriber/{name}',
+        'file_name': name,
+        'file_size': 1024,
+        'file_type': file_type,
+    }
+    defaults.update(fields)
+    return Transcript.objects.create(user=user, **defaults)
+
+
 class TranscriptModelTest(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -197,8 +258,8 @@ class TranscriptAPITest(APITestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['title'], 'My Transcript')
 
-    @patch('apps.transcriber.tasks.transcribe_audio_task.delay')
-    def test_upload_audio_file(self, mock_task):
+    @patch('apps.transcriber.views.transcribe_audio_signature')
+    def test_upload_audio_file(self, mock_signature):
         """Test uploading an audio file"""
         # Create a temporary audio file
         file_content = b"fake audio content for testing"
@@ -221,14 +282,77 @@ class TranscriptAPITest(APITestCase):
         self.assertEqual(response.data['status'], 'pending')
         self.assertTrue(response.data['is_audio'])
 
-        # Verify task was called
-        mock_task.assert_called_once()
+        # Verify task was enqueued by name
+        mock_signature.assert_called_once_with(response.data['id'], ignore_similar=False, queue='transcribe.long')
+        mock_signature.return_value.delay.assert_called_once()
 
         # Verify transcript was created in database
         transcript = Transcript.objects.get(id=response.data['id'])
         self.assertEqual(transcript.user, self.user)
         self.assertEqual(transcript.file_name, 'test_audio.mp3')
 
+    @patch('apps.transcriber.views.transcribe_audio_signature')
+    def test_reupload_shares_blob_and_reuses_completed_result(self, mock_signature):
+        url = reverse('transcript-list')
+        content = b"the same lecture recording"
+
+        first = self.client.post(url, {'file': SimpleUploadedFile("lecture.mp3", content, content_type="audio/mpeg")}, format='multipart')
+        original = Transcript.objects.get(id=first.data['id'])
+        self.assertEqual(len(original.content_hash), 64)
+
+        original.status = 'completed'
+        original.raw_text = 'Welcome to the lecture.'
+        original.duration = 12.0
+        original.model_used = settings.WHISPER_MODEL
+        original.save()
+        TranscriptSegment.objects.create(transcript=original, index=0, start=0.0, end=12.0, text='Welcome to the lecture.')
+
+        second = self.client.post(url, {'file': SimpleUploadedFile("retry.mp3", content, content_type="audio/mpeg")}, format='multipart')
+        duplicate = Transcript.objects.get(id=second.data['id'])
+
+        self.assertEqual(second.data['status'], 'completed')
+        self.assertEqual(second.data['raw_text'], 'Welcome to the lecture.')
+        self.assertEqual(duplicate.file.name, original.file.name)
+        self.assertEqual(duplicate.content_hash, original.content_hash)
+        self.assertEqual(duplicate.segments.count(), 1)
+        mock_signature.assert_called_once_with(original.id, ignore_similar=False, queue='transcribe.long')
+
+    @patch('apps.transcriber.views.transcribe_audio_signature')
+    def test_reupload_with_different_model_is_transcribed(self, mock_signature):
+        url = reverse('transcript-list')
+        content = b"another recording"
+
+        first = self.client.post(url, {'file': SimpleUploadedFile("a.mp3", content, content_type="audio/mpeg")}, format='multipart')
+        Transcript.objects.filter(id=first.data['id']).update(status='completed', model_used='tiny')
+
+        with self.settings(WHISPER_MODEL='small'):
+            second = self.client.post(url, {'file': SimpleUploadedFile("b.mp3", content, content_type="audio/mpeg")}, format='multipart')
+
+        self.assertEqual(second.data['status'], 'pending')
+        self.assertEqual(mock_signature.call_count, 2)
+
+    @patch('apps.transcriber.views.transcribe_audio_signature')
+    def test_same_file_from_another_user_is_transcribed_separately(self, mock_signature):
+        url = reverse('transcript-list')
+        content = b"a lecture two students recorded"
+
+        first = self.client.post(url, {'file': SimpleUploadedFile("lecture.mp3", content, content_type="audio/mpeg")}, format='multipart')
+        original = Transcript.objects.get(id=first.data['id'])
+        Transcript.objects.filter(id=original.id).update(
+            status='completed', raw_text='Private notes.', model_used=settings.WHISPER_MODEL,
+        )
+        TranscriptSegment.objects.create(transcript=original, index=0, start=0.0, end=5.0, text='Private notes.')
+
+        other = User.objects.create_user(username='otheruser', email='other@example.com', password='testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(other).access_token}')
+        second = self.client.post(url, {'file': SimpleUploadedFile("lecture.mp3", content, content_type="audio/mpeg")}, format='multipart')
+        theirs = Transcript.objects.get(id=second.data['id'])
+
+        self.assertEqual(second.data['status'], 'pending')
+        self.assertEqual(theirs.raw_text, '')
+        self.assertFalse(theirs.segments.exists())
+        self.assertEqual(mock_signature.call_count, 2)
+
     def test_get_transcript_detail(self):
         """Test retrieving a specific transcript"""
         transcript = Transcript.objects.create(
@@ -248,6 +372,27 @@ class TranscriptAPITest(APITestCase):
         self.assertEqual(response.data['title'], 'Detail Test')
         self.assertEqual(response.data['raw_text'], 'This is the transcribed text.')
 
+    def test_segments_endpoint_filters_time_window(self):
+        transcript = Transcript.objects.create(
+            user=self.user, title='Lecture', file_name='lecture.mp3',
+            file_size=1024, file_type='audio/mpeg', status='completed'
+        )
+        TranscriptSegment.objects.bulk_create([
+            TranscriptSegment(transcript=transcript, index=i, start=i * 10.0, end=i * 10.0 + 10, text=f'segment {i}')
+            for i in range(10)
+        ])
+
+        url = reverse('transcript-segments', kwargs={'pk': transcript.id})
+        response = self.client.get(url, {'from': 25, 'to': 50, 'page_size': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([s['index'] for s in response.data['results']], [2, 3])
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(url, {'from': 'soon'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_status_summary_endpoint(self):
         """Test the status summary endpoint"""
         # Create transcripts with different statuses
@@ -287,7 +432,7 @@ class TranscriptTaskTest(TestCase):
             password='testpass123'
         )
 
-    @patch('apps.transcriber.tasks.whisper.load_model')
+    @patch('apps.transcriber.tasks.get_model')
     @patch('os.path.exists')
     def test_transcribe_audio_task_success(self, mock_exists, mock_load_model):
         """Test successful transcription task"""
@@ -335,7 +480,39 @@ class TranscriptTaskTest(TestCase):
         self.assertEqual(result['status'], 'completed')
         self.assertEqual(result['transcript_id'], transcript.id)
 
-    @patch('apps.transcriber.tasks.whisper.load_model')
+    @patch('apps.transcriber.tasks.get_model')
+    @patch('os.path.exists')
+    def test_transcribe_audio_task_stores_segments(self, mock_exists, mock_get_model):
+        transcript = Transcript.objects.create(
+            user=self.user,
+            title='Segments Test',
+            file=SimpleUploadedFile("segments.mp3", b"fake audio content", content_type="audio/mpeg"),
+            file_name='segments.mp3',
+            file_size=1024,
+            file_type='audio/mpeg',
+            status='pending'
+        )
+        mock_exists.return_value = True
+        mock_get_model.return_value.transcribe.return_value = {
+            'text': ' Hello there. General Kenobi.',
+            'language': 'en',
+            'segments': [
+                {'start': 0.0, 'end': 2.0, 'text': ' Hello there.', 'avg_logprob': -0.2, 'no_speech_prob': 0.01},
+                {'start': 2.0, 'end': 4.5, 'text': ' General Kenobi.', 'avg_logprob': -0.4, 'no_speech_prob': 0.02},
+            ]
+        }
+
+        from .tasks import transcribe_audio_task
+        transcribe_audio_task(transcript.id)
+        transcribe_audio_task(transcript.id)  # a retry replaces the segments
+
+        segments = list(TranscriptSegment.objects.filter(transcript=transcript))
+        self.assertEqual([s.index for s in segments], [0, 1])
+        self.assertEqual(segments[1].text, 'General Kenobi.')
+        self.assertEqual((segments[1].start, segments[1].end), (2.0, 4.5))
+        self.assertEqual(segments[0].no_speech_prob, 0.01)
+
+    @patch('apps.transcriber.tasks.get_model')
     @patch('os.path.exists')
     def test_transcribe_audio_task_file_not_found(self, mock_exists, mock_load_model):
         from django.core.files.uploadedfile import SimpleUploadedFile
@@ -368,3 +545,1751 @@ class TranscriptTaskTest(TestCase):
 
         self.assertIn('error', result)
         self.assertIn('not found', result['error'])
+
+
+class ModelRegistryTest(TestCase):
+    def setUp(self):
+        self.loader = MagicMock(side_effect=lambda name, device, **options: MagicMock(name=name))
+
+    def test_model_loaded_once_and_reused(self):
+        registry = ModelRegistry(memory_budget=1024, loader=self.loader)
+
+        first = registry.get('base', 'cpu')
+        second = registry.get('base', 'cpu')
+
+        self.assertIs(first, second)
+        self.loader.assert_called_once_with('base', 'cpu')
+
+    def test_compute_options_are_part_of_key(self):
+        registry = ModelRegistry(memory_budget=1024, loader=self.loader)
+
+        registry.get('base', 'cpu')
+        registry.get('base', 'cpu', in_memory=True)
+
+        self.assertEqual(self.loader.call_count, 2)
+        self.assertEqual(len(registry), 2)
+
+    @patch('apps.transcriber.registry._model_nbytes', return_value=600)
+    def test_least_recently_used_model_evicted_over_budget(self, mock_nbytes):
+        registry = ModelRegistry(memory_budget=1000, loader=self.loader)
+
+        registry.get('tiny', 'cpu')
+        registry.get('base', 'cpu')
+
+        self.assertNotIn(ModelRegistry.make_key('tiny', 'cpu'), registry)
+        self.assertIn(ModelRegistry.make_key('base', 'cpu'), registry)
+
+    @patch('apps.transcriber.registry._model_nbytes', return_value=400)
+    def test_recently_used_model_survives_eviction(self, mock_nbytes):
+        registry = ModelRegistry(memory_budget=1000, loader=self.loader)
+
+        registry.get('tiny', 'cpu')
+        registry.get('base', 'cpu')
+        registry.get('tiny', 'cpu')
+        registry.get('small', 'cpu')
+
+        self.assertEqual(registry.keys(), [
+            ModelRegistry.make_key('tiny', 'cpu'),
+            ModelRegistry.make_key('small', 'cpu'),
+        ])
+
+
+WEB_IMPORT_FOOTPRINT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({
+    'elapsed': time.perf_counter() - start,
+    # VmHWM, unlike ru_maxrss, is not inherited from the parent across exec
+    'max_rss_mb': int(next(l for l in open('/proc/self/status') if l.startswith('VmHWM')).split()[1]) / 1024,
+    'heavy_modules': [m for m in ('torch', 'whisper', 'google.generativeai') if m in sys.modules],
+}))
+"""
+
+
+class WebImportFootprintTest(SimpleTestCase):
+    """Regression check that the web tier never loads the ML stack"""
+
+    MAX_STARTUP_SECONDS = 10
+    MAX_RSS_MB = 200
+
+    def test_django_setup_and_url_loading_stay_lightweight(self):
+        completed = subprocess.run(
+            [sys.executable, '-c', WEB_IMPORT_FOOTPRINT_SCRIPT],
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        footprint = json.loads(completed.stdout.strip().splitlines()[-1])
+
+        self.assertEqual(footprint['heavy_modules'], [])
+        self.assertLess(footprint['elapsed'], self.MAX_STARTUP_SECONDS)
+        self.assertLess(footprint['max_rss_mb'], self.MAX_RSS_MB)
+
+
+class WorkerPreloadTest(SimpleTestCase):
+    @patch('apps.transcriber.worker.get_model')
+    def test_preload_disabled_by_default(self, mock_get_model):
+        with self.settings(WHISPER_PRELOAD_IN_PARENT=False):
+            preload_shared_model()
+
+        mock_get_model.assert_not_called()
+
+    @patch('apps.transcriber.worker.prepare_for_fork')
+    @patch('apps.transcriber.worker.get_model')
+    def test_preload_loads_model_in_parent(self, mock_get_model, mock_prepare):
+        with self.settings(WHISPER_PRELOAD_IN_PARENT=True):
+            preload_shared_model()
+
+        mock_get_model.assert_called_once_with()
+        mock_prepare.assert_called_once_with(mock_get_model.return_value)
+
+    def test_process_memory_reports_unique_set_size(self):
+        memory = process_memory()
+        if not memory:
+            self.skipTest('/proc/self/smaps_rollup is not available')
+
+        self.assertGreater(memory['uss_mb'], 0)
+        self.assertLessEqual(memory['uss_mb'], memory['rss_mb'])
+
+
+class ChunkingTest(SimpleTestCase):
+    def _tone_with_gap(self, seconds, gap_at, gap_seconds=1.0):
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        audio = (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+        start = int(gap_at * SAMPLE_RATE)
+        audio[start:start + int(gap_seconds * SAMPLE_RATE)] = 0
+        return audio
+
+    def test_boundaries_snap_to_silence(self):
+        audio = self._tone_with_gap(100, gap_at=42)
+
+        chunks = plan_chunks(audio, chunk_seconds=40, overlap_seconds=2, search_seconds=5)
+
+        self.assertEqual(len(chunks), 2)
+        self.assertTrue(42 <= chunks[0]['keep_end'] <= 43)
+        self.assertEqual(chunks[1]['keep_start'], chunks[0]['keep_end'])
+        self.assertAlmostEqual(chunks[0]['end'], chunks[0]['keep_end'] + 2, places=3)
+        self.assertEqual(chunks[-1]['keep_end'], 100)
+
+    def test_short_audio_is_single_chunk(self):
+        chunks = plan_chunks(np.zeros(10 * SAMPLE_RATE, dtype=np.float32), chunk_seconds=40, overlap_seconds=2)
+
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual((chunks[0]['start'], chunks[0]['end']), (0, 10))
+
+    def test_stitch_offsets_timestamps_and_drops_overlap_duplicates(self):
+        first = {'index': 0, 'start': 0, 'end': 32, 'keep_start': 0, 'keep_end': 30}
+        second = {'index': 1, 'start': 28, 'end': 60, 'keep_start': 30, 'keep_end': 60}
+        results = [
+            offset_result(second, {'language': 'en', 'segments': [
+                {'start': 0.5, 'end': 1.5, 'text': ' overlap', 'avg_logprob': -0.2},
+                {'start': 3.0, 'end': 9.0, 'text': ' second', 'avg_logprob': -0.4},
+            ]}),
+            offset_result(first, {'language': 'en', 'segments': [
+                {'start': 0.0, 'end': 10.0, 'text': ' first', 'avg_logprob': -0.1},
+                {'start': 28.5, 'end': 29.5, 'text': ' overlap', 'avg_logprob': -0.2},
+            ]}),
+        ]
+
+        stitched = stitch_results(results)
+
+        self.assertEqual(stitched['text'], ' first overlap second')
+        self.assertEqual([s['start'] for s in stitched['segments']], [0.0, 28.5, 31.0])
+        self.assertEqual(stitched['segments'][-1]['end'], 37.0)
+        self.assertEqual([s['id'] for s in stitched['segments']], [0, 1, 2])
+        self.assertEqual(stitched['language'], 'en')
+
+    def test_streamed_chunks_match_planned_chunks(self):
+        audio = self._tone_with_gap(130, gap_at=42)
+        audio[int(83 * SAMPLE_RATE):int(84 * SAMPLE_RATE)] = 0
+        blocks = [audio[i:i + 7 * SAMPLE_RATE] for i in range(0, len(audio), 7 * SAMPLE_RATE)]
+
+        streamed = list(stream_chunks(iter(blocks), chunk_seconds=40, overlap_seconds=2, search_seconds=5))
+
+        self.assertEqual([chunk for chunk, _ in streamed], plan_chunks(audio, 40, 2, search_seconds=5))
+        for chunk, window in streamed:
+            np.testing.assert_array_equal(window, slice_chunk(audio, chunk))
+
+    @patch('apps.transcriber.tasks.transcribe_streaming')
+    @patch('apps.transcriber.tasks.get_model')
+    def test_streaming_path_used_when_enabled(self, mock_get_model, mock_streaming):
+        from .tasks import _transcribe
+
+        with self.settings(WHISPER_STREAMING=True, WHISPER_STREAM_WINDOW_SECONDS=120):
+            result = _transcribe('/tmp/long.wav', 'base', 'cpu')
+
+        self.assertIs(result, mock_streaming.return_value)
+        mock_streaming.assert_called_once_with('/tmp/long.wav', mock_get_model.return_value, 120, 2, on_progress=None)
+
+    @patch('apps.transcriber.tasks.transcribe_chunked')
+    @patch('apps.transcriber.tasks.load_audio')
+    def test_long_audio_uses_chunked_path_when_enabled(self, mock_load_audio, mock_chunked):
+        from .tasks import _transcribe
+        mock_load_audio.return_value = np.zeros(20 * SAMPLE_RATE, dtype=np.float32)
+
+        with self.settings(WHISPER_CHUNKED=True, WHISPER_CHUNK_MIN_SECONDS=10):
+            result = _transcribe('/tmp/long.wav', 'base', 'cpu')
+
+        self.assertIs(result, mock_chunked.return_value)
+        mock_chunked.assert_called_once_with(mock_load_audio.return_value, 'base', 'cpu', on_progress=None)
+
+
+    def chunked_in_pool_child(self, audio, **options):
+        """transcribe_chunked run as a task in a billiard pool child, as in Celery's default prefork pool"""
+        pool = billiard.get_context('fork').Pool(1)
+        try:
+            return pool.apply(transcribe_chunked_in_child, (audio,), options)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def test_chunks_decoded_in_a_real_process_pool(self):
+        audio, _ = synthetic_lecture(60, seed=2)
+
+        # Spawned pool processes read their settings from the environment
+        with patch.dict(os.environ, {'WHISPER_ENGINE': 'fake'}), \
+                self.settings(WHISPER_ENGINE='fake', WHISPER_CHUNK_SECONDS=20, WHISPER_CHUNK_OVERLAP_SECONDS=1):
+            pooled = transcribe_chunked(audio, 'base', 'cpu', workers=2)
+            # Inherited by the forked pool child but not by the processes it spawns, so
+            # only decoding in a pool of its own succeeds
+            with patch('apps.transcriber.chunking.get_model', side_effect=AssertionError('decoded in the pool child')):
+                daemonic, from_child = self.chunked_in_pool_child(audio, workers=2)
+
+        self.assertTrue(pooled['segments'])
+        self.assertLessEqual(pooled['segments'][-1]['end'], 60)
+        self.assertTrue(daemonic)
+        self.assertEqual(from_child, pooled)
+
+    def test_decode_memory_benchmark_reports_each_process_own_peak(self):
+        # Raises this process's peak well above what a freshly spawned one needs
+        ballast = np.ones(160 * 1024 * 1024 // 8)
+        out = StringIO()
+        call_command('bench_decode_memory', lengths='600', stdout=out)
+        del ballast
+        reports = {report['mode']: report for report in map(json.loads, out.getvalue().splitlines())}
+
+        self.assertLess(reports['baseline']['peak_rss_mb'], 160)
+        self.assertLess(reports['baseline']['peak_rss_mb'], reports['streaming']['peak_rss_mb'])
+        self.assertLess(reports['streaming']['peak_rss_mb'], reports['full']['peak_rss_mb'])
+
+
+def transcribe_chunked_in_child(audio, **options):
+    result = transcribe_chunked(audio, 'base', 'cpu', **options)
+    # Releases the finished pool's semaphores, which the pool child's exit would leave to the tracker
+    gc.collect()
+    return multiprocessing.current_process().daemon, result
+
+
+class ChunkFanOutTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.transcript = make_transcript(self.user, 'lecture.mp3', upload=True, status='processing')
+        self.chunks = [
+            {'index': 0, 'start': 0, 'end': 32, 'keep_start': 0, 'keep_end': 30},
+            {'index': 1, 'start': 28, 'end': 50, 'keep_start': 30, 'keep_end': 50},
+        ]
+
+    @patch('apps.transcriber.tasks.chord')
+    @patch('apps.transcriber.tasks.load_audio')
+    @patch('apps.transcriber.tasks.stream_audio')
+    @patch('os.path.exists', return_value=True)
+    def test_long_recording_is_fanned_out(self, mock_exists, mock_stream_audio, mock_load_audio, mock_chord):
+        from .tasks import transcribe_audio_task
+        mock_stream_audio.return_value = iter_blocks(np.zeros(90 * SAMPLE_RATE, dtype=np.float32))
+        Transcript.objects.filter(id=self.transcript.id).update(duration=90)
+
+        with self.settings(WHISPER_FANOUT=True, WHISPER_FANOUT_MIN_SECONDS=60, WHISPER_CHUNK_SECONDS=40,
+                           WHISPER_SIMILAR_ACTION='off'):
+            result = transcribe_audio_task(self.transcript.id)
+
+        header = mock_chord.call_args[0][0]
+        self.assertEqual(len(header), 2)
+        self.assertEqual(header[0].args[0], self.transcript.id)
+        mock_chord.return_value.assert_called_once()
+        self.assertEqual(result['status'], 'processing')
+        self.assertEqual(result['chunks'], 2)
+        mock_stream_audio.assert_called_once_with(self.transcript.file.path)
+        mock_load_audio.assert_not_called()
+
+    @patch('apps.transcriber.tasks.chord')
+    @patch('apps.transcriber.tasks._transcribe')
+    @patch('apps.transcriber.tasks.probe_duration', return_value=30.0)
+    @patch('os.path.exists', return_value=True)
+    def test_short_recording_decoded_from_its_file(self, mock_exists, mock_probe, mock_transcribe, mock_chord):
+        from .tasks import transcribe_audio_task
+        mock_transcribe.return_value = {'text': ' hello', 'language': 'en', 'segments': []}
+
+        with self.settings(WHISPER_FANOUT=True, WHISPER_FANOUT_MIN_SECONDS=60, WHISPER_SIMILAR_ACTION='off'):
+            transcribe_audio_task(self.transcript.id)
+
+        mock_probe.assert_called_once_with(self.transcript.file.path)
+        self.assertEqual(mock_transcribe.call_args[0][0], self.transcript.file.path)
+        mock_chord.assert_not_called()
+
+    @patch('apps.transcriber.tasks.get_model')
+    @patch('apps.transcriber.tasks.load_audio_range')
+    def test_chunk_task_returns_offset_segments(self, mock_load_range, mock_get_model):
+        from .tasks import transcribe_chunk_task
+        mock_get_model.return_value.transcribe.return_value = {
+            'text': ' later', 'language': 'en',
+            'segments': [{'start': 3.0, 'end': 5.0, 'text': ' later', 'avg_logprob': -0.3}],
+        }
+
+        result = transcribe_chunk_task(self.transcript.id, self.chunks[1], 'base', 'cpu')
+
+        mock_load_range.assert_called_once_with(self.transcript.file.path, 28, 50)
+        self.assertEqual(result['chunk'], self.chunks[1])
+        self.assertEqual(result['segments'][0]['start'], 31.0)
+        self.assertEqual(Transcript.objects.get(id=self.transcript.id).status, 'processing')
+
+    def test_merge_tolerates_out_of_order_results(self):
+        from .tasks import merge_transcript_chunks_task
+        results = [
+            offset_result(self.chunks[1], {'language': 'en', 'segments': [
+                {'start': 3.0, 'end': 5.0, 'text': ' later', 'avg_logprob': -0.3},
+            ]}),
+            offset_result(self.chunks[0], {'language': 'en', 'segments': [
+                {'start': 0.0, 'end': 10.0, 'text': ' Earlier', 'avg_logprob': -0.1},
+            ]}),
+        ]
+
+        merge_transcript_chunks_task(results, self.transcript.id)
+
+        self.transcript.refresh_from_db()
+        self.assertEqual(self.transcript.status, 'completed')
+        self.assertEqual(self.transcript.raw_text, ' Earlier later')
+        self.assertEqual(self.transcript.duration, 33.0)
+        self.assertAlmostEqual(self.transcript.confidence, -0.2)
+        self.assertEqual(self.transcript.language, 'en')
+
+    def test_failed_chunks_mark_transcript_failed(self):
+        from .tasks import transcription_failed_task
+
+        transcription_failed_task(None, RuntimeError('chunk 1 failed'), None, self.transcript.id)
+
+        self.transcript.refresh_from_db()
+        self.assertEqual(self.transcript.status, 'failed')
+        self.assertEqual(self.transcript.error_message, 'chunk 1 failed')
+
+
+class SegmentFlusherTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.transcript = make_transcript(self.user, 'long.mp3', file='', status='processing')
+        self.now = 0.0
+
+    def _segments(self, start, count):
+        return [{'start': float(i), 'end': i + 1.0, 'text': f' s{i}', 'avg_logprob': -0.1} for i in range(start, start + count)]
+
+    def test_flushes_when_batch_is_full(self):
+        flusher = SegmentFlusher(self.transcript, max_segments=3, max_seconds=60, clock=lambda: self.now)
+
+        flusher.add(self._segments(0, 2), decoded_until=2.0)
+        self.assertEqual(TranscriptSegment.objects.filter(transcript=self.transcript).count(), 0)
+
+        flusher.add(self._segments(2, 2), decoded_until=4.0)
+        self.transcript.refresh_from_db()
+        self.assertEqual(TranscriptSegment.objects.filter(transcript=self.transcript).count(), 4)
+        self.assertEqual(self.transcript.raw_text, ' s0 s1 s2 s3')
+        self.assertEqual(self.transcript.decoded_until, 4.0)
+
+    def test_flushes_when_interval_elapsed(self):
+        flusher = SegmentFlusher(self.transcript, max_segments=100, max_seconds=5, clock=lambda: self.now)
+
+        flusher.add(self._segments(0, 1), decoded_until=1.0)
+        self.now = 6.0
+        flusher.add(self._segments(1, 1), decoded_until=2.0)
+
+        indexes = list(TranscriptSegment.objects.filter(transcript=self.transcript).values_list('index', flat=True))
+        self.assertEqual(indexes, [0, 1])
+
+    @patch('apps.transcriber.progress.connection')
+    def test_pending_segments_flushed_without_another_add(self, mock_connection):
+        flusher = SegmentFlusher(self.transcript, max_segments=100, max_seconds=0.01, clock=lambda: self.now)
+        flushed = threading.Event()
+
+        with patch.object(flusher, '_flush', side_effect=flushed.set) as mock_flush, flusher:
+            flusher.add(self._segments(0, 1), decoded_until=1.0)
+            self.assertTrue(flushed.wait(5))
+
+        calls = mock_flush.call_count
+        time.sleep(0.05)
+        self.assertEqual(mock_flush.call_count, calls)  # stopped with the block
+        mock_connection.close.assert_called_once_with()
+
+    def test_partial_progress_visible_on_detail_endpoint(self):
+        SegmentFlusher(self.transcript, max_segments=1, clock=lambda: self.now).add(self._segments(0, 1), 30.0)
+
+        refresh = RefreshToken.for_user(self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {refresh.access_token}'
+        response = self.client.get(reverse('transcript-detail', kwargs={'pk': self.transcript.id}))
+
+        self.assertEqual(response.data['status'], 'processing')
+        self.assertEqual(response.data['raw_text'], ' s0')
+        self.assertEqual(response.data['decoded_until'], 30.0)
+
+    @patch('apps.transcriber.tasks.transcribe_streaming')
+    @patch('apps.transcriber.tasks.get_model')
+    def test_progress_reporting_uses_streaming_path(self, mock_get_model, mock_streaming):
+        from .tasks import _transcribe
+        on_progress = MagicMock()
+
+        _transcribe('/tmp/long.wav', 'base', 'cpu', on_progress=on_progress)
+
+        self.assertIs(mock_streaming.call_args.kwargs['on_progress'], on_progress)
+        # One report per 30 s Whisper window rather than per streaming window
+        self.assertEqual(mock_streaming.call_args.args[2], 30)
+
+
+def speech_like(seconds, seed):
+    """Eight frequency-modulated tones spread over the speech band, with random syllable-rate envelopes"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    knots = np.arange(0, seconds + 1, 0.15)
+    audio = np.zeros(len(t), np.float32)
+    for base in np.geomspace(250, 2500, 8):
+        envelope = np.interp(t, knots, rng.random(len(knots)) ** 2)
+        carrier = base * rng.uniform(0.9, 1.1) * t + 30 * np.sin(2 * np.pi * rng.uniform(0.5, 4) * t)
+        audio += (envelope * np.sin(2 * np.pi * carrier)).astype(np.float32)
+    return audio / 8
+
+
+def degrade(audio, trim_seconds, seconds, seed=0):
+    """A trimmed, quieter, noisier and low-passed copy, as after a re-encode"""
+    rng = np.random.default_rng(seed)
+    copy = audio[int(trim_seconds * SAMPLE_RATE):][:int(seconds * SAMPLE_RATE)] * 0.5
+    copy = copy + rng.normal(0, 0.01, len(copy)).astype(np.float32)
+    return np.convolve(copy, np.ones(3) / 3, mode='same').astype(np.float32)
+
+
+def blocks(audio, seconds=30):
+    step = int(seconds * SAMPLE_RATE)
+    return [audio[i:i + step] for i in range(0, len(audio), step)]
+
+
+class FingerprintTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.original = speech_like(180, seed=1)
+        cls.stored, cls.voiced = fingerprint.fingerprint_audio(cls.original)
+        cls.rows = [(1, key, position) for key, position in fingerprint.anchors(cls.stored, cls.voiced)]
+
+    def _match(self, audio):
+        return fingerprint.find_match(fingerprint.fingerprint_phases(blocks(audio)), self.rows, {1: self.stored}.get, 0.3, 0.9)
+
+    def test_streamed_fingerprint_matches_whole_array(self):
+        streamed = fingerprint.fingerprint_phases(blocks(self.original, seconds=7))[0][1]
+        self.assertTrue(np.array_equal(streamed, self.stored))
+
+    def test_binary_round_trip(self):
+        data = fingerprint.to_bytes(self.stored)
+        self.assertEqual(len(data), 4 * len(self.stored))
+        self.assertTrue(np.array_equal(fingerprint.from_bytes(data), self.stored))
+
+    def test_degraded_copies_match_with_their_trim_offset(self):
+        for trim in (0.0, 3.35, 3.37, 17.12):
+            with self.subTest(trim=trim):
+                match = self._match(degrade(self.original, trim, 120))
+                self.assertIsNotNone(match)
+                candidate, offset, ber = match
+                self.assertEqual(candidate, 1)
+                self.assertAlmostEqual(offset, trim, delta=0.05)
+                self.assertLess(ber, 0.25)
+
+    def test_unrelated_recording_does_not_match(self):
+        self.assertIsNone(self._match(speech_like(120, seed=2)))
+
+
+@override_settings(WHISPER_SIMILAR_SCOPE='user', WHISPER_SIMILAR_ACTION='offer')
+class NearDuplicateTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        self.original = speech_like(120, seed=1)
+
+        self.earlier = make_transcript(
+            self.user, 'lecture.mp3', status='completed', model_used='base', language='en', raw_text='a b c',
+        )
+        for index, start in enumerate((0.0, 40.0, 80.0)):
+            TranscriptSegment.objects.create(
+                transcript=self.earlier, index=index, start=start, end=start + 40.0, text='abc'[index]
+            )
+        stored, voiced = fingerprint.fingerprint_audio(self.original)
+        self.earlier.fingerprint = fingerprint.to_bytes(stored)
+        self.earlier.save()
+        AudioFingerprintKey.objects.bulk_create([
+            AudioFingerprintKey(transcript=self.earlier, key=key, position=position)
+            for key, position in fingerprint.anchors(stored, voiced)
+        ])
+
+        # The same lecture re-encoded, with its first 45 seconds cut off
+        self.copy = degrade(self.original, 45.0, 75.0)
+        self.transcript = make_transcript(self.user, 'lecture-trimmed.mp3')
+
+    def _run_task(self):
+        from .tasks import transcribe_audio_task
+
+        with patch('apps.transcriber.tasks.os.path.exists', return_value=True), \
+                patch('apps.transcriber.tasks.stream_audio', return_value=blocks(self.copy)), \
+                patch('apps.transcriber.tasks.get_model') as mock_get_model, \
+                self.settings(WHISPER_MODEL='base'):
+            result = transcribe_audio_task(self.transcript.id)
+
+        self.transcript.refresh_from_db()
+        return result, mock_get_model
+
+    def test_no_fingerprinting_by_default(self):
+        with self.settings(), patch('apps.transcriber.tasks._find_similar') as mock_find_similar:
+            del settings.WHISPER_SIMILAR_ACTION
+            self._run_task()
+
+        mock_find_similar.assert_not_called()
+        self.assertIsNone(self.transcript.fingerprint)
+
+    def test_match_is_offered_instead_of_transcribing(self):
+        result, mock_get_model = self._run_task()
+
+        mock_get_model.assert_not_called()
+        self.assertEqual(result['status'], 'pending')
+        self.assertEqual(self.transcript.status, 'pending')
+        self.assertEqual(self.transcript.similar_transcript, self.earlier)
+        self.assertAlmostEqual(self.transcript.similar_offset, 45.0, delta=0.05)
+        self.assertTrue(self.transcript.fingerprint_keys.exists())
+
+        refresh = RefreshToken.for_user(self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {refresh.access_token}'
+        response = self.client.post(reverse('transcript-reuse-similar', kwargs={'pk': self.transcript.id}))
+
+        self.assertEqual(response.data['status'], 'completed')
+        segments = list(self.transcript.segments.values_list('text', 'start', 'end'))
+        self.assertEqual([text for text, _, _ in segments], ['b', 'c'])
+        self.assertAlmostEqual(segments[0][1], 0.0)
+        self.assertAlmostEqual(segments[1][1], 35.0, delta=0.05)
+
+    @patch('apps.transcriber.views.transcribe_audio_signature')
+    def test_retry_of_offered_match_skips_matching(self, mock_signature):
+        self._run_task()
+
+        refresh = RefreshToken.for_user(self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {refresh.access_token}'
+        response = self.client.post(reverse('transcript-retry-transcription', kwargs={'pk': self.transcript.id}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_signature.assert_called_once_with(self.transcript.id, ignore_similar=True, queue='transcribe.short')
+
+    @override_settings(WHISPER_SIMILAR_ACTION='auto')
+    def test_match_reused_automatically(self):
+        result, _ = self._run_task()
+
+        self.assertEqual(result['status'], 'completed')
+        self.assertEqual(self.transcript.status, 'completed')
+        self.assertEqual(self.transcript.raw_text, 'b c')
+
+    def test_other_users_recordings_are_not_matched(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        Transcript.objects.filter(id=self.earlier.id).update(user=other)
+
+        _, mock_get_model = self._run_task()
+
+        mock_get_model.assert_called()
+        self.assertIsNone(self.transcript.similar_transcript)
+
+
+class PCMCacheTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.audio = np.linspace(-1, 1, 4 * SAMPLE_RATE, dtype=np.float32)
+
+    def test_entry_is_memory_mapped_and_keyed_by_sample_rate(self):
+        cache = PCMCache(self.directory.name, max_bytes=10 ** 9)
+        cache.put('abc', blocks(self.audio, seconds=1))
+
+        cached = cache.get('abc')
+        self.assertIsInstance(cached, np.memmap)
+        np.testing.assert_array_equal(cached, self.audio)
+        self.assertIsNone(cache.get('abc', sample_rate=8000))
+        self.assertIsNone(cache.get('def'))
+
+    def test_least_recently_used_entries_evicted_over_budget(self):
+        entry_bytes = self.audio.nbytes
+        cache = PCMCache(self.directory.name, max_bytes=3 * entry_bytes)
+        for age, digest in enumerate(['old', 'used', 'new']):
+            cache.put(digest, [self.audio])
+            os.utime(cache.path(digest), (1000 + age, 1000 + age))
+
+        cache.get('old')  # refreshes its position
+        cache.put('newest', [self.audio])
+
+        self.assertIsNotNone(cache.get('old'))
+        self.assertIsNotNone(cache.get('newest'))
+        self.assertIsNone(cache.get('used'))
+        self.assertLessEqual(cache.total_bytes, 3 * entry_bytes)
+
+    @patch('apps.transcriber.pcm_cache.stream_audio')
+    def test_file_decoded_only_once(self, mock_stream_audio):
+        mock_stream_audio.return_value = blocks(self.audio)
+        cache = PCMCache(self.directory.name, max_bytes=10 ** 9)
+
+        first = cache.get_or_decode('abc', '/tmp/lecture.mp4')
+        second = cache.get_or_decode('abc', '/tmp/lecture.mp4')
+
+        mock_stream_audio.assert_called_once_with('/tmp/lecture.mp4')
+        np.testing.assert_array_equal(first, second)
+
+    @patch('apps.transcriber.pcm_cache.stream_audio')
+    @patch('apps.transcriber.tasks.get_model')
+    @patch('os.path.exists', return_value=True)
+    def test_retry_reuses_decoded_audio(self, mock_exists, mock_get_model, mock_stream_audio):
+        from .tasks import transcribe_audio_task
+        user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        transcript = make_transcript(user, 'lecture.mp4', content_hash='ab' * 32)
+        mock_stream_audio.side_effect = lambda path: blocks(self.audio)
+        mock_get_model.return_value.transcribe.return_value = {'text': ' Hi', 'language': 'en', 'segments': []}
+
+        with self.settings(WHISPER_PCM_CACHE_DIR=self.directory.name, WHISPER_PCM_CACHE_MB=100, WHISPER_SIMILAR_ACTION='off',
+                           INGEST_EXTRACT_AUDIO=False):
+            transcribe_audio_task(transcript.id)
+            transcribe_audio_task(transcript.id)
+
+        mock_stream_audio.assert_called_once()
+        audio = mock_get_model.return_value.transcribe.call_args[0][0]
+        self.assertIsInstance(audio, np.memmap)
+        np.testing.assert_array_equal(audio, self.audio)
+
+    @patch('apps.transcriber.pcm_cache.stream_audio')
+    @patch('apps.transcriber.tasks._fan_out')
+    @patch('os.path.exists', return_value=True)
+    def test_fan_out_does_not_fill_the_cache(self, mock_exists, mock_fan_out, mock_stream_audio):
+        from .tasks import transcribe_audio_task
+        user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        transcript = make_transcript(user, 'lecture.mp4', content_hash='ab' * 32, duration=3600.0)
+        mock_fan_out.return_value = {'transcript_id': transcript.id, 'status': 'fanned_out'}
+
+        with self.settings(WHISPER_PCM_CACHE_DIR=self.directory.name, WHISPER_PCM_CACHE_MB=100, WHISPER_SIMILAR_ACTION='off',
+                           INGEST_EXTRACT_AUDIO=False, WHISPER_FANOUT=True, WHISPER_FANOUT_MIN_SECONDS=1800):
+            transcribe_audio_task(transcript.id)
+
+        mock_stream_audio.assert_not_called()
+        self.assertEqual(mock_fan_out.call_args.args[1], transcript.file.path)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+class VideoIngestTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_settings = self.settings(MEDIA_ROOT=self.media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        self.content = b'video' * 1000
+        self.digest = hashlib.sha256(self.content).hexdigest()
+        self.video_name = blob_name(self.digest, '.mp4')
+        self.video_path = os.path.join(self.media.name, self.video_name)
+        os.makedirs(os.path.dirname(self.video_path))
+        with open(self.video_path, 'wb') as f:
+            f.write(self.content)
+
+        video = {'file': self.video_name, 'file_size': 5000, 'content_hash': self.digest}
+        self.transcript = make_transcript(self.user, 'lecture.mp4', **video)
+        self.duplicate = make_transcript(self.user, 'lecture.mp4', status='completed', **video)
+
+    def _fake_extract(self, file_path):
+        staged = os.path.join(staging_directory(), 'track.m4a')
+        with open(staged, 'wb') as f:
+            f.write(b'audio')
+        return staged, '.m4a', True
+
+    def _strip(self, **overrides):
+        with patch('apps.transcriber.ingest.extract_audio', side_effect=self._fake_extract), self.settings(**overrides):
+            self.assertTrue(strip_video(self.transcript))
+        self.duplicate.refresh_from_db()
+
+    def test_video_dropped_and_every_transcript_switched_to_audio(self):
+        self._strip(INGEST_VIDEO_ACTION='drop')
+
+        self.assertTrue(self.transcript.file.name.endswith('.m4a'))
+        self.assertEqual(self.duplicate.file.name, self.transcript.file.name)
+        self.assertFalse(os.path.exists(self.video_path))
+        with open(self.transcript.file.path, 'rb') as f:
+            self.assertEqual(f.read(), b'audio')
+
+        self.transcript.refresh_from_db()
+        self.assertTrue(self.transcript.is_video)
+        self.assertEqual(self.transcript.file_size, 5000)
+        self.assertEqual(self.transcript.original_file, '')
+
+    def test_video_archived_outside_media_root(self):
+        archive = tempfile.TemporaryDirectory()
+        self.addCleanup(archive.cleanup)
+
+        self._strip(INGEST_VIDEO_ACTION='archive', INGEST_VIDEO_ARCHIVE_DIR=archive.name)
+
+        archived = os.path.join(archive.name, self.video_name)
+        self.assertFalse(os.path.exists(self.video_path))
+        self.assertTrue(os.path.exists(archived))
+        self.assertEqual(self.transcript.original_file, archived)
+        self.assertEqual(self.duplicate.original_file, archived)
+
+    def test_video_kept_when_configured(self):
+        self._strip(INGEST_VIDEO_ACTION='keep')
+
+        self.assertTrue(os.path.exists(self.video_path))
+        self.assertEqual(self.duplicate.original_file, self.video_name)
+
+    def test_video_kept_by_default(self):
+        with self.settings():
+            del settings.INGEST_VIDEO_ACTION
+            self._strip()
+
+        self.assertTrue(os.path.exists(self.video_path))
+        self.assertEqual(self.transcript.original_file, self.video_name)
+
+    @patch('apps.transcriber.views.transcribe_audio_signature')
+    def test_reupload_of_stripped_video_shares_its_audio(self, mock_signature):
+        self._strip(INGEST_VIDEO_ACTION='drop')
+        Transcript.objects.filter(id=self.duplicate.id).update(model_used='base')
+
+        refresh = RefreshToken.for_user(self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {refresh.access_token}'
+        upload = SimpleUploadedFile('lecture.mp4', self.content, content_type='video/mp4')
+        with self.settings(WHISPER_MODEL='base'):
+            response = self.client.post(reverse('transcript-list'), {'file': upload}, format='multipart')
+
+        reupload = Transcript.objects.get(id=response.data['id'])
+        self.assertEqual(reupload.status, 'completed')
+        self.assertEqual(reupload.file.name, self.transcript.file.name)
+        self.assertFalse(os.path.exists(self.video_path))
+        mock_signature.assert_not_called()
+
+    def test_audio_uploads_are_left_alone(self):
+        self.transcript.file.name = blob_name('a' * 64, '.mp3')
+        with patch('apps.transcriber.ingest.extract_audio') as mock_extract:
+            self.assertFalse(strip_video(self.transcript))
+        mock_extract.assert_not_called()
+
+    @skipUnless(shutil.which('ffmpeg'), 'ffmpeg is not installed')
+    def test_audio_track_extracted_from_real_video(self):
+        subprocess.run([
+            'ffmpeg', '-nostdin', '-y', '-loglevel', 'error',
+            '-f', 'lavfi', '-i', 'testsrc=size=640x480:rate=25:duration=5',
+            '-f', 'lavfi', '-i', 'sine=frequency=440:duration=5',
+            '-c:v', 'mpeg4', '-q:v', '1', '-c:a', 'aac', '-shortest', self.video_path,
+        ], check=True)
+
+        staged, extension, _ = extract_audio(self.video_path)
+
+        self.assertEqual(extension, '.m4a')
+        self.assertLess(os.path.getsize(staged), os.path.getsize(self.video_path) / 4)
+        samples = sum(len(block) for block in stream_audio(staged))
+        self.assertAlmostEqual(samples / SAMPLE_RATE, 5.0, delta=0.1)
+
+
+@skipUnless(shutil.which('ffmpeg'), 'ffmpeg is not installed')
+class AudioCompactionTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_settings = self.settings(MEDIA_ROOT=self.media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+
+    def _source(self, seconds, extension='wav'):
+        directory = os.path.join(self.media.name, 'transcriber', str(self.user.id))
+        os.makedirs(directory, exist_ok=True)
+        path = write_synthetic_audio(directory, seconds, extension=extension)
+        return os.path.relpath(path, self.media.name)
+
+    def test_sources_reencoded_swapped_and_released_by_next_run(self):
+        name = self._source(20)
+        source_path = os.path.join(self.media.name, name)
+        first = make_transcript(self.user, 'lecture.wav', file=name, status='completed')
+        second = make_transcript(self.user, 'lecture.wav', file=name, status='completed')
+
+        result = compact_audio(bitrate='24k')
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(result['compacted'], 1)
+        self.assertTrue(first.file.name.endswith('.ogg'))
+        self.assertEqual(second.file.name, first.file.name)
+        compaction = AudioCompaction.objects.get(source_name=name)
+        self.assertEqual(compaction.source_bytes, os.path.getsize(source_path))
+        self.assertGreater(compaction.bytes_saved, 0.9 * compaction.source_bytes)
+        self.assertEqual(result['total_bytes_saved'], compaction.bytes_saved)
+
+        # Re-transcription decodes the compact file to the same length
+        samples = sum(len(block) for block in stream_audio(first.file.path))
+        self.assertAlmostEqual(samples / SAMPLE_RATE, 20.0, delta=0.1)
+
+        # The replaced file outlives the run that replaced it
+        self.assertTrue(os.path.exists(source_path))
+        result = compact_audio()
+        self.assertEqual(result['compacted'], 0)
+        self.assertEqual(result['released'], 1)
+        self.assertFalse(os.path.exists(source_path))
+
+    def test_sources_with_queued_or_running_transcripts_are_skipped(self):
+        name = self._source(5)
+        make_transcript(self.user, 'lecture.wav', file=name, status='completed')
+        make_transcript(self.user, 'lecture.wav', file=name, status='processing')
+
+        self.assertEqual(compact_audio()['compacted'], 0)
+        self.assertFalse(AudioCompaction.objects.exists())
+
+    def test_interrupted_run_resumes_with_remaining_sources(self):
+        from . import compaction
+        names = [self._source(seconds) for seconds in (4, 5, 6)]
+        for name in names:
+            make_transcript(self.user, 'lecture.wav', file=name, status='completed')
+
+        real_encode = compaction.encode_opus
+        calls = []
+
+        def encode_then_crash(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            real_encode(*args)
+
+        with patch('apps.transcriber.compaction.encode_opus', side_effect=encode_then_crash):
+            with self.assertRaises(KeyboardInterrupt):
+                compact_audio()
+
+        self.assertEqual(AudioCompaction.objects.count(), 1)
+        self.assertEqual(os.listdir(staging_directory()), [])
+
+        self.assertEqual(compact_audio()['compacted'], 2)
+        self.assertEqual(
+            sorted(Transcript.objects.values_list('file', flat=True)),
+            sorted(AudioCompaction.objects.values_list('compact_name', flat=True)),
+        )
+
+
+@override_settings(WHISPER_BATCHING=True, WHISPER_BATCH_SIZE=3, WHISPER_BATCH_MAX_WAIT_SECONDS=2)
+class BatchedTranscriptionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+
+    @patch('apps.transcriber.views.transcribe_batch_signature')
+    @patch('apps.transcriber.views.transcribe_audio_signature')
+    @patch('apps.transcriber.serializers.probe_duration')
+    def test_short_uploads_are_queued_for_a_batch(self, mock_probe, mock_single, mock_batch):
+        refresh = RefreshToken.for_user(self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {refresh.access_token}'
+
+        for duration, content in ((12.0, b'voice note'), (95.0, b'interview')):
+            mock_probe.return_value = duration
+            upload = SimpleUploadedFile('note.ogg', content, content_type='audio/ogg')
+            self.client.post(reverse('transcript-list'), {'file': upload}, format='multipart')
+
+        short, long = Transcript.objects.order_by('created_at')
+        self.assertEqual(short.duration, 12.0)
+        self.assertTrue(short.awaiting_batch)
+        self.assertFalse(long.awaiting_batch)
+        mock_batch.return_value.delay.assert_called_once_with()
+        mock_single.assert_called_once_with(long.id, ignore_similar=False, queue='transcribe.short')
+
+    def test_partial_batch_is_topped_up_until_the_deadline(self):
+        first = make_transcript(self.user, 'a.ogg', duration=12.0, awaiting_batch=True)
+        second = make_transcript(self.user, 'b.ogg', duration=12.0, awaiting_batch=True)
+        now = [0.0]
+        late = []
+
+        def sleep(seconds):
+            now[0] += seconds
+            if not late:
+                late.append(make_transcript(self.user, 'c.ogg', duration=12.0, awaiting_batch=True))
+
+        batch = claim_batch(clock=lambda: now[0], sleep=sleep)
+
+        self.assertEqual([t.id for t in batch], [first.id, second.id, late[0].id])
+        self.assertFalse(Transcript.objects.filter(awaiting_batch=True).exists())
+        self.assertEqual(set(Transcript.objects.values_list('status', flat=True)), {'processing'})
+
+    def test_wait_is_bounded_and_empty_queue_returns_at_once(self):
+        make_transcript(self.user, 'a.ogg', duration=12.0, awaiting_batch=True)
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        self.assertEqual(len(claim_batch(clock=lambda: now[0], sleep=sleep)), 1)
+        self.assertLessEqual(now[0], 2 + 0.2)
+
+        sleeps.clear()
+        self.assertEqual(claim_batch(clock=lambda: now[0], sleep=sleep), [])
+        self.assertEqual(sleeps, [])
+
+    @patch('apps.transcriber.tasks.get_model')
+    @patch('apps.transcriber.batching.transcribe_batch')
+    @patch('apps.transcriber.tasks.load_audio')
+    def test_batch_results_saved_per_transcript(self, mock_load_audio, mock_transcribe_batch, mock_get_model):
+        from .tasks import transcribe_batch_task
+        clips = [
+            make_transcript(self.user, 'a.ogg', duration=12.0, awaiting_batch=True),
+            make_transcript(self.user, 'b.ogg', duration=12.0, awaiting_batch=True),
+            make_transcript(self.user, 'long.ogg', duration=600),
+        ]
+        mock_load_audio.return_value = np.zeros(12 * SAMPLE_RATE, dtype=np.float32)
+        mock_transcribe_batch.side_effect = lambda model, audio: [
+            {'text': f' clip {i}', 'language': 'en', 'segments': [{'start': 0.0, 'end': 12.0, 'text': f' clip {i}'}]}
+            for i in range(len(audio))
+        ]
+
+        result = transcribe_batch_task()
+
+        self.assertEqual(result['transcripts'], [clips[0].id, clips[1].id])
+        self.assertEqual(len(mock_transcribe_batch.call_args[0][1]), 2)
+        for index, clip in enumerate(clips[:2]):
+            clip.refresh_from_db()
+            self.assertEqual(clip.status, 'completed')
+            self.assertEqual(clip.raw_text, f' clip {index}')
+            self.assertEqual(clip.segments.count(), 1)
+        clips[2].refresh_from_db()
+        self.assertEqual(clips[2].status, 'pending')
+
+        self.assertEqual(transcribe_batch_task()['status'], 'empty')
+
+    def test_decode_results_follow_whisper_thresholds(self):
+        def decoded(**fields):
+            values = {'text': ' hi', 'language': 'en', 'avg_logprob': -0.3, 'no_speech_prob': 0.1, 'compression_ratio': 1.2}
+            values.update(fields)
+            return SimpleNamespace(**values)
+
+        self.assertFalse(_needs_fallback(decoded()))
+        self.assertTrue(_needs_fallback(decoded(compression_ratio=3.0)))
+        self.assertTrue(_needs_fallback(decoded(avg_logprob=-1.5)))
+        self.assertFalse(_needs_fallback(decoded(avg_logprob=-1.5, no_speech_prob=0.9)))
+
+        self.assertEqual(_as_transcribe_result(decoded(avg_logprob=-1.5, no_speech_prob=0.9), 8.0)['segments'], [])
+        segment = _as_transcribe_result(decoded(), 8.0)['segments'][0]
+        self.assertEqual((segment['start'], segment['end'], segment['text']), (0.0, 8.0, ' hi'))
+
+
+@override_settings(WHISPER_LONG_MIN_SECONDS=600, WHISPER_REALTIME_FACTOR=0.5,
+                   WHISPER_SHORT_CONCURRENCY=1, WHISPER_LONG_CONCURRENCY=2)
+class QueueRoutingTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        refresh = RefreshToken.for_user(self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {refresh.access_token}'
+
+    @patch('apps.transcriber.views.transcribe_audio_signature')
+    @patch('apps.transcriber.serializers.probe_duration')
+    def test_uploads_are_routed_by_probed_duration(self, mock_probe, mock_signature):
+        for duration, content in ((120.0, b'voice memo'), (5400.0, b'lecture'), (None, b'unreadable')):
+            mock_probe.return_value = duration
+            upload = SimpleUploadedFile('a.mp3', content, content_type='audio/mpeg')
+            response = self.client.post(reverse('transcript-list'), {'file': upload}, format='multipart')
+            self.assertEqual(response.data['duration'], duration)
+
+        queues = [call.kwargs['queue'] for call in mock_signature.call_args_list]
+        self.assertEqual(queues, ['transcribe.short', 'transcribe.long', 'transcribe.long'])
+
+    def test_eta_counts_only_work_ahead_on_the_same_queue(self):
+        make_transcript(self.user, 'running lecture.mp3', duration=3600.0, status='processing', decoded_until=1600.0)
+        queued_memo = make_transcript(self.user, 'queued memo.mp3', duration=60.0)
+        parked = make_transcript(self.user, 'parked.mp3', duration=3000.0)
+        parked.similar_transcript = queued_memo
+        parked.save()
+        lecture = make_transcript(self.user, 'lecture.mp3', duration=1800.0)
+        memo = make_transcript(self.user, 'memo.mp3', duration=120.0)
+
+        # 2000 s of lecture ahead over two workers, plus its own 1800 s, at 0.5x real time
+        self.assertEqual(lecture.estimated_seconds_remaining(), (2000 / 2 + 1800) * 0.5)
+        # Only the 60 s memo is ahead on the short queue
+        self.assertEqual(memo.estimated_seconds_remaining(), (60 + 120) * 0.5)
+
+        response = self.client.get(reverse('transcript-detail', kwargs={'pk': memo.id}))
+        self.assertEqual(response.data['eta_seconds'], 90.0)
+
+    def test_eta_is_unknown_when_finished_or_without_duration(self):
+        done = make_transcript(self.user, 'done.mp3', duration=60.0, status='completed')
+        self.assertIsNone(done.estimated_seconds_remaining())
+        self.assertIsNone(make_transcript(self.user, 'unprobed.mp3', duration=None).estimated_seconds_remaining())
+        running = make_transcript(self.user, 'running.mp3', duration=100.0, status='processing', decoded_until=40.0)
+        self.assertEqual(running.estimated_seconds_remaining(), 30.0)
+
+
+TIER_MODELS = {'free': 'base', 'standard': 'small', 'premium': 'medium'}
+
+
+class ModelTierPolicyTest(SimpleTestCase):
+    def setUp(self):
+        self.policy = ModelPolicy(TIER_MODELS, backlog_steps=[3600, 14400], long_seconds=7200, min_model='base')
+
+    def test_model_steps_down_with_backlog_and_length(self):
+        self.assertEqual(self.policy.choose(600, 0, 'premium'), 'medium')
+        self.assertEqual(self.policy.choose(600, 5000, 'premium'), 'small')
+        self.assertEqual(self.policy.choose(600, 20000, 'premium'), 'base')
+        self.assertEqual(self.policy.choose(9000, 0, 'premium'), 'small')
+        # Never below the minimum, and unknown tiers get the default tier's model
+        self.assertEqual(self.policy.choose(9000, 20000, 'free'), 'base')
+        self.assertEqual(self.policy.choose(600, 0, None), 'small')
+
+    def test_peak_backlog_drains_faster_than_a_fixed_model(self):
+        # A peak hour with an upload every minute, then one lecture per hour overnight
+        durations, tiers = [60, 300, 1800, 3600], ['free', 'standard', 'premium']
+        peak = [(minute * 60, durations[minute % 4], tiers[minute % 3]) for minute in range(60)]
+        night = [(hour * 3600, 1800, 'standard') for hour in range(6, 12)]
+
+        adaptive = simulate(self.policy, peak, workers=2)
+        fixed = simulate(FixedPolicy('small'), peak, workers=2)
+        self.assertLess(adaptive['drain_seconds'], fixed['drain_seconds'] * 0.6)
+        self.assertLess(adaptive['max_wait_seconds'], fixed['max_wait_seconds'] * 0.6)
+        self.assertGreater(adaptive['models']['base'], adaptive['models'].get('medium', 0))
+
+        # Without a backlog every job gets its tier's model and finishes as soon as a fixed model would
+        quiet = simulate(self.policy, night, workers=2)
+        self.assertEqual(quiet['models'], {'small': 6})
+        self.assertEqual(quiet['drain_seconds'], simulate(FixedPolicy('small'), night, workers=2)['drain_seconds'])
+
+
+@override_settings(WHISPER_MODEL_POLICY=True, WHISPER_TIER_MODELS=TIER_MODELS, WHISPER_BACKLOG_STEPS=[3600],
+                   WHISPER_TIER_LONG_SECONDS=None, WHISPER_MIN_MODEL='base', WHISPER_SIMILAR_ACTION='off',
+                   WHISPER_PCM_CACHE_MB=0, WHISPER_UPGRADE_MAX_BACKLOG_SECONDS=600)
+class ModelTierTaskTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123', transcription_tier='premium',
+        )
+
+    @patch('apps.transcriber.tasks.get_model')
+    @patch('os.path.exists', return_value=True)
+    def test_task_records_the_chosen_model_and_the_upgrade(self, mock_exists, mock_get_model):
+        mock_get_model.return_value.transcribe.return_value = {'text': 'Hi.', 'language': 'en', 'segments': []}
+        from .tasks import transcribe_audio_task
+
+        quiet = make_transcript(self.user, 'quiet.mp3', upload=True, duration=300.0)
+        transcribe_audio_task(quiet.id)
+        quiet.refresh_from_db()
+        self.assertEqual((quiet.model_used, quiet.upgrade_model), ('medium', ''))
+
+        make_transcript(self.user, 'backlog.mp3', upload=True, duration=4000.0)
+        busy = make_transcript(self.user, 'busy.mp3', upload=True, duration=300.0)
+        transcribe_audio_task(busy.id)
+        busy.refresh_from_db()
+        self.assertEqual((busy.model_used, busy.upgrade_model), ('small', 'medium'))
+        mock_get_model.assert_called_with('small', 'cpu')
+
+        # An explicit upgrade run uses the requested model and clears the pending upgrade
+        transcribe_audio_task(busy.id, model_name='medium')
+        busy.refresh_from_db()
+        self.assertEqual((busy.model_used, busy.upgrade_model), ('medium', ''))
+
+    @patch('apps.transcriber.tasks.transcribe_audio_signature')
+    def test_upgrades_are_queued_only_while_there_is_capacity(self, mock_signature):
+        from .tasks import upgrade_transcripts
+
+        downgraded = make_transcript(
+            self.user, 'downgraded.mp3', upload=True, duration=300.0, status='completed',
+            model_used='small', upgrade_model='medium',
+        )
+        running = make_transcript(self.user, 'lecture.mp3', upload=True, duration=3600.0, status='processing')
+        self.assertEqual(upgrade_transcripts(), [])
+
+        running.status = 'completed'
+        running.save()
+        self.assertEqual(upgrade_transcripts(), [downgraded.id])
+        mock_signature.assert_called_once_with(
+            downgraded.id, ignore_similar=True, model_name='medium', queue='transcribe.short',
+        )
+        downgraded.refresh_from_db()
+        self.assertEqual(downgraded.status, 'pending')
+
+    @patch('apps.transcriber.views.transcribe_audio_signature')
+    def test_upgrade_action(self, mock_signature):
+        refresh = RefreshToken.for_user(self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {refresh.access_token}'
+        current = make_transcript(
+            self.user, 'current.mp3', upload=True, duration=300.0, status='completed', model_used='medium',
+        )
+        downgraded = make_transcript(
+            self.user, 'downgraded.mp3', upload=True, duration=300.0, status='completed',
+            model_used='small', upgrade_model='medium',
+        )
+
+        response = self.client.post(reverse('transcript-upgrade', kwargs={'pk': current.id}))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(reverse('transcript-upgrade', kwargs={'pk': downgraded.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'pending')
+        mock_signature.assert_called_once_with(
+            downgraded.id, ignore_similar=True, model_name='medium', queue='transcribe.short',
+        )
+
+
+class LanguageRoutingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+
+    def test_model_variants(self):
+        self.assertEqual(route_model('small', 'en'), 'small.en')
+        self.assertEqual(route_model('small.en', 'de'), 'small')
+        self.assertEqual(route_model('small', ''), 'small')
+        # large and turbo have no English-only checkpoint
+        self.assertEqual(english_variant('large-v3'), 'large-v3')
+        self.assertEqual(english_variant('turbo'), 'turbo')
+
+    @override_settings(WHISPER_LANGUAGE_ROUTING=True, WHISPER_MODEL='base', WHISPER_SIMILAR_ACTION='off',
+                       WHISPER_PCM_CACHE_MB=0, WHISPER_LANGUAGE_MIN_PROBABILITY=0.8)
+    @patch('apps.transcriber.tasks.load_audio_range', return_value=np.zeros(30 * SAMPLE_RATE, np.float32))
+    @patch('apps.transcriber.language.detect_language')
+    @patch('apps.transcriber.tasks.get_model')
+    @patch('os.path.exists', return_value=True)
+    def test_probe_routes_and_is_cached_on_the_transcript(self, mock_exists, mock_get_model, mock_detect, mock_range):
+        from .tasks import transcribe_audio_task
+        mock_get_model.return_value.transcribe.return_value = {'text': 'Hi.', 'language': 'en', 'segments': []}
+
+        mock_detect.return_value = ('en', 0.97)
+        english = make_transcript(self.user, 'english.mp3', upload=True)
+        transcribe_audio_task(english.id)
+        english.refresh_from_db()
+        self.assertEqual((english.language, english.model_used), ('en', 'base.en'))
+        mock_range.assert_called_once_with(english.file.path, 0, 30)
+        mock_get_model.assert_any_call('tiny', 'cpu')
+
+        # A retry uses the stored language without probing again
+        transcribe_audio_task(english.id)
+        self.assertEqual(mock_detect.call_count, 1)
+
+        mock_get_model.return_value.transcribe.return_value = {'text': 'Hallo.', 'language': 'de', 'segments': []}
+        for detected, expected_language in ((('de', 0.95), 'de'), (('en', 0.5), 'de')):
+            mock_detect.return_value = detected
+            other = make_transcript(self.user, f'other-{detected[1]}.mp3', upload=True)
+            transcribe_audio_task(other.id)
+            other.refresh_from_db()
+            self.assertEqual((other.language, other.model_used), (expected_language, 'base'))
+
+    def test_duplicates_made_with_the_english_checkpoint_are_reused(self):
+        make_transcript(
+            self.user, 'earlier.mp3', upload=True, status='completed', content_hash='a' * 64, model_used='base.en',
+        )
+        upload = make_transcript(self.user, 'upload.mp3', upload=True, content_hash='a' * 64)
+        self.assertEqual(upload.find_duplicate('base').title, 'earlier')
+        self.assertIsNone(upload.find_duplicate('small'))
+
+
+@override_settings(WHISPER_TWO_PASS=True, WHISPER_MODEL='small', WHISPER_DRAFT_MODEL='base', WHISPER_SIMILAR_ACTION='off',
+                   WHISPER_PCM_CACHE_MB=0, WHISPER_REFINE_MAX_BACKLOG_SECONDS=1800, WHISPER_UPGRADE_MAX_BACKLOG_SECONDS=600)
+class TwoPassTranscriptionTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        self.transcript = make_transcript(self.user, 'lecture.mp3', upload=True, duration=300.0)
+        self.models = {
+            name: MagicMock(**{'transcribe.return_value': {
+                'text': text, 'language': 'en', 'segments': [{'start': 0.0, 'end': 300.0, 'text': text, 'avg_logprob': -0.3}],
+            }})
+            for name, text in (('base', 'Draft text.'), ('small', 'Final text.'))
+        }
+
+    def _draft(self):
+        from .tasks import transcribe_audio_task
+        with patch('apps.transcriber.tasks.get_model', side_effect=lambda name, device: self.models[name]), \
+                patch('os.path.exists', return_value=True), \
+                patch('apps.transcriber.tasks.refine_transcript_task.apply_async') as mock_refine:
+            transcribe_audio_task(self.transcript.id)
+        self.transcript.refresh_from_db()
+        return mock_refine
+
+    def _refine(self):
+        from .tasks import refine_transcript_task
+        with patch('apps.transcriber.tasks.get_model', side_effect=lambda name, device: self.models[name]):
+            result = refine_transcript_task(self.transcript.id)
+        self.transcript.refresh_from_db()
+        return result
+
+    def test_draft_is_published_then_refined(self):
+        mock_refine = self._draft()
+
+        self.assertEqual(self.transcript.status, 'completed')
+        self.assertEqual(self.transcript.raw_text, 'Draft text.')
+        self.assertEqual(self.transcript.draft_text, 'Draft text.')
+        self.assertEqual((self.transcript.model_used, self.transcript.upgrade_model), ('base', 'small'))
+        self.assertTrue(self.transcript.is_draft)
+        mock_refine.assert_called_once_with((self.transcript.id,), queue='transcribe.refine')
+
+        self.assertEqual(self._refine()['status'], 'completed')
+        self.assertEqual(self.transcript.raw_text, 'Final text.')
+        self.assertEqual(self.transcript.draft_text, 'Draft text.')
+        self.assertEqual((self.transcript.model_used, self.transcript.upgrade_model), ('small', ''))
+        self.assertEqual(self.transcript.refinement, 'done')
+        self.assertEqual(list(self.transcript.segments.values_list('text', flat=True)), ['Final text.'])
+
+    @patch('apps.transcriber.tasks.transcribe_audio_signature')
+    def test_refinement_is_skipped_under_load_and_upgraded_later(self, mock_signature):
+        from .tasks import upgrade_transcripts
+        self._draft()
+        queued = make_transcript(self.user, 'queued.mp3', upload=True, duration=3600.0)
+
+        self.assertEqual(self._refine()['status'], 'skipped')
+        self.assertEqual((self.transcript.refinement, self.transcript.raw_text), ('skipped', 'Draft text.'))
+        self.assertEqual(upgrade_transcripts(), [])
+
+        queued.delete()
+        self.assertEqual(upgrade_transcripts(), [self.transcript.id])
+        mock_signature.assert_called_once_with(
+            self.transcript.id, ignore_similar=True, model_name='small', queue='transcribe.short',
+        )
+
+    def test_both_versions_are_queryable(self):
+        self._draft()
+        refresh = RefreshToken.for_user(self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {refresh.access_token}'
+
+        drafts = self.client.get(reverse('transcript-list'), {'refinement': 'pending'})
+        self.assertEqual([t['id'] for t in drafts.data], [self.transcript.id])
+
+        self._refine()
+        self.assertEqual(self.client.get(reverse('transcript-list'), {'refinement': 'pending'}).data, [])
+        detail = self.client.get(reverse('transcript-detail', kwargs={'pk': self.transcript.id})).data
+        self.assertEqual((detail['raw_text'], detail['draft_text']), ('Final text.', 'Draft text.'))
+        self.assertEqual((detail['draft_model'], detail['model_used']), ('base', 'small'))
+
+
+def scored_segments(logprobs, seconds=6.0):
+    return [
+        {'start': i * seconds, 'end': (i + 1) * seconds, 'text': f'part {i}', 'avg_logprob': logprob, 'no_speech_prob': 0.05}
+        for i, logprob in enumerate(logprobs)
+    ]
+
+
+@override_settings(WHISPER_REDECODE_LOGPROB_THRESHOLD=-1.0, WHISPER_REDECODE_NO_SPEECH_THRESHOLD=0.6,
+                   WHISPER_REDECODE_MAX_FRACTION=0.5, WHISPER_REDECODE_MODEL='medium', WHISPER_PCM_CACHE_MB=0)
+class SelectiveRedecodeTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+
+    def _completed(self, logprobs):
+        segments = scored_segments(logprobs)
+        transcript = make_transcript(
+            self.user, 't.mp3', status='completed', model_used='small', duration=segments[-1]['end'],
+            raw_text=' '.join(segment['text'] for segment in segments), completed_at=timezone.now(),
+        )
+        TranscriptSegment.objects.bulk_create(
+            TranscriptSegment.from_whisper(transcript, i, segment) for i, segment in enumerate(segments)
+        )
+        return transcript
+
+    def test_weak_speech_segments_are_grouped(self):
+        segments = scored_segments([-0.2, -1.5, -1.3, -0.3, -0.4, -2.0])
+        segments[4]['no_speech_prob'] = 0.9  # silence is not re-decoded
+        segments[4]['avg_logprob'] = -3.0
+        self.assertEqual(
+            [(r['start'], r['end'], r['first'], r['last']) for r in weak_regions(segments, -1.0, 0.6)],
+            [(6.0, 18.0, 1, 2), (30.0, 36.0, 5, 5)],
+        )
+
+    def test_only_better_decodes_are_spliced(self):
+        segments = scored_segments([-0.2, -1.5, -0.3, -1.4])
+        regions = weak_regions(segments, -1.0, 0.6)
+        results = iter([
+            {'segments': [{'start': 0.5, 'end': 6.0, 'text': ' clearer', 'avg_logprob': -0.4}]},
+            {'segments': [{'start': 0.0, 'end': 6.0, 'text': ' worse', 'avg_logprob': -2.5}]},
+        ])
+        spliced, improved = redecode_regions(segments, regions, lambda start, end: next(results))
+
+        self.assertEqual([s['text'] for s in spliced], ['part 0', ' clearer', 'part 2', 'part 3'])
+        self.assertEqual(spliced[1]['start'], 6.5)
+        self.assertEqual(improved, regions[:1])
+
+    @patch('apps.transcriber.tasks.load_audio_range', side_effect=lambda path, start, end: np.zeros(int((end - start) * SAMPLE_RATE), np.float32))
+    @patch('apps.transcriber.tasks.get_model')
+    def test_task_redecodes_weak_regions_and_recomputes_confidence(self, mock_get_model, mock_range):
+        from .tasks import redecode_weak_segments_task
+        transcript = self._completed([-0.2, -0.3, -1.6, -1.2, -0.2, -0.3, -0.2, -1.8, -0.1, -0.2])
+        mock_get_model.return_value.transcribe.side_effect = lambda clip, **options: {'segments': [
+            {'start': 0.0, 'end': len(clip) / SAMPLE_RATE, 'text': ' fixed', 'avg_logprob': -0.5, 'no_speech_prob': 0.01},
+        ]}
+
+        report = redecode_weak_segments_task(transcript.id)
+
+        self.assertEqual(report['status'], 'completed')
+        self.assertEqual((report['regions'], report['improved']), (2, 2))
+        self.assertAlmostEqual(report['redecoded_fraction'], 18 / 60)
+        self.assertAlmostEqual(report['compute_saved'], 1 - 18 / 60)
+        mock_get_model.assert_called_once_with('medium', 'cpu')
+        self.assertEqual(mock_get_model.return_value.transcribe.call_args.kwargs['beam_size'], 5)
+        self.assertEqual([call.args[1:] for call in mock_range.call_args_list], [(12.0, 24.0), (42.0, 48.0)])
+
+        transcript.refresh_from_db()
+        self.assertEqual(transcript.raw_text, ' part 0 part 1 fixed part 4 part 5 part 6 fixed part 8 part 9')
+        self.assertAlmostEqual(transcript.confidence, (-0.2 - 0.3 - 0.5 - 0.2 - 0.3 - 0.2 - 0.5 - 0.1 - 0.2) / 9)
+        self.assertEqual(transcript.segments.count(), 9)
+
+    @patch('apps.transcriber.tasks.get_model')
+    def test_mostly_weak_transcripts_are_left_alone(self, mock_get_model):
+        from .tasks import redecode_weak_segments_task
+        transcript = self._completed([-1.5, -1.6, -0.2, -1.7])
+
+        report = redecode_weak_segments_task(transcript.id)
+
+        self.assertEqual(report['status'], 'skipped')
+        self.assertEqual(report['redecoded_fraction'], 0.75)
+        mock_get_model.assert_not_called()
+
+
+class VoiceActivityTest(SimpleTestCase):
+    def test_music_and_pauses_are_skipped_and_speech_kept(self):
+        audio, speech = synthetic_lecture(600, seed=3)
+        timeline = SpeechTimeline.detect(audio)
+
+        kept = sum(
+            max(0.0, min(end, speech_end) - max(start, speech_start))
+            for start, end in timeline.spans for speech_start, speech_end in speech
+        )
+        self.assertGreater(kept / sum(end - start for start, end in speech), 0.98)
+        self.assertGreater(kept / timeline.speech_seconds, 0.95)
+        self.assertGreater(timeline.skipped_ratio, 0.2)
+        self.assertGreater(timeline.spans[0][0], 28)  # the music intro
+
+    def test_timestamps_map_back_to_the_recording(self):
+        timeline = SpeechTimeline([(10.0, 20.0), (50.0, 55.0)], 60.0)
+        self.assertEqual(timeline.speech_seconds, 15.0)
+        self.assertEqual(timeline.to_original(0.0), 10.0)
+        self.assertEqual(timeline.to_original(10.0), 50.0)
+        self.assertEqual(timeline.to_original(10.0, end=True), 20.0)
+        self.assertEqual(timeline.to_original(14.0), 54.0)
+
+        result = timeline.restore({'text': ' a b', 'segments': [
+            {'start': 2.0, 'end': 10.0, 'text': ' a', 'words': [{'word': ' a', 'start': 2.0, 'end': 3.5}]},
+            {'start': 10.0, 'end': 15.0, 'text': ' b'},
+        ]})
+        self.assertEqual([(s['start'], s['end']) for s in result['segments']], [(12.0, 20.0), (50.0, 55.0)])
+        self.assertEqual((result['segments'][0]['words'][0]['start'], result['segments'][0]['words'][0]['end']), (12.0, 13.5))
+
+    @override_settings(WHISPER_VAD=True, WHISPER_CHUNKED=False, WHISPER_STREAMING=False)
+    @patch('apps.transcriber.tasks.get_model')
+    def test_only_speech_is_decoded(self, mock_get_model):
+        from .tasks import _transcribe
+        audio, speech = synthetic_lecture(240, seed=4)
+        mock_get_model.return_value.transcribe.side_effect = lambda clip: {
+            'text': ' talk', 'language': 'en',
+            'segments': [{'start': 0.0, 'end': len(clip) / SAMPLE_RATE, 'text': ' talk'}],
+        }
+
+        result = _transcribe(audio, 'base', 'cpu')
+
+        decoded = mock_get_model.return_value.transcribe.call_args.args[0]
+        self.assertLess(len(decoded), 0.8 * len(audio))
+        self.assertAlmostEqual(result['segments'][0]['start'], speech[0][0], delta=0.5)
+        self.assertAlmostEqual(result['segments'][0]['end'], speech[-1][1], delta=0.5)
+
+    @override_settings(WHISPER_VAD=True)
+    @patch('apps.transcriber.tasks.get_model')
+    def test_silent_recording_is_not_decoded(self, mock_get_model):
+        from .tasks import _transcribe
+        result = _transcribe(np.zeros(60 * SAMPLE_RATE, np.float32), 'base', 'cpu')
+        self.assertEqual(result['segments'], [])
+        mock_get_model.assert_not_called()
+
+
+class QuantizationTest(SimpleTestCase):
+    @override_settings(WHISPER_INT8_MODELS={'tiny', 'base'})
+    def test_listed_sizes_and_their_english_variants_are_quantized_on_cpu(self):
+        self.assertEqual(quantization_for('base', 'cpu'), 'int8')
+        self.assertEqual(quantization_for('base.en', 'cpu'), 'int8')
+        self.assertIsNone(quantization_for('small', 'cpu'))
+        self.assertIsNone(quantization_for('base', 'cuda'))
+
+    @override_settings(WHISPER_INT8_MODELS={'free'}, WHISPER_TIER_MODELS={'free': 'base', 'premium': 'medium'})
+    def test_tier_names_stand_for_their_model(self):
+        self.assertEqual(quantization_for('base', 'cpu'), 'int8')
+        self.assertIsNone(quantization_for('medium', 'cpu'))
+
+    @override_settings(WHISPER_INT8_MODELS=set())
+    def test_nothing_quantized_by_default(self):
+        self.assertIsNone(quantization_for('tiny', 'cpu'))
+
+    @override_settings(WHISPER_INT8_MODELS={'base'})
+    def test_quantized_and_fp32_models_are_cached_separately(self):
+        loader = MagicMock(side_effect=lambda name, device, **options: MagicMock(name=name))
+        with patch('apps.transcriber.registry.registry', ModelRegistry(memory_budget=1024, loader=loader)):
+            quantized = get_model('base', 'cpu')
+            self.assertIs(get_model('base', 'cpu'), quantized)
+            fp32 = get_model('base', 'cpu', quantize=None)
+
+        self.assertIsNot(quantized, fp32)
+        self.assertEqual(loader.call_args_list[0].kwargs, {'quantize': 'int8'})
+        self.assertEqual(loader.call_args_list[1].kwargs, {})
+
+    def test_word_error_rate(self):
+        self.assertEqual(word_error_rate('The cat sat.', 'the cat sat'), 0.0)
+        self.assertAlmostEqual(word_error_rate('the cat sat on the mat', 'the cat sat on a mat'), 1 / 6)
+        self.assertAlmostEqual(word_error_rate('one two three', 'one three'), 1 / 3)
+        self.assertEqual(word_error_rate('', ''), 0.0)
+
+
+class ThreadProfileTest(SimpleTestCase):
+    CPUS = list(range(8))
+
+    def test_cores_split_evenly_between_children(self):
+        self.assertEqual(plan_profile(0, 4, cpus=self.CPUS), ThreadProfile(2, 1, None))
+        self.assertEqual(plan_profile(0, 16, cpus=self.CPUS).intra_op, 1)
+        self.assertEqual(plan_profile(0, 4, threads=3, cpus=self.CPUS).intra_op, 3)
+
+    def test_pinned_children_get_disjoint_cpus(self):
+        blocks = [plan_profile(index, 4, pin=True, cpus=self.CPUS).cpus for index in range(4)]
+
+        self.assertEqual(blocks, [[0, 1], [2, 3], [4, 5], [6, 7]])
+
+    def test_pinned_blocks_wrap_when_oversubscribed(self):
+        self.assertEqual(plan_profile(2, 3, threads=4, pin=True, cpus=self.CPUS).cpus, [0, 1, 2, 3])
+
+    @patch('apps.transcriber.worker.apply_profile')
+    def test_profile_disabled_by_default(self, mock_apply):
+        with self.settings(WHISPER_THREAD_PROFILE=False):
+            apply_thread_profile()
+
+        mock_apply.assert_not_called()
+
+    @patch('apps.transcriber.worker._concurrency', None)
+    @patch('apps.transcriber.worker.child_index', return_value=1)
+    @patch('apps.transcriber.worker.apply_profile')
+    @patch('apps.transcriber.threads.usable_cpus', return_value=list(range(8)))
+    def test_children_apply_their_share_of_the_worker(self, mock_cpus, mock_apply, mock_index):
+        with self.settings(WHISPER_THREAD_PROFILE=True, WHISPER_WORKER_CONCURRENCY=0,
+                           WHISPER_WORKER_THREADS=0, WHISPER_WORKER_PIN_CPUS=True), \
+                patch.dict(os.environ):
+            plan_thread_profiles(sender=SimpleNamespace(concurrency=4))
+            self.assertEqual(os.environ['OMP_NUM_THREADS'], '2')
+            apply_thread_profile()
+
+        mock_apply.assert_called_once_with(ThreadProfile(2, 1, [2, 3]))
+
+
+class WorkerWarmupTest(SimpleTestCase):
+    def setUp(self):
+        self.model = MagicMock()
+        self.model.transcribe.return_value = {'text': '', 'segments': []}
+
+    @patch('apps.transcriber.warmup.get_model')
+    def test_models_loaded_and_exercised(self, mock_get_model):
+        mock_get_model.return_value = self.model
+
+        report = warm_up(['tiny', 'base'], 'cpu', timeout=60)
+
+        self.assertEqual([c.args for c in mock_get_model.call_args_list], [('tiny', 'cpu'), ('base', 'cpu')])
+        self.assertEqual(report['decoded'], ['tiny', 'base'])
+        self.assertTrue(report['complete'])
+        audio = self.model.transcribe.call_args.args[0]
+        self.assertEqual(len(audio), 2 * SAMPLE_RATE)
+
+    @patch('apps.transcriber.warmup.get_model')
+    def test_failed_model_is_skipped(self, mock_get_model):
+        mock_get_model.side_effect = [RuntimeError('no such model'), self.model]
+
+        report = warm_up(['missing', 'base'], 'cpu', timeout=60)
+
+        self.assertEqual(report['loaded'], ['base'])
+        self.assertEqual(report['errors'], ['missing'])
+        self.assertFalse(report['complete'])
+
+    @patch('apps.transcriber.warmup.get_model')
+    def test_no_step_started_after_timeout(self, mock_get_model):
+        report = warm_up(['base'], 'cpu', timeout=0)
+
+        mock_get_model.assert_not_called()
+        self.assertFalse(report['complete'])
+
+    @patch('apps.transcriber.warmup.get_model')
+    def test_hung_step_does_not_hold_up_the_worker(self, mock_get_model):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        mock_get_model.side_effect = lambda *args: release.wait(30) and self.model
+
+        start = time.monotonic()
+        report = warm_up(['base'], 'cpu', timeout=0.5)
+
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(report['loaded'], [])
+        self.assertFalse(report['complete'])
+
+    @patch('apps.transcriber.warmup.get_model')
+    def test_load_only_warm_up_decodes_nothing(self, mock_get_model):
+        mock_get_model.return_value = self.model
+
+        report = warm_up(['base'], 'cpu', timeout=60, decode=False)
+
+        self.assertEqual(report['loaded'], ['base'])
+        self.assertEqual(report['decoded'], [])
+        self.assertTrue(report['complete'])
+        self.model.transcribe.assert_not_called()
+
+    @patch('apps.transcriber.worker.warm_up')
+    def test_warm_up_runs_where_the_models_live(self, mock_warm_up):
+        with self.settings(WHISPER_WARMUP=True, WHISPER_PRELOAD_IN_PARENT=True, WHISPER_WARMUP_MODELS=['small']):
+            warm_up_child()
+            mock_warm_up.assert_not_called()
+            warm_up_parent()
+            mock_warm_up.assert_called_once_with(['small'], settings.WHISPER_DEVICE,
+                                                 settings.WHISPER_WARMUP_TIMEOUT_SECONDS, decode=False)
+
+        mock_warm_up.reset_mock()
+        with self.settings(WHISPER_WARMUP=True, WHISPER_PRELOAD_IN_PARENT=False, WHISPER_WARMUP_MODELS=[]):
+            warm_up_parent()
+            mock_warm_up.assert_not_called()
+            warm_up_child()
+            mock_warm_up.assert_called_once_with([settings.WHISPER_MODEL], settings.WHISPER_DEVICE,
+                                                 settings.WHISPER_WARMUP_TIMEOUT_SECONDS, decode=True)
+
+    @patch('apps.transcriber.worker.warm_up')
+    def test_warm_up_disabled_by_default(self, mock_warm_up):
+        with self.settings(WHISPER_WARMUP=False):
+            warm_up_parent()
+            warm_up_child()
+
+        mock_warm_up.assert_not_called()
+
+    def test_ready_file_written_when_consuming_and_removed_at_shutdown(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        worker = SimpleNamespace(hostname='short@host')
+
+        with self.settings(WHISPER_READY_FILE=os.path.join(directory, '{hostname}.ready')):
+            mark_ready(sender=worker)
+            path = os.path.join(directory, 'short@host.ready')
+            with open(path) as f:
+                self.assertEqual(json.load(f)['pid'], os.getpid())
+
+            clear_ready(sender=worker)
+            self.assertFalse(os.path.exists(path))
+
+    @patch('apps.transcriber.worker.READY_POLL_SECONDS', 0.01)
+    @patch('apps.transcriber.worker._hostname', 'short@host')
+    @patch('apps.transcriber.worker.warm_up', return_value={'complete': True})
+    def test_ready_file_waits_for_every_child_to_warm_up(self, mock_warm_up):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        worker = SimpleNamespace(hostname='short@host', pool=SimpleNamespace(num_processes=2))
+        path = os.path.join(directory, 'short@host.ready')
+
+        def wait_for_ready():
+            deadline = time.monotonic() + 5
+            while not os.path.exists(path) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            return os.path.exists(path)
+
+        with self.settings(WHISPER_WARMUP=True, WHISPER_PRELOAD_IN_PARENT=False,
+                           WHISPER_READY_FILE=os.path.join(directory, '{hostname}.ready')):
+            mark_ready(sender=worker)
+            with patch('apps.transcriber.worker.child_index', return_value=0):
+                warm_up_child()
+            time.sleep(0.1)
+            self.assertFalse(os.path.exists(path))
+
+            with patch('apps.transcriber.worker.child_index', return_value=1):
+                warm_up_child()
+            self.assertTrue(wait_for_ready())
+            with open(path) as f:
+                self.assertEqual([child['warmup'] for child in json.load(f)['children']], [{'complete': True}] * 2)
+
+            clear_ready(sender=worker)
+            self.assertEqual(os.listdir(directory), [])
+
+
+class EngineTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_settings = self.settings(MEDIA_ROOT=self.media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+
+    def test_engine_selected_by_setting(self):
+        self.assertEqual(get_engine().name, 'openai-whisper')
+        with self.settings(WHISPER_ENGINE='faster-whisper'):
+            self.assertEqual(get_engine().name, 'faster-whisper')
+        with self.settings(WHISPER_ENGINE='nope'):
+            with self.assertRaises(ValueError):
+                get_engine()
+
+    def test_incomplete_engine_cannot_be_created(self):
+        class LoadOnly(Engine):
+            name = 'load-only'
+
+            def load(self, name, device, quantize=None, **options):
+                return FakeModel(name)
+
+        with self.assertRaises(TypeError):
+            LoadOnly()
+
+    def test_fake_engine_is_deterministic(self):
+        audio, _ = synthetic_lecture(60, seed=1)
+        model = FakeModel('base')
+
+        first, second = model.transcribe(audio), model.transcribe(audio)
+
+        self.assertEqual(first, second)
+        self.assertTrue(first['segments'])
+        self.assertEqual(first['text'], ''.join(segment['text'] for segment in first['segments']))
+        # The music intro and silences get no segments
+        self.assertGreaterEqual(first['segments'][0]['start'], 0)
+        self.assertLessEqual(first['segments'][-1]['end'], 60)
+
+    def test_faster_whisper_results_take_the_common_shape(self):
+        word = SimpleNamespace(word=' hi', start=0.0, end=0.4, probability=0.9)
+        segment = SimpleNamespace(start=0.0, end=1.5, text=' hi there', avg_logprob=-0.3,
+                                  no_speech_prob=0.02, compression_ratio=1.1, words=[word])
+        inner = MagicMock()
+        inner.transcribe.return_value = (iter([segment]), SimpleNamespace(language='en', language_probability=0.97))
+
+        result = FasterWhisperModel(inner).transcribe(np.zeros(SAMPLE_RATE, np.float32), fp16=False,
+                                                      logprob_threshold=-1.0, word_timestamps=True)
+
+        self.assertEqual(inner.transcribe.call_args.kwargs, {
+            'log_prob_threshold': -1.0, 'word_timestamps': True, 'beam_size': 1,
+        })
+        self.assertEqual(result['text'], ' hi there')
+        self.assertEqual(result['language'], 'en')
+        self.assertEqual(result['segments'][0]['avg_logprob'], -0.3)
+        self.assertEqual(result['segments'][0]['words'][0]['word'], ' hi')
+
+    def test_faster_whisper_models_sized_by_their_files(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        os.makedirs(os.path.join(directory, 'tokenizer'))
+        for name, size in (('model.bin', 3000), ('config.json', 100), ('tokenizer/vocab.json', 400)):
+            with open(os.path.join(directory, name), 'wb') as f:
+                f.write(b'0' * size)
+
+        engine = get_engine('faster-whisper')
+
+        self.assertEqual(engine.model_nbytes(FasterWhisperModel(MagicMock(), directory)), 3500)
+        self.assertEqual(engine.model_nbytes(FasterWhisperModel(MagicMock())), 0)
+
+    @override_settings(WHISPER_ENGINE='fake')
+    def test_registry_evicts_fake_models_by_their_size(self):
+        engine = get_engine()
+        self.assertGreater(engine.model_nbytes(FakeModel('small')), engine.model_nbytes(FakeModel('base.en')))
+
+        registry = ModelRegistry(memory_budget=engine.model_nbytes(FakeModel('small')))
+        registry.get('base', 'cpu')
+        registry.get('small', 'cpu')
+
+        self.assertEqual(registry.keys(), [ModelRegistry.make_key('small', 'cpu')])
+
+    @override_settings(WHISPER_ENGINE='fake', WHISPER_SIMILAR_ACTION='off', WHISPER_PCM_CACHE_MB=0)
+    def test_pipeline_runs_on_the_fake_engine(self):
+        directory = os.path.join(self.media.name, 'transcriber')
+        os.makedirs(directory)
+        path = write_synthetic_audio(directory, 20, extension='wav')
+        transcript = make_transcript(self.user, 'fake.wav', file=os.path.relpath(path, self.media.name))
+
+        with patch('apps.transcriber.registry.registry', ModelRegistry(memory_budget=1024)):
+            from .tasks import transcribe_audio_task
+            result = transcribe_audio_task(transcript.id)
+
+        transcript.refresh_from_db()
+        self.assertEqual(result['status'], 'completed')
+        self.assertEqual(transcript.model_used, settings.WHISPER_MODEL)
+        self.assertEqual(transcript.raw_text, FakeModel(settings.WHISPER_MODEL).transcribe(load_audio(path))['text'])
+        self.assertEqual(transcript.segments.count(), 4)
+
+
+class TranscriptionBenchmarkTest(TestCase):
+    def row(self, **metrics):
+        return dict({'engine': 'fake', 'model': 'base', 'fixture': 'lecture_30s.wav'}, **metrics)
+
+    def test_regressions_beyond_threshold_reported(self):
+        baseline = [self.row(rtf=0.10, cpu_seconds=2.0, peak_rss_mb=500)]
+        results = [self.row(rtf=0.105, cpu_seconds=3.0, peak_rss_mb=450)]
+
+        regressions = compare_to_baseline(results, baseline, threshold=0.1)
+
+        self.assertEqual([r['metric'] for r in regressions], ['cpu_seconds'])
+        self.assertEqual(regressions[0]['change'], 0.5)
+
+    def test_growth_within_the_noise_floor_not_reported(self):
+        baseline = [self.row(rtf=0.002, cpu_seconds=0.05, peak_rss_mb=118)]
+        results = [self.row(rtf=0.003, cpu_seconds=0.08, peak_rss_mb=131)]
+
+        self.assertEqual(compare_to_baseline(results, baseline, threshold=0.1), [])
+        self.assertEqual(len(compare_to_baseline(results, baseline, threshold=0.1, min_deltas={})), 3)
+
+    def test_rows_missing_from_baseline_not_compared(self):
+        results = [self.row(rtf=1.0), dict(self.row(rtf=1.0), model='small')]
+
+        self.assertEqual(compare_to_baseline(results, [self.row(rtf=1.0)], threshold=0.1), [])
+
+    def run_benchmark(self, *args):
+        out = StringIO()
+        # The tests already run on a test database, which stands in for the throwaway one
+        with patch.object(connection.creation, 'create_test_db', return_value='configured') as create, \
+                patch.object(connection.creation, 'destroy_test_db') as destroy:
+            call_command('bench_transcribe', '--engines', 'fake', '--lengths', '5,20', *args, stdout=out)
+        create.assert_called_once()
+        destroy.assert_called_once_with('configured', verbosity=0)
+        return json.loads(out.getvalue())
+
+    def test_fixtures_run_through_the_task_and_are_not_kept(self):
+        report = self.run_benchmark()
+
+        self.assertEqual([row['fixture'] for row in report['results']], ['lecture_5s.wav', 'lecture_20s.wav'])
+        for row in report['results']:
+            self.assertEqual(row['engine'], 'fake')
+            self.assertGreater(row['peak_rss_mb'], 0)
+            self.assertAlmostEqual(row['rtf'], row['decode_seconds'] / row['audio_seconds'], places=2)
+        self.assertFalse(Transcript.objects.exists())
+
+    def test_fixture_directory_left_untouched(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        clip = write_synthetic_audio(directory, 6, extension='webm')
+        with open(clip, 'rb') as f:
+            original = f.read()
+
+        with self.settings(INGEST_EXTRACT_AUDIO=True, WHISPER_PCM_CACHE_MB=64):
+            report = self.run_benchmark('--fixtures', directory)
+
+        self.assertEqual([row['fixture'] for row in report['results']], [os.path.basename(clip)])
+        self.assertEqual(os.listdir(directory), [os.path.basename(clip)])
+        with open(clip, 'rb') as f:
+            self.assertEqual(f.read(), original)
+
+    def test_regression_against_baseline_fails(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        baseline = os.path.join(directory, 'baseline.json')
+        report = self.run_benchmark('--output', baseline)
+        for row in report['results']:
+            row['rtf'] /= 100
+        with open(baseline, 'w') as f:
+            json.dump(report, f)
+
+        with self.assertRaises(CommandError):
+            self.run_benchmark('--baseline', baseline, '--metrics', 'rtf', '--min-delta', 'rtf=0')
+
+    def test_identical_runs_pass_against_each_other(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        baseline = os.path.join(directory, 'baseline.json')
+        self.run_benchmark('--output', baseline)
+
+        report = self.run_benchmark('--baseline', baseline)
+
+        self.assertEqual(report['regressions'], [])
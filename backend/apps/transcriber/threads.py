@@ -0,0 +1,87 @@
+"""
+Thread budgets for transcription worker processes.
+
+torch sizes its intra-op pool to every core of the machine, and so do the
+OpenMP/MKL runtimes underneath it. With several Celery children on one box
+each child then runs a full set of threads, the cores are oversubscribed
+many times over and aggregate throughput drops below that of fewer
+children. A ``ThreadProfile`` gives every child its share instead:
+``cores // concurrency`` intra-op threads (or ``WHISPER_WORKER_THREADS``),
+``WHISPER_WORKER_INTEROP_THREADS`` inter-op threads and, with
+``WHISPER_WORKER_PIN_CPUS``, a disjoint set of CPUs to run on.
+"""
+from collections import namedtuple
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Thread counts read by the OpenMP, MKL and OpenBLAS runtimes when they start
+THREAD_ENVIRONMENT = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+ThreadProfile = namedtuple('ThreadProfile', ['intra_op', 'inter_op', 'cpus'])
+
+
+def usable_cpus():
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def plan_profile(index, concurrency, threads=0, inter_op=1, pin=False, cpus=None):
+    """
+    The profile of child ``index`` (0-based) of ``concurrency`` children.
+
+    ``threads`` of 0 splits the cores evenly. Pinned children get
+    consecutive, disjoint blocks of ``threads`` CPUs while there are enough
+    of them; beyond that the blocks wrap around and are shared.
+    """
+    cpus = list(cpus) if cpus is not None else usable_cpus()
+    concurrency = max(1, concurrency)
+    threads = threads or max(1, len(cpus) // concurrency)
+    if not pin:
+        return ThreadProfile(threads, inter_op, None)
+
+    start = (index * threads) % len(cpus)
+    block = [cpus[(start + offset) % len(cpus)] for offset in range(min(threads, len(cpus)))]
+    return ThreadProfile(threads, inter_op, sorted(block))
+
+
+def thread_environment(profile):
+    return {name: str(profile.intra_op) for name in THREAD_ENVIRONMENT}
+
+
+def apply_profile(profile):
+    """
+    Apply a profile to the current process.
+
+    The environment only takes effect for runtimes that have not started yet,
+    so it should be set before torch is first used in the process; torch's
+    own thread counts are set directly. torch only accepts the inter-op count
+    before its inter-op pool has started, which a preloaded parent may already
+    have done, so failing to set it is logged and ignored. Engines without
+    torch size their pools from the environment alone.
+    """
+    os.environ.update(thread_environment(profile))
+    if profile.cpus is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, profile.cpus)
+
+    try:
+        import torch
+    except ImportError:
+        return
+
+    torch.set_num_threads(profile.intra_op)
+    try:
+        torch.set_num_interop_threads(profile.inter_op)
+    except RuntimeError as e:
+        logger.warning(f"Could not set inter-op threads in process {os.getpid()}: {e}")
+
+
+def child_index():
+    """Index of the current prefork pool child (0 outside a pool)"""
+    from billiard.process import current_process
+
+    return getattr(current_process(), 'index', None) or 0
+
@@ -0,0 +1,150 @@
+"""
+Per-job choice of the Whisper model size.
+
+With ``WHISPER_MODEL_POLICY`` off every job uses ``WHISPER_MODEL``. With it on,
+a job starts from the model of its owner's tier (``WHISPER_TIER_MODELS``) and
+moves one size down for every ``WHISPER_BACKLOG_STEPS`` threshold that the
+backlog exceeds (seconds of audio queued or running on other jobs), and once
+more if the recording is longer than ``WHISPER_TIER_LONG_SECONDS``, but never
+below ``WHISPER_MIN_MODEL``. An idle system therefore runs every tier's model,
+and a burst is worked off with smaller, faster ones.
+
+Transcripts made with a smaller model than their tier's remember it in
+``upgrade_model``; the periodic upgrade job re-runs them once the backlog is
+below ``WHISPER_UPGRADE_MAX_BACKLOG_SECONDS``.
+"""
+from collections import Counter
+from django.conf import settings
+
+LADDER = ['tiny', 'base', 'small', 'medium', 'large']
+
+# Rough CPU seconds of work per second of audio, only used by simulate()
+REALTIME_FACTORS = {'tiny': 0.05, 'base': 0.1, 'small': 0.3, 'medium': 0.8, 'large': 1.6}
+
+
+def model_rank(name):
+    """Position of a model name (including .en and versioned variants) on the ladder"""
+    base = name.split('.')[0]
+    if base == 'turbo':
+        return LADDER.index('large')
+    for rank, size in enumerate(LADDER):
+        if base == size or base.startswith(f'{size}-'):
+            return rank
+    return LADDER.index('base')
+
+
+class ModelPolicy:
+    def __init__(self, tier_models, default_tier='standard', backlog_steps=(), long_seconds=None, min_model='tiny'):
+        self.tier_models = dict(tier_models)
+        self.default_tier = default_tier
+        self.backlog_steps = sorted(backlog_steps)
+        self.long_seconds = long_seconds
+        self.min_model = min_model
+
+    def ideal(self, tier=None):
+        """The model a tier gets when there is capacity for it"""
+        tier = tier if tier in self.tier_models else self.default_tier
+        return self.tier_models.get(tier, getattr(settings, 'WHISPER_MODEL', 'base'))
+
+    def choose(self, duration, backlog_seconds, tier=None):
+        """Model for a job of ``duration`` seconds with ``backlog_seconds`` of other work outstanding"""
+        ideal = self.ideal(tier)
+        steps = sum(1 for threshold in self.backlog_steps if backlog_seconds >= threshold)
+        if self.long_seconds and duration is not None and duration >= self.long_seconds:
+            steps += 1
+        if not steps:
+            return ideal
+
+        rank = max(model_rank(ideal) - steps, model_rank(self.min_model))
+        return ideal if rank >= model_rank(ideal) else LADDER[rank]
+
+
+class FixedPolicy:
+    """Every job uses the same model, as with the policy disabled"""
+
+    def __init__(self, model):
+        self.model = model
+
+    def ideal(self, tier=None):
+        return self.model
+
+    def choose(self, duration, backlog_seconds, tier=None):
+        return self.model
+
+
+def get_policy():
+    if not getattr(settings, 'WHISPER_MODEL_POLICY', False):
+        return FixedPolicy(getattr(settings, 'WHISPER_MODEL', 'base'))
+    return ModelPolicy(
+        getattr(settings, 'WHISPER_TIER_MODELS', {}),
+        default_tier=getattr(settings, 'WHISPER_DEFAULT_TIER', 'standard'),
+        backlog_steps=getattr(settings, 'WHISPER_BACKLOG_STEPS', ()),
+        long_seconds=getattr(settings, 'WHISPER_TIER_LONG_SECONDS', None),
+        min_model=getattr(settings, 'WHISPER_MIN_MODEL', 'tiny'),
+    )
+
+
+def user_tier(user):
+    return getattr(user, 'transcription_tier', None)
+
+
+def default_model(user):
+    """The model a user's uploads are transcribed with when there is capacity"""
+    return get_policy().ideal(user_tier(user))
+
+
+def choose_model(transcript, policy=None):
+    """
+    Model for a transcript's next run, and the larger model to upgrade it to
+    later ('' if it already gets its tier's model).
+    """
+    from .models import Transcript
+
+    policy = policy or get_policy()
+    backlog = Transcript.queued_audio_seconds(exclude_id=transcript.id)
+    model = policy.choose(transcript.duration, backlog, user_tier(transcript.user))
+    return model, upgrade_target(transcript.user, model, policy)
+
+
+def upgrade_target(user, model_name, policy=None):
+    """The user's tier model if it is larger than ``model_name``, else ''"""
+    ideal = (policy or get_policy()).ideal(user_tier(user))
+    return ideal if model_rank(ideal) > model_rank(model_name) else ''
+
+
+def simulate(policy, arrivals, workers=1, realtime_factors=None):
+    """
+    Replay an arrival trace through ``workers`` first-come-first-served workers.
+
+    ``arrivals`` are ``(time, duration, tier)`` tuples. Each job's model is
+    chosen when it starts, from the audio of the jobs that have arrived and not
+    finished by then, as ``transcribe_audio_task`` does. Returns the time the
+    last job finishes (``drain_seconds``), the longest wait for a job to start
+    and the number of jobs per model.
+    """
+    factors = realtime_factors or REALTIME_FACTORS
+    arrivals = sorted(arrivals, key=lambda job: job[0])
+    free_at = [0.0] * workers
+    finished = []  # (finish, duration) of started jobs
+    models = Counter()
+    max_wait = 0.0
+
+    for index, (arrival, duration, tier) in enumerate(arrivals):
+        worker = min(range(workers), key=free_at.__getitem__)
+        start = max(arrival, free_at[worker])
+
+        backlog = sum(d for finish, d in finished if finish > start)
+        backlog += sum(job[1] for job in arrivals[index + 1:] if job[0] <= start)
+        model = policy.choose(duration, backlog, tier)
+
+        finish = start + duration * factors[LADDER[model_rank(model)]]
+        free_at[worker] = finish
+        finished.append((finish, duration))
+        models[model] += 1
+        max_wait = max(max_wait, start - arrival)
+
+    return {
+        'drain_seconds': max((finish for finish, _ in finished), default=0.0),
+        'max_wait_seconds': max_wait,
+        'models': dict(models),
+    }
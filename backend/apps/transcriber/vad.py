@@ -0,0 +1,172 @@
+"""
+Voice-activity detection that keeps Whisper off silence and music.
+
+Whisper spends the same decoder time on a minute of silence or pre-roll
+music as on a minute of speech, and tends to hallucinate text into it. The
+detector here looks at 30 ms frames of the decoded 16 kHz audio and calls a
+frame speech when it is
+
+- loud: well above the recording's own noise floor,
+- in the speech band: most of its energy lies between 200 and 4000 Hz,
+- modulated: the loudness around it fluctuates at syllable rate, which
+  sustained music, hum and steady noise do not.
+
+Speech frames are joined into spans (bridging short pauses and padding the
+edges), the spans are concatenated, and Whisper decodes only that. A
+``SpeechTimeline`` maps the result's timestamps back onto the original
+recording.
+
+Everything here is plain NumPy and runs fully offline.
+"""
+from bisect import bisect_left, bisect_right
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_LENGTH = 480  # 30 ms
+FRAME_SECONDS = FRAME_LENGTH / SAMPLE_RATE
+BLOCK_FRAMES = 10000  # frames per FFT block, bounding memory on long recordings
+SPEECH_BAND = (200, 4000)
+NOISE_PERCENTILE = 10
+ABSOLUTE_FLOOR_DB = -60
+MODULATION_SECONDS = 1.0
+
+_FREQS = np.fft.rfftfreq(FRAME_LENGTH, 1 / SAMPLE_RATE)
+_IN_BAND = (_FREQS >= SPEECH_BAND[0]) & (_FREQS <= SPEECH_BAND[1])
+_WINDOW = np.hanning(FRAME_LENGTH).astype(np.float32)
+
+
+def frame_features(audio):
+    """Per-frame energy in dB and fraction of spectral energy in the speech band"""
+    count = len(audio) // FRAME_LENGTH
+    energy = np.empty(count, np.float32)
+    band_ratio = np.empty(count, np.float32)
+
+    for start in range(0, count, BLOCK_FRAMES):
+        stop = min(count, start + BLOCK_FRAMES)
+        frames = np.asarray(audio[start * FRAME_LENGTH:stop * FRAME_LENGTH], np.float32).reshape(-1, FRAME_LENGTH)
+        energy[start:stop] = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+        power = np.abs(np.fft.rfft(frames * _WINDOW, axis=1)) ** 2
+        band_ratio[start:stop] = power[:, _IN_BAND].sum(axis=1) / (power.sum(axis=1) + 1e-10)
+
+    return energy, band_ratio
+
+
+def _moving_std(values, width):
+    if len(values) == 0:
+        return values
+    width = max(1, min(width, len(values)))
+    kernel = np.ones(width) / width
+    # Reflected edges, so the start and end of the recording do not look modulated
+    padded = np.pad(values.astype(np.float64), (width // 2, width - 1 - width // 2), mode='reflect')
+    mean = np.convolve(padded, kernel, mode='valid')
+    square = np.convolve(padded ** 2, kernel, mode='valid')
+    return np.sqrt(np.maximum(square - mean ** 2, 0))
+
+
+def speech_frames(audio, margin_db=12.0, min_band_ratio=0.6, min_modulation_db=3.0):
+    """Boolean mask of the 30 ms frames that look like speech"""
+    energy, band_ratio = frame_features(audio)
+    if len(energy) == 0:
+        return np.zeros(0, bool)
+
+    threshold = max(np.percentile(energy, NOISE_PERCENTILE) + margin_db, ABSOLUTE_FLOOR_DB)
+    modulation = _moving_std(energy, int(MODULATION_SECONDS / FRAME_SECONDS))
+    return (energy > threshold) & (band_ratio >= min_band_ratio) & (modulation >= min_modulation_db)
+
+
+def speech_spans(mask, min_speech=0.25, min_silence=1.0, pad=0.2, total=None):
+    """
+    ``[(start, end)]`` seconds of speech from a frame mask: gaps shorter than
+    ``min_silence`` are bridged, runs shorter than ``min_speech`` dropped and
+    every span padded by ``pad`` on both sides.
+    """
+    total = total if total is not None else len(mask) * FRAME_SECONDS
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], mask.astype(np.int8), [0]])))
+    runs = [[start * FRAME_SECONDS, end * FRAME_SECONDS] for start, end in zip(edges[::2], edges[1::2])]
+
+    bridged = []
+    for run in runs:
+        if bridged and run[0] - bridged[-1][1] < min_silence:
+            bridged[-1][1] = run[1]
+        else:
+            bridged.append(run)
+
+    spans = []
+    for start, end in bridged:
+        if end - start < min_speech:
+            continue
+        start, end = max(0.0, start - pad), min(total, end + pad)
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+class SpeechTimeline:
+    """The speech spans of a recording and the mapping between both timelines"""
+
+    def __init__(self, spans, total_seconds):
+        self.spans = [(float(start), float(end)) for start, end in spans]
+        self.total_seconds = total_seconds
+        self.compact_starts = []
+        position = 0.0
+        for start, end in self.spans:
+            self.compact_starts.append(position)
+            position += end - start
+        self.speech_seconds = position
+
+    @classmethod
+    def detect(cls, audio, min_speech=0.25, min_silence=1.0, pad=0.2, **thresholds):
+        total = len(audio) / SAMPLE_RATE
+        spans = speech_spans(speech_frames(audio, **thresholds), min_speech, min_silence, pad, total=total)
+        return cls(spans, total)
+
+    @property
+    def skipped_ratio(self):
+        return 1 - self.speech_seconds / self.total_seconds if self.total_seconds else 0.0
+
+    def compact(self, audio):
+        """The speech spans of ``audio`` back to back"""
+        if not self.spans:
+            return np.zeros(0, np.float32)
+        return np.concatenate([
+            audio[int(round(start * SAMPLE_RATE)):int(round(end * SAMPLE_RATE))] for start, end in self.spans
+        ])
+
+    def to_original(self, t, end=False):
+        """
+        A time on the compacted timeline on the original one. ``end`` resolves
+        a time exactly at a splice to the end of the earlier span rather than
+        the start of the later one.
+        """
+        if not self.spans:
+            return t
+        find = bisect_left if end else bisect_right
+        index = min(max(find(self.compact_starts, t) - 1, 0), len(self.spans) - 1)
+        start, stop = self.spans[index]
+        return min(start + max(t - self.compact_starts[index], 0.0), stop)
+
+    def _restore_segment(self, segment):
+        segment = dict(segment)
+        segment['start'] = self.to_original(segment['start'])
+        segment['end'] = self.to_original(segment['end'], end=True)
+        if segment.get('words'):
+            segment['words'] = [
+                dict(word, start=self.to_original(word['start']), end=self.to_original(word['end'], end=True))
+                for word in segment['words']
+            ]
+        return segment
+
+    def restore(self, result):
+        """A Whisper result of the compacted audio on the original timeline"""
+        return dict(result, segments=[self._restore_segment(segment) for segment in result.get('segments', [])])
+
+    def wrap_progress(self, on_progress):
+        """An ``on_progress(segments, decoded_until)`` callback that reports original times"""
+        if on_progress is None:
+            return None
+
+        def report(segments, decoded_until):
+            on_progress([self._restore_segment(segment) for segment in segments], self.to_original(decoded_until, end=True))
+        return report
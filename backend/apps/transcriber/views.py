@@ -2,17 +2,30 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
 from .models import Transcript
-from .serializers import TranscriptUploadSerializer, TranscriptSerializer, TranscriptListSerializer
-from .tasks import transcribe_audio_task
+from .serializers import (
+    TranscriptUploadSerializer, TranscriptSerializer, TranscriptListSerializer, TranscriptSegmentSerializer
+)
+from .signatures import transcribe_audio_signature, transcribe_batch_signature, transcription_queue
+from .batching import is_batchable
+
+class SegmentPagination(PageNumberPagination):
+    page_size = 200
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
 
 class TranscriptViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
 
     def get_queryset(self):
-        return Transcript.objects.filter(user=self.request.user)
+        queryset = Transcript.objects.filter(user=self.request.user)
+        # e.g. ?refinement=pending for transcripts whose text is still a draft
+        if 'refinement' in self.request.query_params:
+            queryset = queryset.filter(refinement=self.request.query_params['refinement'])
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -26,16 +39,30 @@ class TranscriptViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         transcript = serializer.save()
 
-        transcribe_audio_task.delay(transcript.id)
+        # Uploads of already transcribed content are completed from the earlier result
+        if transcript.status != 'completed':
+            self._enqueue(transcript)
 
         response_serializer = TranscriptSerializer(transcript, context={'request': request})
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
+    def _enqueue(self, transcript, ignore_similar=False):
+        """Queue a transcript on its own, or short clips for the next batch, on the queue for its length"""
+        queue = transcription_queue(transcript.duration)
+        if is_batchable(transcript) and not ignore_similar:
+            transcript.awaiting_batch = True
+            transcript.save(update_fields=['awaiting_batch', 'updated_at'])
+            transcribe_batch_signature(queue=queue).delay()
+        else:
+            transcribe_audio_signature(transcript.id, ignore_similar=ignore_similar, queue=queue).delay()
+
     @action(detail=True, methods=['post'])
     def retry_transcription(self, request, pk=None):
         transcript = self.get_object()
+        # A transcript parked on a near-duplicate match is transcribed from scratch on request
+        offered = transcript.status == 'pending' and transcript.similar_transcript_id is not None
 
-        if transcript.status not in ['failed', 'completed']:
+        if transcript.status not in ['failed', 'completed'] and not offered:
             return Response(
                 {'error': 'Can only retry failed transcriptions'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -45,11 +72,69 @@ class TranscriptViewSet(viewsets.ModelViewSet):
         transcript.error_message = ''
         transcript.save()
 
-        transcribe_audio_task.delay(transcript.id)
+        self._enqueue(transcript, ignore_similar=offered)
+
+        serializer = self.get_serializer(transcript)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['post'])
+    def upgrade(self, request, pk=None):
+        """Re-transcribe now with the larger model the tier policy or a skipped refinement deferred"""
+        transcript = self.get_object()
+
+        if transcript.status != 'completed' or not transcript.upgrade_model or transcript.refinement == 'pending':
+            return Response(
+                {'error': 'No model upgrade available for this transcript'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        transcript.status = 'pending'
+        transcript.save(update_fields=['status', 'updated_at'])
+        transcribe_audio_signature(
+            transcript.id, ignore_similar=True, model_name=transcript.upgrade_model,
+            queue=transcription_queue(transcript.duration),
+        ).delay()
+
+        serializer = self.get_serializer(transcript)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['post'])
+    def reuse_similar(self, request, pk=None):
+        transcript = self.get_object()
+        similar = transcript.similar_transcript
+
+        if transcript.status != 'pending' or similar is None or similar.status != 'completed':
+            return Response(
+                {'error': 'No near-duplicate transcript to reuse'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        transcript.copy_results_from(similar, offset=transcript.similar_offset or 0.0, duration=transcript.duration)
 
         serializer = self.get_serializer(transcript)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def segments(self, request, pk=None):
+        transcript = self.get_object()
+        queryset = transcript.segments.all()
+
+        try:
+            if 'from' in request.query_params:
+                queryset = queryset.filter(end__gt=float(request.query_params['from']))
+            if 'to' in request.query_params:
+                queryset = queryset.filter(start__lt=float(request.query_params['to']))
+        except ValueError:
+            return Response(
+                {'error': "'from' and 'to' must be numbers of seconds"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        paginator = SegmentPagination()
+        page = paginator.paginate_queryset(queryset.order_by('start'), request, view=self)
+        serializer = TranscriptSegmentSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     @action(detail=False, methods=['get'])
     def status_summary(self, request):
         queryset = self.get_queryset()
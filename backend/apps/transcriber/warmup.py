@@ -0,0 +1,83 @@
+"""
+Worker warm-up before the first transcription.
+
+The first job on a fresh worker pays for loading its model, for torch's
+first-call kernel setup and for the first ffmpeg start (binary and codecs
+not yet in the page cache), which adds seconds to its latency. ``warm_up``
+does all of that up front with a few seconds of synthetic audio: ffmpeg
+renders and decodes a clip, and every configured model is loaded into the
+registry and, unless only loading is asked for, decodes it once. ffmpeg
+runs as a subprocess, so its part is safe even in a parent about to fork.
+
+Warm-up never fails a worker start. A step that raises is logged and
+skipped. The steps run in a background thread that is waited on for at most
+``timeout`` seconds, so a slow download or a hung decode cannot hold the
+worker back; no step is started after the deadline, and the report says how
+far it got.
+"""
+from .chunking import load_audio
+from .registry import get_model
+from .synthetic import write_synthetic_audio
+import threading
+import tempfile
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+CLIP_SECONDS = 2
+# Speech-band tone with a syllable-rate envelope, so the decoder runs past the first window
+CLIP_EXPRESSION = '0.3*sin(2*PI*300*t)*(0.6+0.4*sin(2*PI*4*t))'
+
+
+def warm_up(models, device, timeout, decode=True):
+    """
+    Load ``models`` on ``device`` and, with ``decode``, decode a short clip
+    with each. Returns after at most ``timeout`` seconds; a step still running
+    then finishes in the background but is not part of the report.
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    report = {'loaded': [], 'decoded': [], 'errors': [], 'complete': False}
+
+    thread = threading.Thread(target=_run_steps, args=(models, device, decode, deadline, report), daemon=True)
+    thread.start()
+    thread.join(timeout)
+
+    # Copies, as a step still running in the background may append to the lists
+    report = {key: list(value) if isinstance(value, list) else value for key, value in report.items()}
+    if thread.is_alive():
+        logger.warning(f"Warm-up did not finish within {timeout}s, leaving it to finish in the background")
+        report['complete'] = False
+    report['seconds'] = round(time.monotonic() - started, 2)
+    return report
+
+
+def _run_steps(models, device, decode, deadline, report):
+    def expired():
+        return time.monotonic() >= deadline
+
+    if expired():
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            audio = load_audio(write_synthetic_audio(tmp, CLIP_SECONDS, CLIP_EXPRESSION, extension='wav'))
+        except Exception as e:
+            logger.warning(f"Warm-up could not decode a synthetic clip with ffmpeg: {e}")
+            report['errors'].append('ffmpeg')
+            audio = None
+
+    for name in models:
+        if expired():
+            return
+        try:
+            model = get_model(name, device)
+            report['loaded'].append(name)
+            if decode and audio is not None and not expired():
+                model.transcribe(audio, temperature=0.0, fp16=device != 'cpu', condition_on_previous_text=False)
+                report['decoded'].append(name)
+        except Exception as e:
+            logger.warning(f"Warm-up of Whisper model {name} failed: {e}")
+            report['errors'].append(name)
+
+    report['complete'] = not expired() and not report['errors']
@@ -0,0 +1,288 @@
+"""
+Celery worker lifecycle hooks for transcription workers.
+
+This module is imported by ``tasks.py`` so the handlers are only connected in
+worker processes, never in the web tier.
+"""
+from celery.signals import worker_init, worker_process_init, worker_ready, worker_shutdown, task_postrun
+from django.conf import settings
+from .registry import get_model
+from .engines import get_engine
+from .signatures import TRANSCRIBE_AUDIO_TASK
+from .threads import apply_profile, child_index, plan_profile, thread_environment
+from .warmup import warm_up
+import threading
+import shutil
+import gc
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def process_memory():
+    """
+    Memory usage of the current process in MB.
+
+    ``uss_mb`` (unique set size) counts only the pages private to this
+    process, which is what grows per child when model weights are not shared.
+    Returns an empty dict where /proc/self/smaps_rollup is unavailable.
+    """
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                    usage[key] = int(value.split()[0]) / 1024
+    except OSError:
+        return {}
+
+    return {
+        'rss_mb': usage.get('Rss', 0),
+        'pss_mb': usage.get('Pss', 0),
+        'uss_mb': usage.get('Private_Clean', 0) + usage.get('Private_Dirty', 0),
+    }
+
+
+def prepare_for_fork(model):
+    """
+    Make a loaded model safe to share copy-on-write with forked children.
+
+    Gradients are disabled so inference never allocates grad buffers or flips
+    flags on the shared parameter tensors, and the objects allocated so far are
+    moved to the GC's permanent generation so collections in the children do
+    not write to (and therefore copy) the parent's pages.
+    """
+    if not hasattr(model, 'parameters'):
+        # Not a torch model (the fake engine): nothing to prepare but the GC
+        gc.collect()
+        gc.freeze()
+        return
+
+    import torch
+
+    model.eval()
+    for param in model.parameters():
+        param.requires_grad_(False)
+    torch.set_grad_enabled(False)
+
+    gc.collect()
+    gc.freeze()
+
+
+# Pool size of this worker, recorded in the parent and inherited by its children
+_concurrency = None
+
+
+def worker_thread_profile(index):
+    """The thread profile of pool child ``index`` under the WHISPER_WORKER_* settings"""
+    return plan_profile(
+        index,
+        getattr(settings, 'WHISPER_WORKER_CONCURRENCY', 0) or _concurrency or 1,
+        threads=getattr(settings, 'WHISPER_WORKER_THREADS', 0),
+        inter_op=getattr(settings, 'WHISPER_WORKER_INTEROP_THREADS', 1),
+        pin=getattr(settings, 'WHISPER_WORKER_PIN_CPUS', False),
+    )
+
+
+@worker_init.connect
+def plan_thread_profiles(sender=None, **kwargs):
+    """
+    Record the pool size and cap the runtimes' thread counts before anything
+    (such as a preloaded model) starts them in the parent
+    """
+    global _concurrency
+    if not getattr(settings, 'WHISPER_THREAD_PROFILE', False):
+        return
+
+    _concurrency = getattr(sender, 'concurrency', None)
+    os.environ.update(thread_environment(worker_thread_profile(0)))
+
+
+def preloads_in_parent():
+    return getattr(settings, 'WHISPER_PRELOAD_IN_PARENT', False) and get_engine().fork_safe
+
+
+@worker_init.connect
+def preload_shared_model(sender=None, **kwargs):
+    """Load the configured model in the parent before the prefork pool starts"""
+    if not getattr(settings, 'WHISPER_PRELOAD_IN_PARENT', False):
+        return
+    if not get_engine().fork_safe:
+        logger.warning(f"Models of the {get_engine().name} engine cannot be shared with forked children, not preloading")
+        return
+
+    model = get_model()
+    prepare_for_fork(model)
+    logger.info(f"Preloaded Whisper model in worker parent {os.getpid()}: {process_memory()}")
+
+
+@worker_process_init.connect
+def apply_thread_profile(**kwargs):
+    if not getattr(settings, 'WHISPER_THREAD_PROFILE', False):
+        return
+
+    profile = worker_thread_profile(child_index())
+    apply_profile(profile)
+    logger.info(f"Worker child {os.getpid()} thread profile: {profile}")
+
+
+# Warm-up report of the parent, included in the readiness file
+_warmup_report = None
+# Node name of this worker, recorded in the parent and inherited by its children
+_hostname = None
+
+
+def run_warm_up(decode=True):
+    models = getattr(settings, 'WHISPER_WARMUP_MODELS', None) or [getattr(settings, 'WHISPER_MODEL', 'base')]
+    report = warm_up(
+        models,
+        getattr(settings, 'WHISPER_DEVICE', 'cpu'),
+        getattr(settings, 'WHISPER_WARMUP_TIMEOUT_SECONDS', 60),
+        decode=decode,
+    )
+    logger.info(f"Worker process {os.getpid()} warmed up: {report}")
+    return report
+
+
+@worker_init.connect
+def warm_up_parent(sender=None, **kwargs):
+    """
+    Load the warm-up models before the consumer starts when models are
+    preloaded in the parent, so every child inherits them. Nothing is decoded
+    here: a parent that has run torch's OpenMP pool can hang its forked
+    children, so the first decode is left to them.
+    """
+    global _warmup_report
+    if not getattr(settings, 'WHISPER_WARMUP', False) or not preloads_in_parent():
+        return
+
+    _warmup_report = run_warm_up(decode=False)
+    # Keep what the warm-up allocated out of the children's collections, as prepare_for_fork does
+    gc.collect()
+    gc.freeze()
+
+
+@worker_process_init.connect
+def warm_up_child(**kwargs):
+    """
+    Without a preloaded parent every child warms up its own models and leaves
+    its report for the parent, which only marks the worker ready once all
+    children have reported. A child is only handed tasks once this has
+    returned.
+    """
+    if not getattr(settings, 'WHISPER_WARMUP', False) or preloads_in_parent():
+        return
+
+    report = run_warm_up()
+    path = ready_file(_hostname)
+    if path:
+        _write_json(os.path.join(child_reports_dir(path), f'{child_index()}.json'), {'pid': os.getpid(), 'warmup': report})
+
+
+# How often the parent looks for the children's warm-up reports
+READY_POLL_SECONDS = 0.5
+_stopping = threading.Event()
+
+
+def ready_file(hostname):
+    """The readiness file of a worker node, or '' if WHISPER_READY_FILE is not set"""
+    path = getattr(settings, 'WHISPER_READY_FILE', '')
+    return path.replace('{hostname}', hostname or 'worker') if path else ''
+
+
+def child_reports_dir(path):
+    """Where the children of the worker with readiness file ``path`` leave their warm-up reports"""
+    return f'{path}.children'
+
+
+def _write_json(path, data):
+    # Written aside and renamed, so a probe or the parent never reads half a file
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(data, f)
+    os.replace(f'{path}.tmp', path)
+
+
+def child_reports(path):
+    """Warm-up reports left by the children so far, one per pool slot"""
+    directory = child_reports_dir(path)
+    try:
+        names = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+    except FileNotFoundError:
+        return []
+
+    reports = []
+    for name in names:
+        with open(os.path.join(directory, name)) as f:
+            reports.append(json.load(f))
+    return reports
+
+
+def await_child_reports(path, pool_size):
+    """Write the readiness file once every pool child has reported its warm-up, or give up at shutdown"""
+    while True:
+        reports = child_reports(path)
+        if len(reports) >= pool_size:
+            break
+        if _stopping.wait(READY_POLL_SECONDS):
+            return
+
+    _write_json(path, {'pid': os.getpid(), 'children': reports})
+    logger.info(f"All {pool_size} worker children warmed up, wrote {path}")
+
+
+@worker_init.connect
+def record_hostname(sender=None, **kwargs):
+    global _hostname
+    _hostname = getattr(sender, 'hostname', None)
+
+
+@worker_ready.connect
+def mark_ready(sender=None, **kwargs):
+    """
+    Write the readiness file once the worker consumes its queues and, when
+    the children warm up on their own, all of them have reported back
+    """
+    path = ready_file(getattr(sender, 'hostname', ''))
+    if not path:
+        return
+
+    if getattr(settings, 'WHISPER_WARMUP', False) and not preloads_in_parent():
+        pool_size = getattr(getattr(sender, 'pool', None), 'num_processes', None) or 1
+        threading.Thread(target=await_child_reports, args=(path, pool_size), daemon=True).start()
+        return
+
+    _write_json(path, {'pid': os.getpid(), 'warmup': _warmup_report})
+
+
+@worker_shutdown.connect
+def stop_awaiting_children(**kwargs):
+    _stopping.set()
+
+
+@worker_init.connect
+@worker_shutdown.connect
+def clear_ready(sender=None, **kwargs):
+    """Remove the readiness file at shutdown, and a stale one left by a crash at start"""
+    path = ready_file(getattr(sender, 'hostname', ''))
+    if not path:
+        return
+
+    if os.path.exists(path):
+        os.remove(path)
+    shutil.rmtree(child_reports_dir(path), ignore_errors=True)
+
+
+@worker_process_init.connect
+def report_child_memory(**kwargs):
+    logger.info(f"Worker child {os.getpid()} started: {process_memory()}")
+
+
+@task_postrun.connect
+def report_task_memory(sender=None, task_id=None, **kwargs):
+    if getattr(sender, 'name', None) != TRANSCRIBE_AUDIO_TASK:
+        return
+    logger.info(f"Worker child {os.getpid()} after task {task_id}: {process_memory()}")
@@ -4,10 +4,17 @@ from django.utils import timezone
 
 
 class User(AbstractUser):
+    TRANSCRIPTION_TIER_CHOICES = [
+        ('free', 'Free'),
+        ('standard', 'Standard'),
+        ('premium', 'Premium'),
+    ]
+
     email = models.EmailField(unique=True)
     first_name = models.CharField(max_length=30, blank=True)
     last_name = models.CharField(max_length=30, blank=True)
     date_joined = models.DateTimeField(default=timezone.now)
+    transcription_tier = models.CharField(max_length=20, choices=TRANSCRIPTION_TIER_CHOICES, default='standard')
 
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email']
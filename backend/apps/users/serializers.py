@@ -28,5 +28,5 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'date_joined']
-        read_only_fields = ['id', 'date_joined']
\ No newline at end of file
+        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'date_joined', 'transcription_tier']
+        read_only_fields = ['id', 'date_joined', 'transcription_tier']
\ No newline at end of file
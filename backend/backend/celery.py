@@ -0,0 +1,17 @@
+"""
+Celery application for the backend project.
+
+Task modules are only imported by worker processes (through autodiscovery),
+so the web tier can enqueue jobs by name without loading Whisper, torch or
+the Gemini client.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+app = Celery('backend')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -189,6 +189,155 @@ GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
 WHISPER_MODEL = os.getenv('WHISPER_MODEL', 'base')
 WHISPER_DEVICE = os.getenv('WHISPER_DEVICE', 'cpu')
+# Speech recognition engine: 'openai-whisper', 'faster-whisper' (CTranslate2, install faster-whisper;
+# WHISPER_CT2_COMPUTE_TYPE for models not in WHISPER_INT8_MODELS) or 'fake' (deterministic, no model)
+WHISPER_ENGINE = os.getenv('WHISPER_ENGINE', 'openai-whisper')
+WHISPER_CT2_COMPUTE_TYPE = os.getenv('WHISPER_CT2_COMPUTE_TYPE', 'default')
+# Combined weight size (in MB) of Whisper models kept loaded per worker process
+WHISPER_MODEL_CACHE_MB = int(os.getenv('WHISPER_MODEL_CACHE_MB', '4096'))
+# Load the model in the Celery parent so prefork children share the weights copy-on-write
+WHISPER_PRELOAD_IN_PARENT = os.getenv('WHISPER_PRELOAD_IN_PARENT', 'False').lower() == 'true'
+# Int8 CPU inference: models listed in WHISPER_INT8_MODELS (sizes such as 'tiny,base', which cover
+# their .en variants, tiers of WHISPER_TIER_MODELS, or 'all') are loaded with dynamically
+# int8-quantized linear layers when WHISPER_DEVICE is cpu. Compare with `manage.py bench_quantization`
+WHISPER_INT8_MODELS = {name.strip() for name in os.getenv('WHISPER_INT8_MODELS', '').split(',') if name.strip()}
+# Worker thread profiles: with WHISPER_THREAD_PROFILE on, every worker child runs torch and the
+# OpenMP/MKL runtimes with WHISPER_WORKER_THREADS intra-op threads (0 = cores / concurrency, the
+# concurrency taken from the worker's -c unless WHISPER_WORKER_CONCURRENCY is set) and
+# WHISPER_WORKER_INTEROP_THREADS inter-op threads, pinned to its own CPUs with WHISPER_WORKER_PIN_CPUS.
+# Compare combinations with `manage.py bench_worker_threads`
+WHISPER_THREAD_PROFILE = os.getenv('WHISPER_THREAD_PROFILE', 'False').lower() == 'true'
+WHISPER_WORKER_CONCURRENCY = int(os.getenv('WHISPER_WORKER_CONCURRENCY', '0'))
+WHISPER_WORKER_THREADS = int(os.getenv('WHISPER_WORKER_THREADS', '0'))
+WHISPER_WORKER_INTEROP_THREADS = int(os.getenv('WHISPER_WORKER_INTEROP_THREADS', '1'))
+WHISPER_WORKER_PIN_CPUS = os.getenv('WHISPER_WORKER_PIN_CPUS', 'False').lower() == 'true'
+# Worker warm-up: with WHISPER_WARMUP on, WHISPER_WARMUP_MODELS (default: WHISPER_MODEL) are loaded
+# and decode a short synthetic clip before the worker takes jobs (only loaded, in the parent, with
+# WHISPER_PRELOAD_IN_PARENT; otherwise in every child), giving up after WHISPER_WARMUP_TIMEOUT_SECONDS.
+# WHISPER_READY_FILE ('{hostname}' is replaced by the worker's node name) is written once the worker
+# consumes its queues and every child that warms up has reported, and removed at shutdown, for
+# readiness probes
+WHISPER_WARMUP = os.getenv('WHISPER_WARMUP', 'False').lower() == 'true'
+WHISPER_WARMUP_MODELS = [name.strip() for name in os.getenv('WHISPER_WARMUP_MODELS', '').split(',') if name.strip()]
+WHISPER_WARMUP_TIMEOUT_SECONDS = float(os.getenv('WHISPER_WARMUP_TIMEOUT_SECONDS', '60'))
+WHISPER_READY_FILE = os.getenv('WHISPER_READY_FILE', '')
+
+# Chunked transcription: recordings longer than WHISPER_CHUNK_MIN_SECONDS are split at
+# silence-aligned boundaries and decoded by WHISPER_CHUNK_WORKERS processes (0 = all cores),
+# also from the children of the default prefork pool
+WHISPER_CHUNKED = os.getenv('WHISPER_CHUNKED', 'False').lower() == 'true'
+WHISPER_CHUNK_MIN_SECONDS = float(os.getenv('WHISPER_CHUNK_MIN_SECONDS', '600'))
+WHISPER_CHUNK_SECONDS = float(os.getenv('WHISPER_CHUNK_SECONDS', '300'))
+WHISPER_CHUNK_OVERLAP_SECONDS = float(os.getenv('WHISPER_CHUNK_OVERLAP_SECONDS', '2'))
+WHISPER_CHUNK_WORKERS = int(os.getenv('WHISPER_CHUNK_WORKERS', '0'))
+# Streaming decode: read ffmpeg output in windows of WHISPER_STREAM_WINDOW_SECONDS so peak
+# memory does not grow with the recording's length
+WHISPER_STREAMING = os.getenv('WHISPER_STREAMING', 'False').lower() == 'true'
+WHISPER_STREAM_WINDOW_SECONDS = float(os.getenv('WHISPER_STREAM_WINDOW_SECONDS', '300'))
+# Incremental persistence: flush decoded segments and the partial text while a job runs,
+# at most every WHISPER_FLUSH_SEGMENTS segments or WHISPER_FLUSH_SECONDS seconds. The job is
+# decoded in streaming windows of at most WHISPER_PROGRESS_WINDOW_SECONDS, one progress report each
+WHISPER_INCREMENTAL = os.getenv('WHISPER_INCREMENTAL', 'False').lower() == 'true'
+WHISPER_FLUSH_SEGMENTS = int(os.getenv('WHISPER_FLUSH_SEGMENTS', '50'))
+WHISPER_FLUSH_SECONDS = float(os.getenv('WHISPER_FLUSH_SECONDS', '5'))
+WHISPER_PROGRESS_WINDOW_SECONDS = float(os.getenv('WHISPER_PROGRESS_WINDOW_SECONDS', '30'))
+# Cluster fan-out: recordings longer than WHISPER_FANOUT_MIN_SECONDS are split into chunk
+# subtasks that any transcription worker can pick up (requires a Celery result backend)
+WHISPER_FANOUT = os.getenv('WHISPER_FANOUT', 'False').lower() == 'true'
+WHISPER_FANOUT_MIN_SECONDS = float(os.getenv('WHISPER_FANOUT_MIN_SECONDS', '1800'))
+# Batched decoding: uploads no longer than WHISPER_BATCH_MAX_SECONDS (at most one 30 s window)
+# are decoded together, up to WHISPER_BATCH_SIZE per batch, waiting at most
+# WHISPER_BATCH_MAX_WAIT_SECONDS for a batch to fill
+WHISPER_BATCHING = os.getenv('WHISPER_BATCHING', 'False').lower() == 'true'
+WHISPER_BATCH_SIZE = int(os.getenv('WHISPER_BATCH_SIZE', '8'))
+WHISPER_BATCH_MAX_SECONDS = float(os.getenv('WHISPER_BATCH_MAX_SECONDS', '30'))
+WHISPER_BATCH_MAX_WAIT_SECONDS = float(os.getenv('WHISPER_BATCH_MAX_WAIT_SECONDS', '2'))
+# Queue routing: the duration is probed at upload, and recordings shorter than
+# WHISPER_LONG_MIN_SECONDS go to WHISPER_SHORT_QUEUE, longer or unknown ones to WHISPER_LONG_QUEUE.
+# The ETA shown while queued assumes WHISPER_REALTIME_FACTOR seconds of work per second of audio
+# and WHISPER_SHORT_CONCURRENCY / WHISPER_LONG_CONCURRENCY worker processes per queue
+WHISPER_SHORT_QUEUE = os.getenv('WHISPER_SHORT_QUEUE', 'transcribe.short')
+WHISPER_LONG_QUEUE = os.getenv('WHISPER_LONG_QUEUE', 'transcribe.long')
+WHISPER_LONG_MIN_SECONDS = float(os.getenv('WHISPER_LONG_MIN_SECONDS', '600'))
+WHISPER_REALTIME_FACTOR = float(os.getenv('WHISPER_REALTIME_FACTOR', '0.5'))
+WHISPER_SHORT_CONCURRENCY = int(os.getenv('WHISPER_SHORT_CONCURRENCY', '1'))
+WHISPER_LONG_CONCURRENCY = int(os.getenv('WHISPER_LONG_CONCURRENCY', '1'))
+# Model tier policy: when WHISPER_MODEL_POLICY is on, each job starts from its owner's tier model
+# (WHISPER_TIER_MODELS, 'tier:model' pairs) and steps one size down per WHISPER_BACKLOG_STEPS
+# threshold (seconds of audio queued or running) it exceeds, and once more for recordings longer
+# than WHISPER_TIER_LONG_SECONDS, down to WHISPER_MIN_MODEL. Downgraded transcripts are re-run
+# with their tier model every WHISPER_UPGRADE_INTERVAL_MINUTES while the backlog is below
+# WHISPER_UPGRADE_MAX_BACKLOG_SECONDS
+WHISPER_MODEL_POLICY = os.getenv('WHISPER_MODEL_POLICY', 'False').lower() == 'true'
+WHISPER_TIER_MODELS = dict(
+    pair.split(':', 1) for pair in os.getenv('WHISPER_TIER_MODELS', 'free:base,standard:small,premium:medium').split(',')
+)
+WHISPER_DEFAULT_TIER = os.getenv('WHISPER_DEFAULT_TIER', 'standard')
+WHISPER_BACKLOG_STEPS = [float(step) for step in os.getenv('WHISPER_BACKLOG_STEPS', '3600,14400').split(',') if step]
+WHISPER_TIER_LONG_SECONDS = float(os.getenv('WHISPER_TIER_LONG_SECONDS', '7200'))
+WHISPER_MIN_MODEL = os.getenv('WHISPER_MIN_MODEL', 'base')
+WHISPER_UPGRADE_MAX_BACKLOG_SECONDS = float(os.getenv('WHISPER_UPGRADE_MAX_BACKLOG_SECONDS', '600'))
+WHISPER_UPGRADE_BATCH = int(os.getenv('WHISPER_UPGRADE_BATCH', '20'))
+WHISPER_UPGRADE_INTERVAL_MINUTES = float(os.getenv('WHISPER_UPGRADE_INTERVAL_MINUTES', '15'))
+# Language routing: the first 30 s of each recording are identified by WHISPER_LANGUAGE_PROBE_MODEL,
+# and English recordings (at least WHISPER_LANGUAGE_MIN_PROBABILITY) use the .en checkpoint of
+# their model size, all others the multilingual one
+WHISPER_LANGUAGE_ROUTING = os.getenv('WHISPER_LANGUAGE_ROUTING', 'False').lower() == 'true'
+WHISPER_LANGUAGE_PROBE_MODEL = os.getenv('WHISPER_LANGUAGE_PROBE_MODEL', 'tiny')
+WHISPER_LANGUAGE_MIN_PROBABILITY = float(os.getenv('WHISPER_LANGUAGE_MIN_PROBABILITY', '0.8'))
+# Two-pass transcription: a draft with WHISPER_DRAFT_MODEL is saved first, then the selected model
+# refines it from WHISPER_REFINE_QUEUE (give it few workers); refinement is skipped while more
+# than WHISPER_REFINE_MAX_BACKLOG_SECONDS of audio is queued and left to the upgrade path
+WHISPER_TWO_PASS = os.getenv('WHISPER_TWO_PASS', 'False').lower() == 'true'
+WHISPER_DRAFT_MODEL = os.getenv('WHISPER_DRAFT_MODEL', 'base')
+WHISPER_REFINE_QUEUE = os.getenv('WHISPER_REFINE_QUEUE', 'transcribe.refine')
+WHISPER_REFINE_MAX_BACKLOG_SECONDS = float(os.getenv('WHISPER_REFINE_MAX_BACKLOG_SECONDS', '1800'))
+# Selective re-decoding: after completion, speech segments with avg_logprob below
+# WHISPER_REDECODE_LOGPROB_THRESHOLD (and no_speech_prob below WHISPER_REDECODE_NO_SPEECH_THRESHOLD)
+# are decoded again with WHISPER_REDECODE_MODEL (blank: the same model) and beam search, unless
+# more than WHISPER_REDECODE_MAX_FRACTION of the recording is weak
+WHISPER_REDECODE = os.getenv('WHISPER_REDECODE', 'False').lower() == 'true'
+WHISPER_REDECODE_MODEL = os.getenv('WHISPER_REDECODE_MODEL', '')
+WHISPER_REDECODE_BEAM_SIZE = int(os.getenv('WHISPER_REDECODE_BEAM_SIZE', '5'))
+WHISPER_REDECODE_LOGPROB_THRESHOLD = float(os.getenv('WHISPER_REDECODE_LOGPROB_THRESHOLD', '-1.0'))
+WHISPER_REDECODE_NO_SPEECH_THRESHOLD = float(os.getenv('WHISPER_REDECODE_NO_SPEECH_THRESHOLD', '0.6'))
+WHISPER_REDECODE_MERGE_GAP_SECONDS = float(os.getenv('WHISPER_REDECODE_MERGE_GAP_SECONDS', '1.0'))
+WHISPER_REDECODE_MAX_FRACTION = float(os.getenv('WHISPER_REDECODE_MAX_FRACTION', '0.5'))
+# Voice-activity detection: only speech spans (louder than the noise floor by WHISPER_VAD_MARGIN_DB,
+# speech-band and syllable-modulated) are decoded, joined across pauses shorter than
+# WHISPER_VAD_MIN_SILENCE_SECONDS and padded by WHISPER_VAD_PAD_SECONDS; recordings with less than
+# WHISPER_VAD_MIN_SKIP_RATIO non-speech are decoded whole
+WHISPER_VAD = os.getenv('WHISPER_VAD', 'False').lower() == 'true'
+WHISPER_VAD_MARGIN_DB = float(os.getenv('WHISPER_VAD_MARGIN_DB', '12'))
+WHISPER_VAD_MIN_SPEECH_SECONDS = float(os.getenv('WHISPER_VAD_MIN_SPEECH_SECONDS', '0.25'))
+WHISPER_VAD_MIN_SILENCE_SECONDS = float(os.getenv('WHISPER_VAD_MIN_SILENCE_SECONDS', '1.0'))
+WHISPER_VAD_PAD_SECONDS = float(os.getenv('WHISPER_VAD_PAD_SECONDS', '0.2'))
+WHISPER_VAD_MIN_SKIP_RATIO = float(os.getenv('WHISPER_VAD_MIN_SKIP_RATIO', '0.05'))
+# Video ingest: transcribe only the extracted audio track of video uploads, then keep, archive
+# (move to INGEST_VIDEO_ARCHIVE_DIR, outside MEDIA_ROOT) or drop the video. Uploads are kept
+# unless archiving or dropping them is asked for.
+INGEST_EXTRACT_AUDIO = os.getenv('INGEST_EXTRACT_AUDIO', 'True').lower() == 'true'
+INGEST_VIDEO_ACTION = os.getenv('INGEST_VIDEO_ACTION', 'keep')
+INGEST_VIDEO_ARCHIVE_DIR = os.getenv('INGEST_VIDEO_ARCHIVE_DIR', str(BASE_DIR / 'archive'))
+# Decoded audio cache: normalized PCM is written once per upload and memory-mapped by retries
+# and re-runs, evicting least recently used entries beyond WHISPER_PCM_CACHE_MB (0, the default, disables it)
+WHISPER_PCM_CACHE_DIR = os.getenv('WHISPER_PCM_CACHE_DIR', str(BASE_DIR / 'cache' / 'pcm'))
+WHISPER_PCM_CACHE_MB = int(os.getenv('WHISPER_PCM_CACHE_MB', '0'))
+# Near-duplicate detection: every recording is fingerprinted before transcription and matched
+# against earlier transcripts of the same user ('user') or the whole deployment ('all').
+# On a match, 'offer' parks the transcript for the client to reuse or transcribe anyway,
+# 'auto' reuses the earlier result right away, and 'off' (the default) disables fingerprinting
+WHISPER_SIMILAR_ACTION = os.getenv('WHISPER_SIMILAR_ACTION', 'off')
+WHISPER_SIMILAR_SCOPE = os.getenv('WHISPER_SIMILAR_SCOPE', 'user')
+WHISPER_SIMILAR_MAX_BER = float(os.getenv('WHISPER_SIMILAR_MAX_BER', '0.3'))
+WHISPER_SIMILAR_MIN_COVERAGE = float(os.getenv('WHISPER_SIMILAR_MIN_COVERAGE', '0.9'))
+# Audio compaction: a periodic job re-encodes completed transcripts' source files to mono
+# Opus at AUDIO_COMPACT_BITRATE, at most AUDIO_COMPACT_BATCH files per run. It replaces the
+# uploaded originals, so it is only scheduled when AUDIO_COMPACT_ENABLED is set
+AUDIO_COMPACT_ENABLED = os.getenv('AUDIO_COMPACT_ENABLED', 'False').lower() == 'true'
+AUDIO_COMPACT_BITRATE = os.getenv('AUDIO_COMPACT_BITRATE', '24k')
+AUDIO_COMPACT_BATCH = int(os.getenv('AUDIO_COMPACT_BATCH', '50'))
+AUDIO_COMPACT_INTERVAL_HOURS = float(os.getenv('AUDIO_COMPACT_INTERVAL_HOURS', '6'))
 
 MAX_UPLOAD_SIZE = os.getenv('MAX_UPLOAD_SIZE', '100MB')
 ALLOWED_AUDIO_FORMATS = os.getenv('ALLOWED_AUDIO_FORMATS', 'mp3,wav,m4a,flac,ogg').split(',')
@@ -200,6 +349,20 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+if WHISPER_WARMUP:
+    # Children that warm up must not be killed for reporting in late
+    CELERY_WORKER_PROC_ALIVE_TIMEOUT = WHISPER_WARMUP_TIMEOUT_SECONDS + 30
+CELERY_BEAT_SCHEDULE = {}
+if AUDIO_COMPACT_ENABLED:
+    CELERY_BEAT_SCHEDULE['compact-transcript-audio'] = {
+        'task': 'apps.transcriber.tasks.compact_audio_task',
+        'schedule': AUDIO_COMPACT_INTERVAL_HOURS * 3600,
+    }
+if WHISPER_MODEL_POLICY:
+    CELERY_BEAT_SCHEDULE['upgrade-transcript-models'] = {
+        'task': 'apps.transcriber.tasks.upgrade_transcripts_task',
+        'schedule': WHISPER_UPGRADE_INTERVAL_MINUTES * 60,
+    }
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file